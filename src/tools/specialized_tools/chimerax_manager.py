@@ -6,6 +6,7 @@ Supports both ChimeraX Python API and headless subprocess operations.
 """
 
 import os
+import pathlib
 import subprocess
 from typing import Optional, Tuple, List
 
@@ -15,6 +16,7 @@ class ChimeraXManager:
     
     def __init__(self, workdir: str):
         self.workdir = workdir
+        self._wd = pathlib.Path(workdir)
         self.workflow_logger = None  # Set by AutoGenSystem
         
         # Check if ChimeraX is available
@@ -26,6 +28,10 @@ class ChimeraXManager:
         if self.workflow_logger:
             self.workflow_logger.log_tool_invocation("ChimeraXManager", {}, message)
     
+    def _resolve(self, path: str) -> str:
+        """Resolve a path relative to the working directory."""
+        return path if os.path.isabs(path) else str(self._wd / path)
+    
     def _find_chimerax(self) -> Optional[str]:
         """Find ChimeraX executable."""
         # Common ChimeraX paths
@@ -85,10 +91,7 @@ class ChimeraXManager:
         """
         self._log(f"Cleaning structure: {pdb_file}")
         
-        if not os.path.isabs(pdb_file):
-            pdb_path = os.path.join(self.workdir, pdb_file)
-        else:
-            pdb_path = pdb_file
+        pdb_path = self._resolve(pdb_file)
         
         if not os.path.exists(pdb_path):
             return f"❌ PDB file not found: {pdb_file}"
@@ -97,7 +100,7 @@ class ChimeraXManager:
             base = os.path.splitext(os.path.basename(pdb_file))[0]
             output_file = f"{base}_cleaned.pdb"
         
-        output_path = os.path.join(self.workdir, output_file)
+        output_path = self._resolve(output_file)
         
         # Try API first, fall back to subprocess
         if self.use_api:
@@ -170,7 +173,7 @@ class ChimeraXManager:
             commands.append('exit')
             
             # Create temporary script file
-            script_file = os.path.join(self.workdir, '_chimerax_clean.cxc')
+            script_file = self._resolve('_chimerax_clean.cxc')
             with open(script_file, 'w') as f:
                 f.write('\n'.join(commands))
             
@@ -233,9 +236,9 @@ class ChimeraXManager:
         if not self.chimerax_path:
             return "❌ ChimeraX not found. Cannot create visualization."
         
-        traj_path = os.path.join(self.workdir, trajectory_file) if not os.path.isabs(trajectory_file) else trajectory_file
-        top_path = os.path.join(self.workdir, topology_file) if not os.path.isabs(topology_file) else topology_file
-        output_path = os.path.join(self.workdir, output_movie)
+        traj_path = self._resolve(trajectory_file)
+        top_path = self._resolve(topology_file)
+        output_path = self._resolve(output_movie)
         
         if not os.path.exists(traj_path):
             return f"❌ Trajectory not found: {trajectory_file}"
@@ -255,7 +258,7 @@ class ChimeraXManager:
                 'exit'
             ]
             
-            script_file = os.path.join(self.workdir, '_chimerax_movie.cxc')
+            script_file = self._resolve('_chimerax_movie.cxc')
             with open(script_file, 'w') as f:
                 f.write('\n'.join(commands))
             
@@ -301,9 +304,9 @@ class ChimeraXManager:
         except ImportError:
             return "❌ MDTraj not installed. Run: pip install mdtraj"
         
-        traj_path = os.path.join(self.workdir, trajectory_file) if not os.path.isabs(trajectory_file) else trajectory_file
-        ref_path = os.path.join(self.workdir, reference_pdb) if not os.path.isabs(reference_pdb) else reference_pdb
-        output_path = os.path.join(self.workdir, output_file)
+        traj_path = self._resolve(trajectory_file)
+        ref_path = self._resolve(reference_pdb)
+        output_path = self._resolve(output_file)
         
         if not os.path.exists(traj_path):
             return f"❌ Trajectory not found: {trajectory_file}"
@@ -332,6 +335,100 @@ class ChimeraXManager:
         except Exception as e:
             return f"❌ RMSD calculation failed: {str(e)}"
     
+    # Map style/color names to ChimeraX commands
+    FIGURE_STYLE_CMDS = {
+        'ribbon': 'cartoon; hide atoms',
+        'surface': 'surface; hide cartoon',
+        'stick': 'show atoms; style stick',
+        'ball': 'show atoms; style ball',
+    }
+    
+    FIGURE_COLOR_CMDS = {
+        'bychain': 'color bychain',
+        'byfactor': 'color bfactor',
+        'rainbow': 'color rainbow',
+        'secondary': 'color byattr ss_type',
+    }
+    
+    def create_figure_async(self, pdb_file: str, output_image: str = "structure.png",
+                            style: str = "ribbon", color: str = "bychain",
+                            width: int = 1920, height: int = 1080) -> subprocess.Popen:
+        """
+        Start rendering a structure figure without waiting for ChimeraX to finish.
+        
+        Args:
+            pdb_file: Input PDB file
+            output_image: Output image filename
+            style: Visualization style ('ribbon', 'surface', 'stick')
+            color: Coloring scheme ('bychain', 'byfactor', 'rainbow')
+            width: Image width
+            height: Image height
+            
+        Returns:
+            Running ChimeraX process. Use proc.wait()/proc.poll() or await_all().
+        """
+        self._log(f"Creating figure: {pdb_file}")
+        
+        if not self.chimerax_path:
+            raise RuntimeError("ChimeraX not found. Cannot create figure.")
+        
+        pdb_path = self._resolve(pdb_file)
+        output_path = self._resolve(output_image)
+        
+        if not os.path.exists(pdb_path):
+            raise FileNotFoundError(f"PDB file not found: {pdb_file}")
+        
+        commands = [
+            f'open "{pdb_path}"',
+            self.FIGURE_STYLE_CMDS.get(style, 'cartoon'),
+            self.FIGURE_COLOR_CMDS.get(color, 'color bychain'),
+            'graphics silhouettes true',
+            'lighting soft',
+            'set bgcolor white',
+            f'windowsize {width} {height}',
+            f'save "{output_path}" supersample 3',
+            'exit'
+        ]
+        
+        # One script per output so concurrent renders don't clobber each other
+        base = os.path.splitext(os.path.basename(output_image))[0]
+        script_file = self._resolve(f'_chimerax_figure_{base}.cxc')
+        with open(script_file, 'w') as f:
+            f.write('\n'.join(commands))
+        
+        proc = subprocess.Popen(
+            [self.chimerax_path, '--nogui', '--script', script_file],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        proc.script_file = script_file
+        proc.output_path = output_path
+        return proc
+    
+    def await_all(self, procs: List[subprocess.Popen], timeout: float = 120) -> List[bool]:
+        """
+        Wait for ChimeraX processes started by create_figure_async().
+        
+        Args:
+            procs: Processes to wait on
+            timeout: Per-process timeout in seconds; processes exceeding it are killed
+            
+        Returns:
+            List of booleans, True where the output file was produced
+        """
+        results = []
+        for proc in procs:
+            try:
+                proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+            finally:
+                script_file = getattr(proc, 'script_file', None)
+                if script_file and os.path.exists(script_file):
+                    os.remove(script_file)
+            results.append(os.path.exists(getattr(proc, 'output_path', '')))
+        return results
+    
     def create_figure(self, pdb_file: str, output_image: str = "structure.png",
                      style: str = "ribbon", color: str = "bychain",
                      width: int = 1920, height: int = 1080) -> str:
@@ -349,59 +446,25 @@ class ChimeraXManager:
         Returns:
             Status message
         """
-        self._log(f"Creating figure: {pdb_file}")
-        
         if not self.chimerax_path:
             return "❌ ChimeraX not found. Cannot create figure."
         
-        pdb_path = os.path.join(self.workdir, pdb_file) if not os.path.isabs(pdb_file) else pdb_file
-        output_path = os.path.join(self.workdir, output_image)
-        
-        if not os.path.exists(pdb_path):
+        if not os.path.exists(self._resolve(pdb_file)):
             return f"❌ PDB file not found: {pdb_file}"
         
         try:
-            # Map style to ChimeraX commands
-            style_cmds = {
-                'ribbon': 'cartoon; hide atoms',
-                'surface': 'surface; hide cartoon',
-                'stick': 'show atoms; style stick',
-                'ball': 'show atoms; style ball',
-            }
-            style_cmd = style_cmds.get(style, 'cartoon')
-            
-            color_cmds = {
-                'bychain': 'color bychain',
-                'byfactor': 'color bfactor',
-                'rainbow': 'color rainbow',
-                'secondary': 'color byattr ss_type',
-            }
-            color_cmd = color_cmds.get(color, 'color bychain')
-            
-            commands = [
-                f'open "{pdb_path}"',
-                style_cmd,
-                color_cmd,
-                'graphics silhouettes true',
-                'lighting soft',
-                'set bgcolor white',
-                f'windowsize {width} {height}',
-                f'save "{output_path}" supersample 3',
-                'exit'
-            ]
-            
-            script_file = os.path.join(self.workdir, '_chimerax_figure.cxc')
-            with open(script_file, 'w') as f:
-                f.write('\n'.join(commands))
-            
-            result = subprocess.run(
-                [self.chimerax_path, '--nogui', '--script', script_file],
-                capture_output=True, text=True, timeout=120
-            )
+            proc = self.create_figure_async(pdb_file, output_image, style, color,
+                                            width, height)
+            try:
+                proc.communicate(timeout=120)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                return "❌ Figure creation timed out"
+            finally:
+                os.remove(proc.script_file)
             
-            os.remove(script_file)
-            
-            if os.path.exists(output_path):
+            if os.path.exists(proc.output_path):
                 return f"""✅ Figure created:
   🖼️  Output: {output_image}
   🎨 Style: {style}
@@ -410,8 +473,6 @@ class ChimeraXManager:
             else:
                 return f"❌ Figure creation failed"
                 
-        except subprocess.TimeoutExpired:
-            return "❌ Figure creation timed out"
         except Exception as e:
             return f"❌ Figure creation error: {str(e)}"
     
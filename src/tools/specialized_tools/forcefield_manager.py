@@ -5,7 +5,10 @@ Handles OpenMM force field management, validation, and custom force field downlo
 Replaces materials-science EAM/MEAM potential management.
 """
 
+import hashlib
+import importlib.util
 import os
+import pathlib
 import requests
 from typing import Optional, Tuple, Dict, List
 
@@ -49,6 +52,7 @@ class ForceFieldManager:
     
     def __init__(self, workdir: str, websurfer=None):
         self.workdir = workdir
+        self._wd = pathlib.Path(workdir)
         self.websurfer = websurfer
         self.workflow_logger = None  # Set by AutoGenSystem
         
@@ -56,12 +60,55 @@ class ForceFieldManager:
         self.forcefield_validated = False
         self.last_forcefield_file = None
         self.last_forcefield_name = None
+        
+        # Successful validations of downloaded files, keyed by (path, sha256)
+        self._validated_cache: Dict[Tuple[str, str], str] = {}
+        
+        # Parsed ForceField objects, keyed by force field name
+        self._ff_cache: Dict[str, tuple] = {}
     
     def _log(self, message: str):
         """Log message if workflow logger is available."""
         if self.workflow_logger:
             self.workflow_logger.log_tool_invocation("ForceFieldManager", {}, message)
     
+    def _resolve(self, path: str) -> str:
+        """Resolve a path relative to the working directory."""
+        return path if os.path.isabs(path) else str(self._wd / path)
+    
+    def _get_or_load_ff(self, forcefield_name: str) -> tuple:
+        """
+        Load (or reuse) the OpenMM ForceField for a name or XML file.
+        
+        Returns:
+            Tuple of (ForceField, protein_ff, water_ff)
+        
+        Raises:
+            ImportError if OpenMM is missing, or any ForceField parse error
+        """
+        if forcefield_name in self._ff_cache:
+            return self._ff_cache[forcefield_name]
+        
+        from openmm.app import ForceField
+        
+        # Handle shorthand names
+        if forcefield_name in self.STANDARD_FORCEFIELDS:
+            ff_info = self.STANDARD_FORCEFIELDS[forcefield_name]
+            protein_ff = ff_info['protein']
+            water_ff = ff_info['water']
+        else:
+            protein_ff = forcefield_name
+            water_ff = None
+        
+        if water_ff:
+            ff = ForceField(protein_ff, water_ff)
+        else:
+            ff = ForceField(protein_ff)
+        
+        entry = (ff, protein_ff, water_ff)
+        self._ff_cache[forcefield_name] = entry
+        return entry
+    
     def set_websurfer(self, websurfer):
         """Set the websurfer agent for web searches."""
         self.websurfer = websurfer
@@ -101,26 +148,13 @@ class ForceFieldManager:
         """
         self._log(f"Validating force field: {forcefield_name}")
         
-        try:
-            from openmm.app import ForceField
-        except ImportError:
+        # Availability probe only; OpenMM itself is imported when a force field is loaded
+        if importlib.util.find_spec("openmm") is None:
             return False, "❌ OpenMM not installed. Run: pip install openmm"
         
-        # Handle shorthand names
-        if forcefield_name in self.STANDARD_FORCEFIELDS:
-            ff_info = self.STANDARD_FORCEFIELDS[forcefield_name]
-            protein_ff = ff_info['protein']
-            water_ff = ff_info['water']
-        else:
-            protein_ff = forcefield_name
-            water_ff = None
-        
         try:
             # Try to load force field
-            if water_ff:
-                ff = ForceField(protein_ff, water_ff)
-            else:
-                ff = ForceField(protein_ff)
+            ff, protein_ff, water_ff = self._get_or_load_ff(forcefield_name)
             
             self.forcefield_validated = True
             self.last_forcefield_name = forcefield_name
@@ -149,32 +183,22 @@ class ForceFieldManager:
         self._log(f"Checking force field coverage for: {pdb_file}")
         
         try:
-            from openmm.app import ForceField, PDBFile
+            from openmm.app import PDBFile
         except ImportError:
             return False, "❌ OpenMM not installed"
         
-        if not os.path.isabs(pdb_file):
-            pdb_path = os.path.join(self.workdir, pdb_file)
-        else:
-            pdb_path = pdb_file
+        pdb_path = self._resolve(pdb_file)
         
         if not os.path.exists(pdb_path):
             return False, f"❌ PDB file not found: {pdb_file}"
         
-        # Get force field files
-        if forcefield_name in self.STANDARD_FORCEFIELDS:
-            ff_info = self.STANDARD_FORCEFIELDS[forcefield_name]
-            ff_files = [ff_info['protein'], ff_info['water']]
-        else:
-            ff_files = [forcefield_name]
-        
         try:
             # Load PDB
             pdb = PDBFile(pdb_path)
             topology = pdb.topology
             
-            # Try to create force field and system
-            ff = ForceField(*ff_files)
+            # Reuse the force field parsed by validate_forcefield(), if any
+            ff, _, _ = self._get_or_load_ff(forcefield_name)
             
             # This will raise an exception if atoms are not covered
             try:
@@ -231,7 +255,7 @@ class ForceFieldManager:
         if filename is None:
             filename = url.split('/')[-1]
         
-        output_path = os.path.join(self.workdir, filename)
+        output_path = self._resolve(filename)
         
         try:
             response = requests.get(url, timeout=30)
@@ -240,8 +264,19 @@ class ForceFieldManager:
                 with open(output_path, 'w') as f:
                     f.write(response.text)
                 
-                # Validate the downloaded file
-                is_valid, msg = self.validate_forcefield(output_path)
+                # Validate the downloaded file, unless these exact bytes already passed
+                cache_key = (output_path, hashlib.sha256(response.content).hexdigest())
+                if cache_key in self._validated_cache:
+                    is_valid, msg = True, self._validated_cache[cache_key]
+                    self.forcefield_validated = True
+                    self.last_forcefield_name = output_path
+                    self.last_forcefield_file = output_path
+                else:
+                    # New bytes on disk: drop any ForceField parsed from an older copy
+                    self._ff_cache.pop(output_path, None)
+                    is_valid, msg = self.validate_forcefield(output_path)
+                    if is_valid:
+                        self._validated_cache[cache_key] = msg
                 
                 if is_valid:
                     return f"""✅ Custom force field downloaded:
@@ -299,7 +334,7 @@ class ForceFieldManager:
 </ForceField>
 """
         
-        output_path = os.path.join(self.workdir, output_file)
+        output_path = self._resolve(output_file)
         
         with open(output_path, 'w') as f:
             f.write(template)
@@ -5,9 +5,334 @@ Handles molecular dynamics simulations using OpenMM Python API.
 Replaces LAMMPS subprocess calls with direct OpenMM integration.
 """
 
+import hashlib
+import json
+import multiprocessing
 import os
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import struct
 import subprocess
-from typing import Optional, Tuple, Dict, Any
+from types import SimpleNamespace
+from typing import Optional, Tuple, Dict, Any, List
+
+# Write buffer sizes for structure and trajectory output
+PDB_WRITE_BUFFER = 1024 * 1024
+DCD_WRITE_BUFFER = 4 * 1024 * 1024
+
+# Structures above this size are written as PDBx/mmCIF (PDB atom serials
+# overflow past 99,999); these extensions are always read/written as PDBx
+PDB_MAX_ATOMS = 99_000
+PDBX_EXTENSIONS = ('.cif', '.pdbx')
+
+# Serialized Systems kept per manager (least recently used are evicted)
+SYSTEM_CACHE_SIZE = 4
+
+# Systems up to this many atoms are minimized without a nonbonded cutoff
+NO_CUTOFF_MAX_ATOMS = 500
+
+# Integrators accepted by run_simulation(integrator_type=...)
+INTEGRATOR_TYPES = ('langevin_middle', 'nose_hoover', 'verlet')
+
+# Residue names counted as ions in solvated systems
+_ION_RESNAMES = frozenset({'NA', 'CL', 'K', 'MG', 'CA', 'ZN'})
+
+
+# Standalone OpenMM run script produced by generate_openmm_script()
+OPENMM_SCRIPT_TEMPLATE = '''#!/usr/bin/env python
+"""
+OpenMM Simulation Script
+Generated for HPC execution
+
+Input: {{ pdb_file }}
+Force field: {{ forcefield }}
+Ensemble: {{ ensemble }}
+Steps: {{ steps }}
+"""
+
+from openmm import app, unit
+from openmm import LangevinMiddleIntegrator, MonteCarloBarostat, Platform
+from openmm.unit import kelvin, nanometer, picosecond, picoseconds, atmosphere, amu
+import os
+
+# Configuration
+PDB_FILE = "{{ pdb_file }}"
+FORCEFIELD = "{{ forcefield }}"
+WATER_MODEL = "{{ water_model }}"
+STEPS = {{ steps }}
+TEMPERATURE = {{ temperature }}
+TIMESTEP = {{ timestep_ps }}  # ps
+HYDROGEN_MASS = {{ hydrogen_mass }}  # amu
+
+# Load structure
+print("Loading structure...")
+pdb = app.PDBFile(PDB_FILE)
+
+# Create force field
+print("Creating force field...")
+ff = app.ForceField(FORCEFIELD, WATER_MODEL)
+
+# Create system
+print("Creating system...")
+system = ff.createSystem(
+    pdb.topology,
+    nonbondedMethod=app.PME,
+    nonbondedCutoff=1.0*nanometer,
+    constraints=app.HBonds,
+    hydrogenMass=HYDROGEN_MASS*amu
+)
+{% if include_barostat %}
+
+# Add barostat for NPT
+system.addForce(MonteCarloBarostat(1.0*atmosphere, {{ temperature }}*kelvin))
+{% endif %}
+
+# Create integrator
+integrator = LangevinMiddleIntegrator(
+    TEMPERATURE*kelvin,
+    1.0/picosecond,
+    TIMESTEP*picoseconds
+)
+
+# Select platform (CUDA preferred)
+try:
+    platform = Platform.getPlatformByName('CUDA')
+    properties = {'Precision': 'mixed'}
+    simulation = app.Simulation(pdb.topology, system, integrator, platform, properties)
+except:
+    simulation = app.Simulation(pdb.topology, system, integrator)
+
+simulation.context.setPositions(pdb.positions)
+
+# Energy minimization
+print("Minimizing energy...")
+simulation.minimizeEnergy(maxIterations=1000)
+
+# Set up reporters
+dcd_reporter = app.DCDReporter('trajectory.dcd', 5000)
+dcd_reporter._out.close()
+dcd_reporter._out = open('trajectory.dcd', 'wb', buffering=4*1024*1024)  # larger write buffer
+simulation.reporters.append(dcd_reporter)
+simulation.reporters.append(app.StateDataReporter(
+    'simulation.log', 5000,
+    step=True, time=True, potentialEnergy=True, 
+    temperature=True, volume=True, speed=True
+))
+simulation.reporters.append(app.CheckpointReporter('checkpoint.chk', 50000))
+
+# Run simulation
+print(f"Running {STEPS} steps of {{ ensemble }} dynamics...")
+simulation.step(STEPS)
+
+# Save final state
+print("Saving final structure...")
+state = simulation.context.getState(getPositions=True)
+with open('final.pdb', 'w', buffering=1024*1024) as fh:
+    app.PDBFile.writeFile(simulation.topology, state.getPositions(), fh)
+
+print("Simulation complete!")
+'''
+
+
+@lru_cache(maxsize=1)
+def _get_script_template():
+    """Compile OPENMM_SCRIPT_TEMPLATE once (raises ImportError without Jinja2)."""
+    import jinja2
+    env = jinja2.Environment(loader=jinja2.BaseLoader(), trim_blocks=True,
+                             keep_trailing_newline=True)
+    return env.from_string(OPENMM_SCRIPT_TEMPLATE)
+
+
+# Cached OpenMM namespace, populated on first use by _import_openmm()
+_openmm = None
+
+
+def _import_openmm() -> SimpleNamespace:
+    """
+    Import OpenMM once and cache the names this module uses.
+    
+    Raises:
+        ImportError: If OpenMM is not installed
+    """
+    global _openmm
+    if _openmm is None:
+        import openmm
+        from openmm import app, unit
+        _openmm = SimpleNamespace(
+            openmm=openmm,
+            app=app,
+            unit=unit,
+            LangevinMiddleIntegrator=openmm.LangevinMiddleIntegrator,
+            NoseHooverIntegrator=openmm.NoseHooverIntegrator,
+            VerletIntegrator=openmm.VerletIntegrator,
+            AndersenThermostat=openmm.AndersenThermostat,
+            MonteCarloBarostat=openmm.MonteCarloBarostat,
+            Platform=openmm.Platform,
+            XmlSerializer=openmm.XmlSerializer,
+        )
+    return _openmm
+
+
+@lru_cache(maxsize=16)
+def _build_forcefield(xml_files: Tuple[str, ...]):
+    """
+    Parse force field XML files once per process.
+    
+    ForceField is not mutated by createSystem or Modeller, so the parsed
+    object is shared between calls and OpenMMManager instances.
+    """
+    return _import_openmm().app.ForceField(*xml_files)
+
+
+def _load_structure(app, path: str):
+    """Load a PDB or PDBx/mmCIF file, chosen by extension."""
+    if path.lower().endswith(PDBX_EXTENSIONS):
+        return app.PDBxFile(path)
+    return app.PDBFile(path)
+
+
+def _write_structure(app, topology, positions, path: str):
+    """Write a structure as PDB or PDBx/mmCIF, chosen by extension."""
+    writer = app.PDBxFile if path.lower().endswith(PDBX_EXTENSIONS) else app.PDBFile
+    with open(path, 'w', buffering=PDB_WRITE_BUFFER) as fh:
+        writer.writeFile(topology, positions, fh)
+
+
+def _buffered_dcd_reporter(app, dcd_file: str, interval: int, append: bool = False):
+    """Create a DCDReporter whose output file uses a large write buffer."""
+    reporter = app.DCDReporter(dcd_file, interval, append=append)
+    reporter._out.close()
+    reporter._out = open(dcd_file, 'r+b' if append else 'wb', buffering=DCD_WRITE_BUFFER)
+    return reporter
+
+
+def _make_trajectory_reporter(app, path_prefix: str, interval: int,
+                              trajectory_format: str = 'xtc', append: bool = False):
+    """
+    Create a trajectory reporter for the requested format.
+    
+    XTC uses OpenMM's built-in XTCReporter (OpenMM >= 8.2) or MDTraj's,
+    and falls back to DCD when neither is available.
+    
+    Returns:
+        Tuple of (reporter, trajectory_file)
+    """
+    if trajectory_format.lower() == 'xtc':
+        xtc_file = f"{path_prefix}.xtc"
+        append_xtc = append and os.path.exists(xtc_file)
+        if hasattr(app, 'XTCReporter'):
+            return app.XTCReporter(xtc_file, interval, append=append_xtc), xtc_file
+        try:
+            from mdtraj.reporters import XTCReporter
+            return XTCReporter(xtc_file, interval, append=append_xtc), xtc_file
+        except ImportError:
+            pass
+    
+    dcd_file = f"{path_prefix}.dcd"
+    append_dcd = append and os.path.exists(dcd_file)
+    return _buffered_dcd_reporter(app, dcd_file, interval, append_dcd), dcd_file
+
+
+def _physical_core_cpus() -> List[int]:
+    """
+    Pick one logical CPU per physical core from this process's affinity set.
+    
+    Uses the Linux sysfs CPU topology; returns [] where that is unavailable.
+    """
+    try:
+        allowed = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return []
+    
+    seen = set()
+    cpus = []
+    for cpu in allowed:
+        topology_dir = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(f"{topology_dir}/physical_package_id") as f:
+                package = f.read().strip()
+            with open(f"{topology_dir}/core_id") as f:
+                core = f.read().strip()
+        except OSError:
+            return []
+        if (package, core) not in seen:
+            seen.add((package, core))
+            cpus.append(cpu)
+    return cpus
+
+
+# CPU platform thread count, worked out once per process by _configure_cpu_threads
+_CPU_THREADS: Optional[int] = None
+
+
+def _configure_cpu_threads(log=None, pin_affinity: bool = False) -> int:
+    """
+    Choose the CPU platform thread count: one thread per physical core.
+    
+    Runs once per process; later calls return the first result. A warning
+    on multi-node NUMA machines goes to log. The process affinity is left
+    alone unless pin_affinity is set, which pins the whole process (not
+    only OpenMM) to one logical CPU per core.
+    
+    Args:
+        log: Callable taking a message string
+        pin_affinity: Restrict the process to one logical CPU per core (Linux)
+    
+    Returns:
+        Number of threads to use
+    """
+    global _CPU_THREADS
+    if _CPU_THREADS is not None:
+        return _CPU_THREADS
+    
+    cpus = _physical_core_cpus()
+    if cpus:
+        if pin_affinity:
+            os.sched_setaffinity(0, cpus)
+        n_threads = len(cpus)
+    else:
+        try:
+            import psutil
+            n_threads = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+        except ImportError:
+            n_threads = os.cpu_count() or 1
+    
+    node_dir = "/sys/devices/system/node"
+    if os.path.isdir(node_dir):
+        nodes = [d for d in os.listdir(node_dir) if d.startswith('node') and d[4:].isdigit()]
+        if len(nodes) > 1 and log is not None:
+            log(f"⚠️ {len(nodes)} NUMA nodes detected; for best CPU throughput run under "
+                "'numactl --cpunodebind=0 --membind=0'")
+    
+    _CPU_THREADS = n_threads
+    return n_threads
+
+
+def _list_cuda_devices() -> List[str]:
+    """List usable CUDA device IDs (honours CUDA_VISIBLE_DEVICES)."""
+    visible = os.environ.get('CUDA_VISIBLE_DEVICES')
+    if visible is not None:
+        return [d.strip() for d in visible.split(',') if d.strip()]
+    try:
+        result = subprocess.run(['nvidia-smi', '-L'], capture_output=True,
+                                text=True, timeout=10)
+        if result.returncode == 0:
+            return [str(i) for i, line in enumerate(result.stdout.splitlines())
+                    if line.startswith('GPU')]
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return []
+
+
+def _init_batch_worker(device_queue):
+    """Pin a batch worker process to one GPU before OpenMM initializes CUDA."""
+    os.environ['CUDA_VISIBLE_DEVICES'] = device_queue.get()
+
+
+def _run_batch_job(workdir: str, job: Dict[str, Any]) -> str:
+    """Run a single run_simulation job inside a batch worker process."""
+    return OpenMMManager(workdir).run_simulation(**job)
 
 
 class OpenMMManager:
@@ -22,6 +347,10 @@ class OpenMMManager:
         self.simulation_completed = False
         self.last_trajectory_file = None
         
+        # Serialized Systems keyed by (topology hash, force field files, createSystem options)
+        # (LRU, at most SYSTEM_CACHE_SIZE entries; large systems serialize to tens of MB)
+        self._system_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        
     def _log(self, message: str):
         """Log message if workflow logger is available."""
         if self.workflow_logger:
@@ -29,16 +358,214 @@ class OpenMMManager:
                 "OpenMMManager", {}, message
             )
     
+    @staticmethod
+    def _topology_hash(topology) -> str:
+        """Hash the parts of a topology that determine the created System."""
+        h = hashlib.sha1()
+        for chain in topology.chains():
+            # Chain boundaries and ids (termini get different templates)
+            h.update(f"chain|{chain.id}|".encode())
+            for residue in chain.residues():
+                h.update(struct.pack('<i', residue.index))
+                for atom in residue.atoms():
+                    element = atom.element.symbol if atom.element is not None else ''
+                    h.update(f"{atom.name}|{element}|{atom.residue.name}|".encode())
+        # Bonds, incl. SSBOND/CONECT disulfides that decide CYS vs CYX matching
+        for atom1, atom2 in topology.bonds():
+            h.update(struct.pack('<ii', atom1.index, atom2.index))
+        box = topology.getPeriodicBoxVectors()
+        if box is not None:
+            h.update(str(box).encode())
+        return h.hexdigest()
+    
+    def _get_or_build_system(self, topology, ff_files: Tuple[str, ...], **system_opts):
+        """
+        Create an OpenMM System, reusing a cached copy for identical inputs.
+        
+        Systems are cached in serialized form so every caller gets a fresh
+        instance it can safely mutate (e.g. by adding a barostat).
+        
+        Args:
+            topology: OpenMM Topology
+            ff_files: Force field XML files
+            **system_opts: Keyword arguments for ForceField.createSystem
+            
+        Returns:
+            OpenMM System
+        """
+        XmlSerializer = _import_openmm().XmlSerializer
+        
+        opts_key = tuple(sorted((k, str(v)) for k, v in system_opts.items()))
+        key = (self._topology_hash(topology), ff_files, opts_key)
+        
+        serialized = self._system_cache.get(key)
+        if serialized is None:
+            ff = _build_forcefield(ff_files)
+            system = ff.createSystem(topology, **system_opts)
+            self._system_cache[key] = XmlSerializer.serialize(system)
+            while len(self._system_cache) > SYSTEM_CACHE_SIZE:
+                self._system_cache.popitem(last=False)
+            return system
+        
+        self._system_cache.move_to_end(key)
+        return XmlSerializer.deserialize(serialized)
+    
+    def _build_simulation(self, pdb_path: str, forcefield: str, water_model: str,
+                          temperature: float, pressure: float, add_barostat: bool,
+                          timestep_fs: float = 4.0, hydrogen_mass: float = 1.5,
+                          integrator_type: str = 'langevin_middle'):
+        """
+        Load a structure and create a ready-to-run Simulation.
+        
+        Args:
+            pdb_path: Absolute path to the input PDB file
+            forcefield: Force field XML file
+            water_model: Water model XML file
+            temperature: Temperature in Kelvin
+            pressure: Pressure in atm (used only if add_barostat)
+            add_barostat: Add a MonteCarloBarostat to the System
+            timestep_fs: Integration timestep in femtoseconds
+            hydrogen_mass: Hydrogen mass in amu (repartitioned from bonded heavy atoms)
+            integrator_type: One of INTEGRATOR_TYPES
+            
+        Returns:
+            OpenMM Simulation with positions set
+        """
+        omm = _import_openmm()
+        app, unit = omm.app, omm.unit
+        
+        # Load structure
+        pdb = _load_structure(app, pdb_path)
+        
+        # Create system (force field parse and System reused across calls)
+        system = self._get_or_build_system(
+            pdb.topology,
+            (forcefield, water_model),
+            nonbondedMethod=app.PME,
+            nonbondedCutoff=1.0*unit.nanometer,
+            constraints=app.HBonds,
+            hydrogenMass=hydrogen_mass*unit.amu
+        )
+        
+        # Add barostat for NPT
+        if add_barostat:
+            system.addForce(omm.MonteCarloBarostat(
+                pressure * unit.atmosphere,
+                temperature * unit.kelvin
+            ))
+        
+        # Create integrator
+        timestep = timestep_fs * unit.femtoseconds
+        if integrator_type == 'nose_hoover':
+            # Deterministic thermostat chain
+            integrator = omm.NoseHooverIntegrator(
+                temperature * unit.kelvin, 1.0 / unit.picosecond, timestep
+            )
+        elif integrator_type == 'verlet':
+            # Velocity Verlet with stochastic Andersen collisions as the thermostat
+            system.addForce(omm.AndersenThermostat(
+                temperature * unit.kelvin, 1.0 / unit.picosecond
+            ))
+            integrator = omm.VerletIntegrator(timestep)
+        else:
+            integrator = omm.LangevinMiddleIntegrator(
+                temperature * unit.kelvin, 1.0 / unit.picosecond, timestep
+            )
+        
+        # Select platform (prefer CUDA > OpenCL > CPU)
+        platform, properties = self._get_best_platform()
+        
+        # Create simulation
+        simulation = app.Simulation(pdb.topology, system, integrator, platform, properties)
+        simulation.context.setPositions(pdb.positions)
+        return simulation
+    
+    def _run_phase(self, simulation, steps: int, ensemble: str,
+                   output_prefix: str, checkpoint_file: Optional[str] = None,
+                   append: bool = False, trajectory_format: str = 'xtc',
+                   report_interval: int = 10000) -> Tuple[float, str, str, str]:
+        """
+        Run one dynamics phase on an existing Simulation and write its outputs.
+        
+        If the System carries a MonteCarloBarostat it is enabled for NPT and
+        disabled for NVT, so consecutive phases share one Context.
+        
+        Args:
+            simulation: OpenMM Simulation to advance
+            steps: Number of steps
+            ensemble: 'NVT' or 'NPT'
+            output_prefix: Prefix for output files
+            checkpoint_file: Write binary checkpoints here every report_interval steps
+            append: Append to existing trajectory/log files (when resuming)
+            trajectory_format: 'xtc' (compressed) or 'dcd'
+            report_interval: Steps between trajectory frames and log lines
+            
+        Returns:
+            Tuple of (final_energy, trajectory_file, log_file, final_pdb)
+        """
+        omm = _import_openmm()
+        app, unit = omm.app, omm.unit
+        
+        frequency = 25 if ensemble.upper() == "NPT" else 0
+        for force in simulation.system.getForces():
+            if isinstance(force, omm.MonteCarloBarostat) and force.getFrequency() != frequency:
+                force.setFrequency(frequency)
+                simulation.context.reinitialize(preserveState=True)
+        
+        # Set up reporters
+        log_file = os.path.join(self.workdir, f"{output_prefix}.log")
+        traj_reporter, traj_file = _make_trajectory_reporter(
+            app, os.path.join(self.workdir, output_prefix), report_interval,
+            trajectory_format, append
+        )
+        
+        simulation.reporters.clear()
+        simulation.reporters.append(traj_reporter)
+        # Each report syncs energies off the device; keep them sparse and minimal
+        simulation.reporters.append(app.StateDataReporter(
+            log_file, report_interval,
+            step=True, time=True, potentialEnergy=True, temperature=True,
+            volume=True, speed=True, append=append
+        ))
+        if checkpoint_file:
+            # Checkpoint with every frame: a resume appends from the checkpoint
+            # step, so any frames written past it would be duplicated
+            simulation.reporters.append(app.CheckpointReporter(checkpoint_file, report_interval))
+        
+        # Run simulation
+        print(f"  🔬 Running {steps} steps of {ensemble} dynamics...")
+        simulation.step(steps)
+        simulation.reporters.clear()
+        
+        # Get final state
+        state = simulation.context.getState(getEnergy=True, getPositions=True)
+        final_energy = state.getPotentialEnergy().value_in_unit(unit.kilojoules_per_mole)
+        
+        # Save final structure (PDBx for systems too large for PDB)
+        ext = '.cif' if simulation.topology.getNumAtoms() > PDB_MAX_ATOMS else '.pdb'
+        final_pdb = os.path.join(self.workdir, f"{output_prefix}_final{ext}")
+        _write_structure(app, simulation.topology, state.getPositions(), final_pdb)
+        
+        return final_energy, traj_file, log_file, final_pdb
+    
     def run_simulation(self, pdb_file: str, forcefield: str = "amber14-all.xml",
                       water_model: str = "amber14/tip3pfb.xml",
                       steps: int = 10000, temperature: float = 300.0,
                       pressure: float = 1.0, ensemble: str = "NPT",
-                      output_prefix: str = "simulation") -> str:
+                      output_prefix: str = "simulation",
+                      timestep_fs: float = 4.0, hydrogen_mass: float = 1.5,
+                      trajectory_format: str = "xtc", report_interval: int = 10000,
+                      integrator_type: str = "langevin_middle") -> str:
         """
         Run an OpenMM molecular dynamics simulation.
         
+        A binary checkpoint ({output_prefix}.chk) is written with every
+        trajectory frame. If one from the same run setup exists when called,
+        the run resumes from it instead of starting over; the checkpoint is
+        removed once the run completes.
+        
         Args:
-            pdb_file: Path to input PDB file
+            pdb_file: Path to input PDB (or .cif/.pdbx) file
             forcefield: Force field XML file (e.g., 'amber14-all.xml')
             water_model: Water model XML (e.g., 'amber14/tip3pfb.xml')
             steps: Number of simulation steps
@@ -46,16 +573,24 @@ class OpenMMManager:
             pressure: Pressure in atm (for NPT)
             ensemble: 'NVT' or 'NPT'
             output_prefix: Prefix for output files
+            timestep_fs: Timestep in fs (4 fs is stable with hydrogen mass repartitioning)
+            hydrogen_mass: Hydrogen mass in amu; 1.5 allows a 4 fs timestep
+            trajectory_format: 'xtc' (compressed, falls back to DCD) or 'dcd'
+            report_interval: Steps between trajectory frames and log lines
+            integrator_type: 'langevin_middle' (default, strong coupling),
+                             'nose_hoover' (deterministic, for NVT production)
+                             or 'verlet' (with an Andersen thermostat)
             
         Returns:
             Status message string
         """
         self._log(f"Starting {ensemble} simulation: {pdb_file}, {steps} steps")
         
+        if integrator_type not in INTEGRATOR_TYPES:
+            return f"❌ Unknown integrator_type '{integrator_type}'. Use one of: {', '.join(INTEGRATOR_TYPES)}"
+        
         try:
-            from openmm import app, unit, LangevinMiddleIntegrator, MonteCarloBarostat
-            from openmm import Platform
-            import openmm
+            _import_openmm()
         except ImportError:
             return "❌ OpenMM not installed. Run: pip install openmm"
         
@@ -69,82 +604,73 @@ class OpenMMManager:
             return f"❌ PDB file not found: {pdb_path}"
         
         try:
-            # Load structure
-            pdb = app.PDBFile(pdb_path)
-            
-            # Create force field
-            ff = app.ForceField(forcefield, water_model)
-            
-            # Create system
-            system = ff.createSystem(
-                pdb.topology,
-                nonbondedMethod=app.PME,
-                nonbondedCutoff=1.0*unit.nanometer,
-                constraints=app.HBonds
+            simulation = self._build_simulation(
+                pdb_path, forcefield, water_model, temperature, pressure,
+                add_barostat=(ensemble.upper() == "NPT"),
+                timestep_fs=timestep_fs, hydrogen_mass=hydrogen_mass,
+                integrator_type=integrator_type
             )
             
-            # Add barostat for NPT
-            if ensemble.upper() == "NPT":
-                system.addForce(MonteCarloBarostat(
-                    pressure * unit.atmosphere,
-                    temperature * unit.kelvin
-                ))
-            
-            # Create integrator
-            integrator = LangevinMiddleIntegrator(
-                temperature * unit.kelvin,
-                1.0 / unit.picosecond,
-                0.002 * unit.picoseconds  # 2 fs timestep
-            )
-            
-            # Select platform (prefer CUDA > OpenCL > CPU)
-            platform = self._get_best_platform()
-            
-            # Create simulation
-            simulation = app.Simulation(pdb.topology, system, integrator, platform)
-            simulation.context.setPositions(pdb.positions)
-            
-            # Energy minimization
-            print("  ⚡ Running energy minimization...")
-            simulation.minimizeEnergy(maxIterations=1000)
-            
-            # Set up reporters
-            dcd_file = os.path.join(self.workdir, f"{output_prefix}.dcd")
-            log_file = os.path.join(self.workdir, f"{output_prefix}.log")
-            
-            simulation.reporters.append(app.DCDReporter(dcd_file, 1000))  # Save every 1000 steps
-            simulation.reporters.append(app.StateDataReporter(
-                log_file, 1000,
-                step=True, time=True, potentialEnergy=True, kineticEnergy=True,
-                totalEnergy=True, temperature=True, volume=True, density=True
-            ))
+            checkpoint_file = os.path.join(self.workdir, f"{output_prefix}.chk")
+            # Sidecar recording which run setup wrote the checkpoint
+            signature_file = checkpoint_file + ".json"
+            signature = {
+                "topology": self._topology_hash(simulation.topology),
+                "pdb_file": pdb_path,
+                "forcefield": [forcefield, water_model],
+                "ensemble": ensemble.upper(),
+                "timestep_fs": timestep_fs,
+                "hydrogen_mass": hydrogen_mass,
+                "integrator_type": integrator_type,
+                "trajectory_format": trajectory_format,
+                "report_interval": report_interval,
+            }
+            resume = os.path.exists(checkpoint_file)
+            if resume:
+                try:
+                    with open(signature_file) as f:
+                        resume = json.load(f) == signature
+                except (OSError, ValueError):
+                    resume = False
+                if not resume:
+                    self._log(f"Ignoring checkpoint {checkpoint_file}: written by a different run setup")
             
-            # Run simulation
-            print(f"  🔬 Running {steps} steps of {ensemble} dynamics...")
-            simulation.step(steps)
+            if resume:
+                simulation.loadCheckpoint(checkpoint_file)
+                completed = simulation.currentStep
+                print(f"  ♻️  Resuming from checkpoint at step {completed}")
+            else:
+                with open(signature_file, 'w') as f:
+                    json.dump(signature, f)
+                # Energy minimization
+                print("  ⚡ Running energy minimization...")
+                simulation.minimizeEnergy(maxIterations=1000)
+                completed = 0
             
-            # Get final state
-            state = simulation.context.getState(getEnergy=True, getPositions=True)
-            final_energy = state.getPotentialEnergy().value_in_unit(unit.kilojoules_per_mole)
+            final_energy, traj_file, log_file, final_pdb = self._run_phase(
+                simulation, max(steps - completed, 0), ensemble, output_prefix,
+                checkpoint_file=checkpoint_file, append=resume,
+                trajectory_format=trajectory_format, report_interval=report_interval
+            )
             
-            # Save final structure
-            final_pdb = os.path.join(self.workdir, f"{output_prefix}_final.pdb")
-            positions = state.getPositions()
-            app.PDBFile.writeFile(simulation.topology, positions, open(final_pdb, 'w'))
+            # Run finished; a leftover checkpoint would make the next call resume
+            for path in (checkpoint_file, signature_file):
+                if os.path.exists(path):
+                    os.remove(path)
             
             # Update state
             self.last_simulation_file = final_pdb
-            self.last_trajectory_file = dcd_file
+            self.last_trajectory_file = traj_file
             self.simulation_completed = True
             
             return f"""✅ OpenMM {ensemble} simulation completed successfully:
   📄 Input: {pdb_file}
   🔬 Force field: {forcefield}
-  ⚙️  Steps: {steps} ({steps * 0.002:.2f} ps)
+  ⚙️  Steps: {steps} ({steps * timestep_fs / 1000:.2f} ps)
   🌡️  Temperature: {temperature} K
   💧 Water model: {water_model}
   ⚡ Final energy: {final_energy:.2f} kJ/mol
-  📁 Trajectory: {dcd_file}
+  📁 Trajectory: {traj_file}
   📁 Final structure: {final_pdb}
   📁 Log file: {log_file}"""
             
@@ -152,12 +678,61 @@ class OpenMMManager:
             self._log(f"Simulation failed: {str(e)}")
             return f"❌ OpenMM simulation failed: {str(e)}"
     
+    def run_simulation_batch(self, jobs: List[Dict[str, Any]],
+                             max_gpu: Optional[int] = None) -> List[str]:
+        """
+        Run independent simulations in parallel, one worker process per GPU.
+        
+        Each worker is restricted to a single device via CUDA_VISIBLE_DEVICES.
+        Without GPUs the jobs run sequentially in this process.
+        
+        Args:
+            jobs: List of run_simulation keyword-argument dicts
+                  (give each a distinct output_prefix)
+            max_gpu: Maximum number of GPUs to use (default: all)
+            
+        Returns:
+            List of status messages, in job order
+        """
+        self._log(f"Starting simulation batch: {len(jobs)} jobs")
+        
+        devices = _list_cuda_devices()
+        if max_gpu is not None:
+            devices = devices[:max_gpu]
+        
+        if len(devices) == 0 or len(jobs) <= 1:
+            return [self.run_simulation(**job) for job in jobs]
+        
+        ctx = multiprocessing.get_context('spawn')
+        device_queue = ctx.Queue()
+        for device in devices:
+            device_queue.put(device)
+        
+        print(f"  🖥️  Running {len(jobs)} simulations across {len(devices)} GPUs")
+        with ProcessPoolExecutor(max_workers=len(devices), mp_context=ctx,
+                                 initializer=_init_batch_worker,
+                                 initargs=(device_queue,)) as pool:
+            futures = [pool.submit(_run_batch_job, self.workdir, job) for job in jobs]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(f"❌ OpenMM simulation failed: {str(e)}")
+        
+        return results
+    
     def run_equilibration(self, pdb_file: str, forcefield: str = "amber14-all.xml",
                          nvt_steps: int = 50000, npt_steps: int = 100000,
-                         temperature: float = 300.0, output_prefix: str = "equil") -> str:
+                         temperature: float = 300.0, output_prefix: str = "equil",
+                         timestep_fs: float = 4.0, hydrogen_mass: float = 1.5,
+                         trajectory_format: str = "xtc", report_interval: int = 10000) -> str:
         """
         Run standard equilibration protocol: NVT heating followed by NPT.
         
+        Both phases share one Simulation, so the System and platform Context
+        are built once and NPT continues from the NVT positions and velocities.
+        
         Args:
             pdb_file: Input PDB file
             forcefield: Force field to use
@@ -165,48 +740,66 @@ class OpenMMManager:
             npt_steps: Number of NPT steps
             temperature: Target temperature (K)
             output_prefix: Output file prefix
+            timestep_fs: Timestep in fs
+            hydrogen_mass: Hydrogen mass in amu
+            trajectory_format: 'xtc' (compressed, falls back to DCD) or 'dcd'
+            report_interval: Steps between trajectory frames and log lines
             
         Returns:
             Status message
         """
         self._log(f"Starting equilibration protocol: {pdb_file}")
         
-        # Phase 1: NVT heating
-        print("📌 Phase 1: NVT equilibration...")
-        nvt_result = self.run_simulation(
-            pdb_file=pdb_file,
-            forcefield=forcefield,
-            steps=nvt_steps,
-            temperature=temperature,
-            ensemble="NVT",
-            output_prefix=f"{output_prefix}_nvt"
-        )
-        
-        if "❌" in nvt_result:
-            return nvt_result
-        
-        # Phase 2: NPT equilibration using NVT output
-        print("📌 Phase 2: NPT equilibration...")
-        nvt_final = os.path.join(self.workdir, f"{output_prefix}_nvt_final.pdb")
+        try:
+            _import_openmm()
+        except ImportError:
+            return "❌ OpenMM not installed. Run: pip install openmm"
         
-        npt_result = self.run_simulation(
-            pdb_file=nvt_final,
-            forcefield=forcefield,
-            steps=npt_steps,
-            temperature=temperature,
-            ensemble="NPT",
-            output_prefix=f"{output_prefix}_npt"
-        )
+        if not os.path.isabs(pdb_file):
+            pdb_path = os.path.join(self.workdir, pdb_file)
+        else:
+            pdb_path = pdb_file
+            
+        if not os.path.exists(pdb_path):
+            return f"❌ PDB file not found: {pdb_path}"
         
-        if "❌" in npt_result:
-            return npt_result
+        try:
+            simulation = self._build_simulation(
+                pdb_path, forcefield, "amber14/tip3pfb.xml", temperature,
+                pressure=1.0, add_barostat=True,
+                timestep_fs=timestep_fs, hydrogen_mass=hydrogen_mass
+            )
+            
+            print("  ⚡ Running energy minimization...")
+            simulation.minimizeEnergy(maxIterations=1000)
+            
+            # Phase 1: NVT heating (barostat disabled)
+            print("📌 Phase 1: NVT equilibration...")
+            self._run_phase(simulation, nvt_steps, "NVT", f"{output_prefix}_nvt",
+                            trajectory_format=trajectory_format,
+                            report_interval=report_interval)
+            
+            # Phase 2: NPT equilibration continuing from the live NVT state
+            print("📌 Phase 2: NPT equilibration...")
+            _, npt_traj, _, npt_final = self._run_phase(
+                simulation, npt_steps, "NPT", f"{output_prefix}_npt",
+                trajectory_format=trajectory_format, report_interval=report_interval
+            )
+            
+            self.last_simulation_file = npt_final
+            self.last_trajectory_file = npt_traj
+            self.simulation_completed = True
+            
+        except Exception as e:
+            self._log(f"Equilibration failed: {str(e)}")
+            return f"❌ OpenMM equilibration failed: {str(e)}"
         
         return f"""✅ Equilibration protocol completed:
   📌 Phase 1 (NVT): {nvt_steps} steps
   📌 Phase 2 (NPT): {npt_steps} steps
   🌡️  Temperature: {temperature} K
-  📁 Final structure: {output_prefix}_npt_final.pdb
-  📁 NPT trajectory: {output_prefix}_npt.dcd"""
+  📁 Final structure: {os.path.basename(npt_final)}
+  📁 NPT trajectory: {os.path.basename(npt_traj)}"""
     
     def minimize_structure(self, pdb_file: str, forcefield: str = "amber14-all.xml",
                           max_iterations: int = 10000, output_file: str = None) -> str:
@@ -225,9 +818,10 @@ class OpenMMManager:
         self._log(f"Minimizing structure: {pdb_file}")
         
         try:
-            from openmm import app, unit
+            omm = _import_openmm()
         except ImportError:
             return "❌ OpenMM not installed. Run: pip install openmm"
+        app, unit = omm.app, omm.unit
         
         if not os.path.isabs(pdb_file):
             pdb_path = os.path.join(self.workdir, pdb_file)
@@ -239,29 +833,36 @@ class OpenMMManager:
         
         try:
             # Load structure
-            pdb = app.PDBFile(pdb_path)
+            pdb = _load_structure(app, pdb_path)
             
-            # Create force field (without water model for vacuum minimization)
-            ff = app.ForceField(forcefield)
+            # NoCutoff is O(N^2); use a neighbor-listed cutoff beyond small systems
+            if pdb.topology.getNumAtoms() <= NO_CUTOFF_MAX_ATOMS:
+                nonbonded = {'nonbondedMethod': app.NoCutoff}
+            elif pdb.topology.getPeriodicBoxVectors() is not None:
+                nonbonded = {'nonbondedMethod': app.CutoffPeriodic,
+                             'nonbondedCutoff': 1.0*unit.nanometer}
+            else:
+                nonbonded = {'nonbondedMethod': app.CutoffNonPeriodic,
+                             'nonbondedCutoff': 1.0*unit.nanometer}
             
-            # Create system with implicit solvent
-            system = ff.createSystem(
+            # Create system (without water model for vacuum minimization)
+            system = self._get_or_build_system(
                 pdb.topology,
-                nonbondedMethod=app.NoCutoff,
-                constraints=app.HBonds
+                (forcefield,),
+                constraints=app.HBonds,
+                **nonbonded
             )
             
             # Create integrator (required but not used for minimization)
-            from openmm import LangevinMiddleIntegrator
-            integrator = LangevinMiddleIntegrator(
+            integrator = omm.LangevinMiddleIntegrator(
                 300 * unit.kelvin,
                 1.0 / unit.picosecond,
                 0.002 * unit.picoseconds
             )
             
             # Create simulation
-            platform = self._get_best_platform()
-            simulation = app.Simulation(pdb.topology, system, integrator, platform)
+            platform, properties = self._get_best_platform()
+            simulation = app.Simulation(pdb.topology, system, integrator, platform, properties)
             simulation.context.setPositions(pdb.positions)
             
             # Get initial energy
@@ -281,8 +882,7 @@ class OpenMMManager:
                 output_file = f"{base}_minimized.pdb"
             
             output_path = os.path.join(self.workdir, output_file)
-            positions = state.getPositions()
-            app.PDBFile.writeFile(simulation.topology, positions, open(output_path, 'w'))
+            _write_structure(app, simulation.topology, state.getPositions(), output_path)
             
             return f"""✅ Energy minimization completed:
   📄 Input: {pdb_file}
@@ -307,7 +907,8 @@ class OpenMMManager:
             water_model: Water model XML
             padding: Box padding in nm
             ionic_strength: Ion concentration in M
-            output_file: Output filename
+            output_file: Output filename (.cif/.pdbx writes PDBx; defaults to
+                         .cif above PDB_MAX_ATOMS atoms)
             
         Returns:
             Status message
@@ -315,9 +916,10 @@ class OpenMMManager:
         self._log(f"Solvating system: {pdb_file}")
         
         try:
-            from openmm import app, unit
+            omm = _import_openmm()
         except ImportError:
             return "❌ OpenMM not installed. Run: pip install openmm"
+        app, unit = omm.app, omm.unit
         
         if not os.path.isabs(pdb_file):
             pdb_path = os.path.join(self.workdir, pdb_file)
@@ -329,10 +931,10 @@ class OpenMMManager:
         
         try:
             # Load structure
-            pdb = app.PDBFile(pdb_path)
+            pdb = _load_structure(app, pdb_path)
             
             # Create force field
-            ff = app.ForceField(forcefield, water_model)
+            ff = _build_forcefield((forcefield, water_model))
             
             # Create modeller for adding water
             modeller = app.Modeller(pdb.topology, pdb.positions)
@@ -345,16 +947,18 @@ class OpenMMManager:
             )
             
             # Count molecules
-            n_waters = sum(1 for r in modeller.topology.residues() if r.name == 'HOH')
-            n_ions = sum(1 for r in modeller.topology.residues() if r.name in ['NA', 'CL', 'K'])
+            counts = Counter(r.name for r in modeller.topology.residues())
+            n_waters = counts.get('HOH', 0)
+            n_ions = sum(n for name, n in counts.items() if name in _ION_RESNAMES)
             
-            # Save solvated system
+            # Save solvated system; large boxes default to PDBx/mmCIF
             if output_file is None:
                 base = os.path.splitext(os.path.basename(pdb_file))[0]
-                output_file = f"{base}_solvated.pdb"
+                ext = '.cif' if modeller.topology.getNumAtoms() > PDB_MAX_ATOMS else '.pdb'
+                output_file = f"{base}_solvated{ext}"
             
             output_path = os.path.join(self.workdir, output_file)
-            app.PDBFile.writeFile(modeller.topology, modeller.positions, open(output_path, 'w'))
+            _write_structure(app, modeller.topology, modeller.positions, output_path)
             
             return f"""✅ System solvated successfully:
   📄 Input: {pdb_file}
@@ -370,7 +974,8 @@ class OpenMMManager:
     def generate_openmm_script(self, pdb_file: str, forcefield: str = "amber14-all.xml",
                               water_model: str = "amber14/tip3pfb.xml",
                               steps: int = 500000, temperature: float = 300.0,
-                              ensemble: str = "NPT", script_name: str = "run_openmm.py") -> str:
+                              ensemble: str = "NPT", script_name: str = "run_openmm.py",
+                              timestep_fs: float = 4.0, hydrogen_mass: float = 1.5) -> str:
         """
         Generate a standalone OpenMM Python script for HPC submission.
         
@@ -382,101 +987,30 @@ class OpenMMManager:
             temperature: Temperature (K)
             ensemble: NVT or NPT
             script_name: Output script filename
+            timestep_fs: Timestep in fs
+            hydrogen_mass: Hydrogen mass in amu for repartitioning
             
         Returns:
             Status message and script path
         """
         self._log(f"Generating OpenMM script for {pdb_file}")
         
-        barostat_code = ""
-        if ensemble.upper() == "NPT":
-            barostat_code = """
-# Add barostat for NPT
-system.addForce(MonteCarloBarostat(1.0*atmosphere, {temperature}*kelvin))
-""".format(temperature=temperature)
+        try:
+            template = _get_script_template()
+        except ImportError:
+            return "❌ Jinja2 not installed. Run: pip install jinja2"
         
-        script_content = f'''#!/usr/bin/env python
-"""
-OpenMM Simulation Script
-Generated for HPC execution
-
-Input: {pdb_file}
-Force field: {forcefield}
-Ensemble: {ensemble}
-Steps: {steps}
-"""
-
-from openmm import app, unit
-from openmm import LangevinMiddleIntegrator, MonteCarloBarostat, Platform
-from openmm.unit import kelvin, nanometer, picosecond, picoseconds, atmosphere
-import os
-
-# Configuration
-PDB_FILE = "{pdb_file}"
-FORCEFIELD = "{forcefield}"
-WATER_MODEL = "{water_model}"
-STEPS = {steps}
-TEMPERATURE = {temperature}
-TIMESTEP = 0.002  # ps
-
-# Load structure
-print("Loading structure...")
-pdb = app.PDBFile(PDB_FILE)
-
-# Create force field
-print("Creating force field...")
-ff = app.ForceField(FORCEFIELD, WATER_MODEL)
-
-# Create system
-print("Creating system...")
-system = ff.createSystem(
-    pdb.topology,
-    nonbondedMethod=app.PME,
-    nonbondedCutoff=1.0*nanometer,
-    constraints=app.HBonds
-)
-{barostat_code}
-# Create integrator
-integrator = LangevinMiddleIntegrator(
-    TEMPERATURE*kelvin,
-    1.0/picosecond,
-    TIMESTEP*picoseconds
-)
-
-# Select platform (CUDA preferred)
-try:
-    platform = Platform.getPlatformByName('CUDA')
-    properties = {{'CudaPrecision': 'mixed'}}
-    simulation = app.Simulation(pdb.topology, system, integrator, platform, properties)
-except:
-    simulation = app.Simulation(pdb.topology, system, integrator)
-
-simulation.context.setPositions(pdb.positions)
-
-# Energy minimization
-print("Minimizing energy...")
-simulation.minimizeEnergy(maxIterations=1000)
-
-# Set up reporters
-simulation.reporters.append(app.DCDReporter('trajectory.dcd', 5000))
-simulation.reporters.append(app.StateDataReporter(
-    'simulation.log', 5000,
-    step=True, time=True, potentialEnergy=True, 
-    temperature=True, volume=True, speed=True
-))
-simulation.reporters.append(app.CheckpointReporter('checkpoint.chk', 50000))
-
-# Run simulation
-print(f"Running {{STEPS}} steps of {ensemble} dynamics...")
-simulation.step(STEPS)
-
-# Save final state
-print("Saving final structure...")
-state = simulation.context.getState(getPositions=True)
-app.PDBFile.writeFile(simulation.topology, state.getPositions(), open('final.pdb', 'w'))
-
-print("Simulation complete!")
-'''
+        script_content = template.render(
+            pdb_file=pdb_file,
+            forcefield=forcefield,
+            water_model=water_model,
+            steps=steps,
+            temperature=temperature,
+            ensemble=ensemble,
+            timestep_ps=timestep_fs / 1000,
+            hydrogen_mass=hydrogen_mass,
+            include_barostat=(ensemble.upper() == "NPT"),
+        )
         
         script_path = os.path.join(self.workdir, script_name)
         with open(script_path, 'w') as f:
@@ -485,42 +1019,85 @@ print("Simulation complete!")
         return f"""✅ OpenMM script generated:
   📄 Script: {script_name}
   🔬 Input PDB: {pdb_file}
-  ⚙️  Steps: {steps} ({steps * 0.002 / 1000:.2f} ns)
+  ⚙️  Steps: {steps} ({steps * timestep_fs / 1e6:.2f} ns)
   🌡️  Temperature: {temperature} K
   📦 Ensemble: {ensemble}
   
   To run locally: python {script_name}
   For HPC: Submit via SLURM manager"""
     
-    def _get_best_platform(self):
-        """Get the best available OpenMM platform."""
+    # Platforms in order of preference, with the properties requested on each
+    PLATFORM_PREFERENCE = ['HIP', 'CUDA', 'OpenCL', 'CPU']
+    PLATFORM_PROPERTIES = {
+        'HIP': {'Precision': 'mixed'},
+        'CUDA': {'Precision': 'mixed', 'DeterministicForces': 'false'},
+        'OpenCL': {'Precision': 'mixed'},
+        'CPU': {},
+    }
+    
+    # Opt-in: pin the whole process to one logical CPU per core on CPU runs
+    PIN_CPU_AFFINITY = False
+    
+    def _get_best_platform(self) -> Tuple[Any, Optional[Dict[str, str]]]:
+        """
+        Get the best available OpenMM platform.
+        
+        Enumerates the platforms OpenMM actually loaded and picks the first
+        of HIP > CUDA > OpenCL > CPU. GPU platforms that do not expose a
+        'Precision' property are skipped, since mixed precision is requested.
+        
+        Returns:
+            Tuple of (platform, properties); both None if no platform was found
+        """
         try:
-            from openmm import Platform
+            Platform = _import_openmm().Platform
+        except ImportError:
+            return None, None
+        
+        available = {}
+        for i in range(Platform.getNumPlatforms()):
+            platform = Platform.getPlatform(i)
+            available[platform.getName()] = platform
+        
+        for platform_name in self.PLATFORM_PREFERENCE:
+            platform = available.get(platform_name)
+            if platform is None:
+                continue
             
-            # Try platforms in order of preference
-            for platform_name in ['CUDA', 'OpenCL', 'CPU']:
-                try:
-                    platform = Platform.getPlatformByName(platform_name)
-                    print(f"  🖥️  Using {platform_name} platform")
-                    return platform
-                except:
-                    continue
+            properties = dict(self.PLATFORM_PROPERTIES[platform_name])
+            if 'Precision' in properties and 'Precision' not in platform.getPropertyNames():
+                continue
             
-            # Fallback to default
-            return None
+            if platform_name == 'CPU':
+                properties['Threads'] = str(_configure_cpu_threads(self._log, self.PIN_CPU_AFFINITY))
+            elif platform_name == 'CUDA' and 'CUDA_VISIBLE_DEVICES' in os.environ:
+                # Device indices are relative to the visible set
+                properties['DeviceIndex'] = '0'
             
-        except ImportError:
-            return None
+            print(f"  🖥️  Using {platform_name} platform")
+            return platform, properties
+        
+        # Fallback to default
+        return None, None
     
     def analyze_trajectory(self, trajectory_file: str, topology_file: str,
-                          output_prefix: str = "analysis") -> str:
+                          output_prefix: str = "analysis",
+                          selection: str = "protein", stride: int = 1) -> str:
         """
         Basic trajectory analysis using MDTraj.
         
+        The trajectory is streamed in chunks, so memory use does not grow
+        with trajectory length. RMSD, Rg and RMSF are computed in one pass.
+        Only heavy atoms of `selection` are loaded (solvent and ions are
+        skipped); RMSD/RMSF use their C-alpha atoms when present.
+        
         Args:
             trajectory_file: DCD/XTC trajectory file
             topology_file: PDB topology file
             output_prefix: Output file prefix
+            selection: MDTraj selection to analyze (e.g. 'protein', 'resname DNA')
+            stride: Read only every stride-th frame; frame numbers in the
+                    output files stay on the original trajectory's axis
             
         Returns:
             Status message with analysis results
@@ -542,37 +1119,72 @@ print("Simulation complete!")
             return f"❌ Topology file not found: {top_path}"
         
         try:
-            # Load trajectory
-            traj = md.load(traj_path, top=top_path)
-            
-            # Calculate RMSD
-            rmsd = md.rmsd(traj, traj, frame=0)
+            # Load only heavy atoms of the selection; fall back to all atoms
+            topology = md.load_topology(top_path)
+            load_idx = topology.select(f"({selection}) and not element H")
+            if len(load_idx) == 0:
+                load_idx = np.arange(topology.n_atoms)
             
-            # Calculate RMSF (per-residue)
-            rmsf = md.rmsf(traj, traj, frame=0)
+            # Reference frame only; the trajectory itself is streamed in chunks
+            ref = md.load_frame(traj_path, 0, top=top_path, atom_indices=load_idx)
+            n_atoms = ref.n_atoms
             
-            # Calculate radius of gyration
-            rg = md.compute_rg(traj)
+            # C-alpha atoms (indices within the loaded subset) for RMSD/RMSF
+            fit_idx = ref.topology.select("name CA")
+            if len(fit_idx) == 0:
+                fit_idx = np.arange(n_atoms)
             
-            # Save RMSD data
             rmsd_file = os.path.join(self.workdir, f"{output_prefix}_rmsd.dat")
-            np.savetxt(rmsd_file, np.column_stack([np.arange(len(rmsd)), rmsd]), 
-                      header="Frame RMSD(nm)", fmt='%d %.6f')
-            
-            # Save RMSF data
             rmsf_file = os.path.join(self.workdir, f"{output_prefix}_rmsf.dat")
-            np.savetxt(rmsf_file, np.column_stack([np.arange(len(rmsf)), rmsf]),
-                      header="Atom RMSF(nm)", fmt='%d %.6f')
-            
-            # Save Rg data
             rg_file = os.path.join(self.workdir, f"{output_prefix}_rg.dat")
-            np.savetxt(rg_file, np.column_stack([np.arange(len(rg)), rg]),
-                      header="Frame Rg(nm)", fmt='%d %.6f')
+            
+            rmsd_parts, rg_parts = [], []
+            n_frames = 0
+            # Running per-atom mean/M2 of aligned coordinates (Chan/Welford merge)
+            mean = np.zeros((len(fit_idx), 3))
+            m2 = np.zeros((len(fit_idx), 3))
+            
+            with open(rmsd_file, 'w') as rmsd_fh, open(rg_file, 'w') as rg_fh:
+                rmsd_fh.write("# Frame RMSD(nm)\n")
+                rg_fh.write("# Frame Rg(nm)\n")
+                
+                for chunk in md.iterload(traj_path, top=top_path, chunk=500,
+                                         stride=stride, atom_indices=load_idx):
+                    frames = np.arange(n_frames, n_frames + chunk.n_frames) * stride
+                    
+                    # RMSD (superposes internally) and Rg (rotation-invariant)
+                    rmsd = md.rmsd(chunk, ref, atom_indices=fit_idx)
+                    rg = md.compute_rg(chunk)
+                    np.savetxt(rmsd_fh, np.column_stack([frames, rmsd]), fmt='%d %.6f')
+                    np.savetxt(rg_fh, np.column_stack([frames, rg]), fmt='%d %.6f')
+                    rmsd_parts.append(rmsd)
+                    rg_parts.append(rg)
+                    
+                    # Align onto the reference, then fold the chunk into the running variance
+                    chunk.superpose(ref, atom_indices=fit_idx)
+                    xyz = chunk.xyz[:, fit_idx].astype(np.float64)
+                    n_b = xyz.shape[0]
+                    mean_b = xyz.mean(axis=0)
+                    m2_b = ((xyz - mean_b) ** 2).sum(axis=0)
+                    n_total = n_frames + n_b
+                    delta = mean_b - mean
+                    mean += delta * (n_b / n_total)
+                    m2 += m2_b + delta ** 2 * (n_frames * n_b / n_total)
+                    n_frames = n_total
+            
+            rmsd = np.concatenate(rmsd_parts)
+            rg = np.concatenate(rg_parts)
+            
+            # Per-atom RMSF about the mean structure, straight from the
+            # streamed M2 (sample variance; no second pass over the frames)
+            rmsf = np.sqrt(m2.sum(axis=-1) / max(n_frames - 1, 1))
+            np.savetxt(rmsf_file, np.column_stack([load_idx[fit_idx], rmsf]),
+                      header="Atom RMSF(nm)", fmt='%d %.6f')
             
             return f"""✅ Trajectory analysis completed:
   📄 Trajectory: {trajectory_file}
-  🔢 Frames: {traj.n_frames}
-  ⚛️  Atoms: {traj.n_atoms}
+  🔢 Frames: {n_frames}
+  ⚛️  Atoms analyzed: {n_atoms} ({selection}, heavy atoms)
   
   📊 RMSD: {rmsd.mean():.3f} ± {rmsd.std():.3f} nm
   📊 Rg: {rg.mean():.3f} ± {rg.std():.3f} nm
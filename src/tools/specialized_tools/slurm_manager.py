@@ -5,38 +5,476 @@ Manages OpenMM and WESTPA job submission to SLURM-based HPC clusters.
 Handles SSH connections, file transfers, job submission, and status monitoring.
 """
 
+import asyncio
+import fnmatch
+import functools
+import hashlib
+import mmap
 import os
-import subprocess
-from typing import Tuple, Optional, List
+import posixpath
+import re
+import shlex
+import shutil
+import socket
+import tarfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Tuple, Optional, List
+
+# HPC configuration from environment, read once at import (protein_agents loads .env first)
+_HPC_HOST = os.getenv('HPC_HOST', 'localhost')
+_HPC_USERNAME = os.getenv('HPC_USERNAME', os.getenv('USER', 'user'))
+_HPC_SSH_KEY_PATH = os.getenv('HPC_SSH_KEY_PATH', os.path.expanduser('~/.ssh/id_rsa'))
+_HPC_WORKDIR = os.getenv('HPC_WORKDIR', f'/scratch/{_HPC_USERNAME}/protein_md')
+_HPC_PARTITION = os.getenv('HPC_PARTITION', 'gpu')
+
+# Transport tuning: a large channel window and TCP buffers keep many SFTP
+# requests in flight on high-RTT links instead of stop-and-wait per 32 KiB.
+SSH_WINDOW_SIZE = 2 ** 27
+SSH_MAX_PACKET_SIZE = 2 ** 18  # OpenSSH rejects packets above 256 KiB
+SOCKET_BUFFER_SIZE = 32 << 20
+SFTP_COPY_CHUNK = 1 << 20
+SFTP_MMAP_MIN_SIZE = 8 << 20  # larger uploads are written from an mmap without copies
+
+# Cipher preference: AES-GCM when the CPU has AES-NI, ChaCha20 otherwise.
+# Names the installed paramiko does not support are skipped.
+AES_CIPHERS = ('aes128-gcm@openssh.com', 'aes256-gcm@openssh.com', 'aes128-ctr', 'aes256-ctr')
+CHACHA_CIPHERS = ('chacha20-poly1305@openssh.com',)
+
+# Seconds between SSH keepalives so idle NAT/firewall state is not dropped
+SSH_KEEPALIVE_S = 30
+
+# OpenSSH multiplexing options for any out-of-process ssh/rsync call, so
+# repeated commands ride one master connection instead of a fresh handshake
+SSH_MULTIPLEX_OPTS = [
+    '-o', 'ControlMaster=auto',
+    '-o', 'ControlPath=~/.ssh/cm-%r@%h:%p',
+    '-o', 'ControlPersist=600',
+    '-o', 'GSSAPIAuthentication=no',
+]
+
+# Seconds a short remote command may go without output before it is abandoned
+# (control shell) or fails (exec_command)
+REMOTE_COMMAND_TIMEOUT_S = 120.0
+
+# Seconds a squeue/sacct answer is reused before polling the cluster again
+JOB_STATUS_TTL_S = 5.0
+
+# Seconds partition/GPU layout from sinfo is reused (it changes over minutes)
+CLUSTER_INFO_TTL_S = 60.0
+
+# Downloads handed to rsync over system OpenSSH (resumable, faster crypto)
+RSYNC_MIN_SIZE = 100 * 1024 * 1024
+RSYNC_EXTENSIONS = frozenset({'.dcd', '.h5', '.nc', '.xtc', '.trr'})
+
+# Non-interactive options for the rsync ssh: never prompt (a prompt would hang
+# the agent instead of falling back to SFTP) and give up on dead connections
+RSYNC_SSH_OPTS = [
+    '-o', 'BatchMode=yes',
+    '-o', 'StrictHostKeyChecking=accept-new',
+    '-o', 'ConnectTimeout=20',
+    '-o', 'ServerAliveInterval=30',
+]
+# Seconds rsync waits without any data before aborting
+RSYNC_IO_TIMEOUT_S = 300
+
+# Above this many files, one tar stream beats per-file SFTP OPEN/CLOSE round trips;
+# files larger than TAR_MAX_FILE_SIZE still go over parallel SFTP channels
+TAR_UPLOAD_MIN_FILES = 5
+TAR_MAX_FILE_SIZE = 8 << 20
+
+
+# Live SSH clients shared across SLURMManager instances, keyed by (host, user),
+# and how many connected managers hold each one (closed when that drops to 0)
+_CONNECTIONS: Dict[Tuple[str, str], object] = {}
+_CONNECTION_REFS: Dict[Tuple[str, str], int] = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+# asyncssh connections for async polling, keyed by (host, user) -> (event loop, connect task);
+# concurrent callers on that loop await the same task, so only one connection is opened
+_ASYNC_CONNECTIONS: Dict[Tuple[str, str], tuple] = {}
+
+
+def _cached(ttl_s: float):
+    """Cache a no-argument SLURMManager method per host for ttl_s seconds in self._cache."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            key = (self.hpc_host, method.__name__)
+            now = time.monotonic()
+            cached = self._cache.get(key)
+            if cached and now - cached[0] < ttl_s:
+                return cached[1]
+            value = method(self)
+            self._cache[key] = (now, value)
+            return value
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=1)
+def _has_aes_ni() -> bool:
+    """Whether the local CPU advertises AES instructions (assumed yes if unknown)."""
+    try:
+        with open('/proc/cpuinfo') as fh:
+            for line in fh:
+                if line.startswith(('flags', 'Features')):
+                    return 'aes' in line.split(':', 1)[1].split()
+    except OSError:
+        pass
+    return True
+
+
+def _make_transport(sock, **kwargs):
+    """Transport factory for SSHClient.connect with enlarged windows and CPU-aware ciphers."""
+    import paramiko
+    transport = paramiko.Transport(sock, default_window_size=SSH_WINDOW_SIZE,
+                                   default_max_packet_size=SSH_MAX_PACKET_SIZE, **kwargs)
+    
+    options = transport.get_security_options()
+    supported = list(options.ciphers)
+    order = AES_CIPHERS + CHACHA_CIPHERS if _has_aes_ni() else CHACHA_CIPHERS + AES_CIPHERS
+    preferred = [c for c in order if c in supported]
+    options.ciphers = tuple(preferred + [c for c in supported if c not in preferred])
+    return transport
 
 
 class SLURMManager:
     """Manage OpenMM and WESTPA jobs on SLURM HPC clusters."""
     
-    def __init__(self, workdir: str):
+    STATUS_EMOJI = {
+        'PENDING': '⏳',
+        'RUNNING': '🔄',
+        'COMPLETING': '⏹️',
+        'COMPLETED': '✅',
+        'FAILED': '❌',
+        'CANCELLED': '🚫',
+        'TIMEOUT': '⏰'
+    }
+    
+    # SLURM batch scripts, filled with str.format_map
+    OPENMM_SCRIPT_TEMPLATE = """#!/bin/bash
+#SBATCH --job-name={job_name}
+#SBATCH --nodes={nodes}
+#SBATCH --ntasks-per-node=1
+#SBATCH --gres=gpu:{gpus_per_node}
+#SBATCH --partition={partition}
+#SBATCH --time={walltime}
+#SBATCH --output=openmm_%j.out
+#SBATCH --error=openmm_%j.err
+
+# Load required modules (adjust for your HPC)
+module load cuda/11.8 2>/dev/null || true
+module load python/3.11 2>/dev/null || true
+
+# Activate virtual environment if exists
+if [ -f "$HOME/openmm_env/bin/activate" ]; then
+    source $HOME/openmm_env/bin/activate
+fi
+
+# Change to working directory
+cd {hpc_workdir}
+
+# Run simulation
+echo "Starting OpenMM simulation..."
+python {script_name}
+
+echo "OpenMM job completed: $(date)"
+"""
+    
+    WESTPA_SCRIPT_TEMPLATE = """#!/bin/bash
+#SBATCH --job-name=westpa_we
+#SBATCH --nodes=1
+#SBATCH --ntasks={walkers}
+#SBATCH --gres=gpu:{gpus}
+#SBATCH --partition={partition}
+#SBATCH --time={walltime}
+#SBATCH --output=westpa_%j.out
+#SBATCH --error=westpa_%j.err
+
+# Load modules
+module load cuda/11.8 2>/dev/null || true
+module load python/3.11 2>/dev/null || true
+
+# Activate WESTPA environment
+if [ -f "$HOME/westpa_env/bin/activate" ]; then
+    source $HOME/westpa_env/bin/activate
+fi
+
+cd {hpc_workdir}/westpa
+
+# Initialize WESTPA (first time only)
+if [ ! -d "west_data" ]; then
+    echo "Initializing WESTPA..."
+    ./init.sh
+fi
+
+# Run weighted ensemble
+echo "Starting WESTPA simulation..."
+w_run --max-iterations {iterations}
+
+echo "WESTPA job completed: $(date)"
+"""
+    
+    def __init__(self, workdir: str, max_parallel: int = 4):
         self.workdir = workdir
+        self._workdir = os.fspath(workdir)
+        self._local_hashes: Dict[str, Tuple[int, float, str]] = {}
+        self.max_parallel = max(1, max_parallel)
         self.workflow_logger = None  # Set by AutoGenSystem
         
         # HPC configuration from environment
-        self.hpc_host = os.getenv('HPC_HOST', 'localhost')
-        self.hpc_username = os.getenv('HPC_USERNAME', os.getenv('USER', 'user'))
-        self.ssh_key_path = os.getenv('HPC_SSH_KEY_PATH', os.path.expanduser('~/.ssh/id_rsa'))
-        self.hpc_workdir = os.getenv('HPC_WORKDIR', f'/scratch/{self.hpc_username}/protein_md')
-        self.partition = os.getenv('HPC_PARTITION', 'gpu')
+        self.hpc_host = _HPC_HOST
+        self.hpc_username = _HPC_USERNAME
+        self.ssh_key_path = _HPC_SSH_KEY_PATH
+        self.hpc_workdir = _HPC_WORKDIR
+        self.partition = _HPC_PARTITION
         
         # Connection state
         self.ssh_client = None
         self.sftp_client = None
         self.connected = False
         
+        # Long-lived shell channel for short commands (avoids a new sshd session per call)
+        self._ctl = None
+        self._ctl_lock = threading.Lock()
+        
+        # Transfer pool: each worker thread owns an SFTP channel on the shared transport
+        self._executor = None
+        self._sftp_local = threading.local()
+        self._worker_sftp = []
+        self._worker_sftp_lock = threading.Lock()
+        
         # Job tracking
         self.submitted_jobs = {}
+        self._status_cache: Dict[str, Tuple[float, dict]] = {}
+        self._cache: Dict[Tuple[str, str], Tuple[float, object]] = {}
     
     def _log(self, message: str):
         """Log message if workflow logger is available."""
         if self.workflow_logger:
             self.workflow_logger.log_tool_invocation("SLURMManager", {}, message)
     
+    def _open_control_channel(self):
+        """Start a shell (no PTY, so no prompt or echo) that short commands are fed into."""
+        self._close_control_channel()
+        channel = self.ssh_client.get_transport().open_session()
+        channel.settimeout(REMOTE_COMMAND_TIMEOUT_S)
+        channel.invoke_shell()
+        self._ctl = channel
+    
+    def _close_control_channel(self):
+        """Close the control shell if one is open."""
+        with self._ctl_lock:
+            if self._ctl is not None:
+                try:
+                    self._ctl.close()
+                except Exception:
+                    pass
+                self._ctl = None
+    
+    def _run_via_ctl(self, cmd: str) -> Optional[Tuple[int, bytes, bytes]]:
+        """
+        Run a command on the control shell, reading up to a per-call sentinel.
+        
+        stderr is merged into stdout. Returns None if the control channel is
+        unavailable, or if it times out or drops mid-command (it is then
+        closed), so the caller can fall back to exec_command.
+        """
+        with self._ctl_lock:
+            ctl = self._ctl
+            if ctl is None or ctl.closed or ctl.exit_status_ready():
+                return None
+            sentinel = f"__DONE_{uuid.uuid4().hex}__"
+            done = re.compile(rf"\n{sentinel}(\d+)\n".encode())
+            ctl.sendall(f"( {cmd} ) < /dev/null 2>&1; printf '\\n{sentinel}%d\\n' $?\n".encode())
+            
+            buf = b''
+            match = None
+            try:
+                while match is None:
+                    data = ctl.recv(65536)
+                    if not data:
+                        raise EOFError("control channel closed")
+                    buf += data
+                    match = done.search(buf)
+            except (socket.timeout, EOFError) as e:
+                # Shell is gone, or stuck (e.g. waiting for input after an unbalanced quote)
+                self._ctl = None
+                try:
+                    ctl.close()
+                except Exception:
+                    pass
+                self._log(f"Control shell failed ({type(e).__name__}); rerunning via exec_command")
+                return None
+            return int(match.group(1)), buf[:match.start()], b''
+    
+    def _run(self, cmd: str, discard_output: bool = False) -> Tuple[int, bytes, bytes]:
+        """
+        Run a remote command and wait for its exit status.
+        
+        Uses the control shell when it is open (stderr then arrives merged into
+        stdout), otherwise a fresh exec_command channel.
+        
+        Returns:
+            Tuple of (exit_code, stdout_bytes, stderr_bytes); both byte strings
+            are empty when discard_output is set.
+        """
+        had_ctl = self._ctl is not None
+        result = self._run_via_ctl(cmd)
+        if result is not None:
+            return (result[0], b'', b'') if discard_output else result
+        if had_ctl and self._ctl is None:
+            # The control shell just failed; start a fresh one for later commands
+            try:
+                self._open_control_channel()
+            except Exception:
+                pass
+        
+        stdin, stdout, stderr = self.ssh_client.exec_command(cmd, timeout=REMOTE_COMMAND_TIMEOUT_S)
+        stdin.close()
+        if discard_output:
+            return stdout.channel.recv_exit_status(), b'', b''
+        out = stdout.read()
+        err = stderr.read()
+        return stdout.channel.recv_exit_status(), out, err
+    
+    def _resolve_local(self, path: str) -> Optional[Tuple[str, int, float]]:
+        """Resolve a local path against workdir with one stat: (abs_path, size, mtime) or None."""
+        abs_path = os.path.join(self._workdir, path)  # join keeps absolute paths as-is
+        try:
+            st = os.stat(abs_path)
+        except FileNotFoundError:
+            return None
+        return abs_path, st.st_size, st.st_mtime
+    
+    def _sbatch(self, script: bytes, submit_dir: str) -> Tuple[str, str]:
+        """
+        Submit a batch script by piping it into ``sbatch`` from submit_dir.
+        
+        Returns:
+            Tuple of (stdout, stderr) from sbatch
+        """
+        quoted_dir = shlex.quote(submit_dir)
+        channel = self.ssh_client.get_transport().open_session()
+        try:
+            channel.exec_command(f"mkdir -p {quoted_dir} && cd {quoted_dir} && sbatch")
+            channel.sendall(script)
+            channel.shutdown_write()
+            output = channel.makefile('rb').read().decode()
+            error = channel.makefile_stderr('rb').read().decode()
+            channel.recv_exit_status()
+        finally:
+            channel.close()
+        return output, error
+    
+    def _local_sha256(self, path: str, size: int, mtime: float) -> str:
+        """SHA-256 of a local file, cached until its size or mtime changes."""
+        cached = self._local_hashes.get(path)
+        if cached and cached[0] == size and cached[1] == mtime:
+            return cached[2]
+        sha = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(SFTP_COPY_CHUNK), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self._local_hashes[path] = (size, mtime, digest)
+        return digest
+    
+    def _remote_sha256(self, remote_dir: str, names: List[str]) -> Dict[str, str]:
+        """SHA-256 of existing remote files, from one sha256sum call for the whole batch."""
+        _, out, _ = self._run(
+            f"cd {shlex.quote(remote_dir)} && sha256sum -- "
+            f"{' '.join(shlex.quote(n) for n in names)} 2>/dev/null"
+        )
+        digests = {}
+        for line in out.decode().splitlines():
+            digest, _, name = line.partition('  ')
+            if name:
+                digests[name] = digest
+        return digests
+    
+    def _thread_sftp(self):
+        """Return the calling thread's SFTP client, opening one on the shared transport."""
+        sftp = getattr(self._sftp_local, 'sftp', None)
+        if sftp is None or sftp.sock.closed:
+            sftp = self.ssh_client.get_transport().open_sftp_client()
+            self._sftp_local.sftp = sftp
+            with self._worker_sftp_lock:
+                self._worker_sftp.append(sftp)
+        return sftp
+    
+    def _transfer_pool(self) -> ThreadPoolExecutor:
+        """Lazily create the transfer pool (kept alive so worker channels are reused)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_parallel,
+                                                thread_name_prefix="sftp")
+        return self._executor
+    
+    def _close_transfer_pool(self):
+        """Stop the transfer pool and close every per-thread SFTP channel."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._worker_sftp_lock:
+            for sftp in self._worker_sftp:
+                try:
+                    sftp.close()
+                except Exception:
+                    pass
+            self._worker_sftp = []
+        self._sftp_local = threading.local()
+    
+    def _put_file(self, local_path: str, remote_path: str):
+        """
+        Upload one file on the calling worker's SFTP channel.
+        
+        Writes are pipelined and unbuffered, and data is passed as memoryview
+        slices so paramiko's per-request slicing does not copy; files above
+        SFTP_MMAP_MIN_SIZE are mapped rather than read into memory.
+        """
+        with open(local_path, 'rb') as local_fh, \
+                self._thread_sftp().open(remote_path, 'wb', bufsize=0) as remote_fh:
+            remote_fh.set_pipelined(True)
+            if os.fstat(local_fh.fileno()).st_size < SFTP_MMAP_MIN_SIZE:
+                remote_fh.write(memoryview(local_fh.read()))
+                return
+            with mmap.mmap(local_fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, len(view), SFTP_COPY_CHUNK):
+                        remote_fh.write(view[offset:offset + SFTP_COPY_CHUNK])
+                finally:
+                    view.release()
+    
+    def _upload_tar(self, local_paths: List[str], remote_dir: str, compress: bool = False):
+        """
+        Stream local files into a remote ``tar -x`` over a single exec channel.
+        
+        Use compress=True on slow links; plain tar is faster when CPU-bound.
+        """
+        channel = self.ssh_client.get_transport().open_session()
+        try:
+            channel.exec_command(
+                f"tar -x{'z' if compress else ''}f - -C {shlex.quote(remote_dir)}"
+            )
+            with channel.makefile('wb') as stream:
+                with tarfile.open(fileobj=stream, mode='w|gz' if compress else 'w|') as tar:
+                    for path in local_paths:
+                        tar.add(path, arcname=os.path.basename(path))
+            channel.shutdown_write()
+            error = channel.makefile_stderr('rb').read().decode()
+            if channel.recv_exit_status() != 0:
+                raise RuntimeError(f"remote tar failed: {error.strip()}")
+        finally:
+            channel.close()
+    
+    def _get_file(self, remote_path: str, local_path: str):
+        """Download one file on the calling worker's SFTP channel (get() prefetches)."""
+        self._thread_sftp().get(remote_path, local_path)
+    
     def connect_to_hpc(self) -> str:
         """
         Establish SSH connection to HPC cluster.
@@ -52,60 +490,117 @@ class SLURMManager:
             return "❌ Paramiko not installed. Run: pip install paramiko"
         
         try:
-            self.ssh_client = paramiko.SSHClient()
-            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            # Reuse a live transport to this host/user instead of a new handshake
+            key = (self.hpc_host, self.hpc_username)
+            with _CONNECTIONS_LOCK:
+                client = _CONNECTIONS.get(key)
+                transport = client.get_transport() if client else None
+                reused = transport is not None and transport.is_active()
+                if not reused:
+                    client = self._open_ssh_client(paramiko)
+                    client.get_transport().set_keepalive(SSH_KEEPALIVE_S)
+                    _CONNECTIONS[key] = client
+                    _CONNECTION_REFS[key] = 0
+                if self.ssh_client is not client:
+                    _CONNECTION_REFS[key] += 1
             
-            # Connect using SSH key
-            if os.path.exists(self.ssh_key_path):
-                self.ssh_client.connect(
-                    hostname=self.hpc_host,
-                    username=self.hpc_username,
-                    key_filename=self.ssh_key_path
-                )
-            else:
-                # Fall back to password (will prompt if needed)
-                self.ssh_client.connect(
-                    hostname=self.hpc_host,
-                    username=self.hpc_username
-                )
+            if self.sftp_client:
+                self._close_transfer_pool()
+                self.sftp_client.close()
+            if self.ssh_client is not client:
+                self._release_ssh_client(self.ssh_client)
+            self.ssh_client = client
             
             # Create SFTP client for file transfers
             self.sftp_client = self.ssh_client.open_sftp()
+            self.sftp_client.get_channel().settimeout(None)
+            
+            # Control shell for mkdir/squeue/scancel-style commands
+            self._open_control_channel()
             
             # Create working directory on HPC
-            stdin, stdout, stderr = self.ssh_client.exec_command(f"mkdir -p {self.hpc_workdir}")
-            stdout.read()  # Wait for completion
+            self._run(f"mkdir -p {shlex.quote(self.hpc_workdir)}", discard_output=True)
+            
+            # Prime the partition cache used to validate submissions
+            self._cache.clear()
+            self._sinfo()
             
             self.connected = True
             
             return f"""✅ Connected to HPC cluster:
   🖥️  Host: {self.hpc_host}
   👤 User: {self.hpc_username}
-  📁 Work dir: {self.hpc_workdir}"""
+  📁 Work dir: {self.hpc_workdir}
+  🔗 Session: {'reused' if reused else 'new'}"""
             
         except Exception as e:
             self.connected = False
             return f"❌ HPC connection failed: {str(e)}"
     
+    def _open_ssh_client(self, paramiko):
+        """Open a new SSH client over a tuned socket."""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        
+        # Tuned socket: no Nagle delay on small SFTP requests, large buffers
+        sock = socket.create_connection((self.hpc_host, 22))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        
+        connect_kwargs = {
+            'hostname': self.hpc_host,
+            'username': self.hpc_username,
+            'sock': sock,
+            'transport_factory': _make_transport,
+        }
+        # Connect using SSH key, else fall back to password (will prompt if needed)
+        if os.path.exists(self.ssh_key_path):
+            connect_kwargs['key_filename'] = self.ssh_key_path
+        client.connect(**connect_kwargs)
+        return client
+    
+    def _release_ssh_client(self, client):
+        """Drop one reference to a shared SSH client; close it once no manager uses it."""
+        if client is None:
+            return
+        key = (self.hpc_host, self.hpc_username)
+        with _CONNECTIONS_LOCK:
+            if _CONNECTIONS.get(key) is client:
+                _CONNECTION_REFS[key] -= 1
+                if _CONNECTION_REFS[key] > 0:
+                    return
+                del _CONNECTIONS[key]
+                del _CONNECTION_REFS[key]
+        client.close()
+    
     def disconnect(self) -> str:
-        """Close SSH connection."""
+        """Close SSH connection (the shared transport closes once no other manager uses it)."""
         try:
+            self._close_transfer_pool()
+            self._close_control_channel()
             if self.sftp_client:
                 self.sftp_client.close()
-            if self.ssh_client:
-                self.ssh_client.close()
+                self.sftp_client = None
+            client, self.ssh_client = self.ssh_client, None
+            self._release_ssh_client(client)
             self.connected = False
             return "✅ Disconnected from HPC"
         except Exception as e:
             return f"⚠️ Disconnect warning: {str(e)}"
     
-    def upload_files(self, local_files: List[str], remote_subdir: str = "") -> str:
+    def upload_files(self, local_files: List[str], remote_subdir: str = "",
+                     compress: bool = False) -> str:
         """
         Upload files to HPC cluster.
         
+        More than a handful of files are streamed as one tar archive; otherwise
+        each file goes over its own parallel SFTP channel.
+        
         Args:
             local_files: List of local file paths
             remote_subdir: Subdirectory on HPC (relative to hpc_workdir)
+            compress: Gzip the tar stream (worthwhile on slow links)
             
         Returns:
             Status message
@@ -115,39 +610,79 @@ class SLURMManager:
         
         self._log(f"Uploading {len(local_files)} files to HPC")
         
-        remote_dir = os.path.join(self.hpc_workdir, remote_subdir) if remote_subdir else self.hpc_workdir
+        remote_dir = posixpath.join(self.hpc_workdir, remote_subdir) if remote_subdir else self.hpc_workdir
         
         try:
             # Create remote directory
-            stdin, stdout, stderr = self.ssh_client.exec_command(f"mkdir -p {remote_dir}")
-            stdout.read()
+            self._run(f"mkdir -p {shlex.quote(remote_dir)}", discard_output=True)
             
             uploaded = []
+            unchanged = []
             failed = []
+            pending = []
             
             for local_file in local_files:
-                # Handle relative paths
-                if not os.path.isabs(local_file):
-                    local_path = os.path.join(self.workdir, local_file)
-                else:
-                    local_path = local_file
-                
-                if not os.path.exists(local_path):
+                resolved = self._resolve_local(local_file)
+                if resolved is None:
                     failed.append(f"{local_file} (not found)")
                     continue
                 
-                filename = os.path.basename(local_path)
-                remote_path = f"{remote_dir}/{filename}"
-                
+                local_path, size, mtime = resolved
+                pending.append((local_path, os.path.basename(local_path), size, mtime))
+            
+            # Skip files whose content already matches the remote copy
+            if pending:
+                remote_digests = self._remote_sha256(remote_dir, [entry[1] for entry in pending])
+                changed = []
+                for entry in pending:
+                    local_path, filename, size, mtime = entry
+                    if (filename in remote_digests
+                            and remote_digests[filename] == self._local_sha256(local_path, size, mtime)):
+                        unchanged.append(filename)
+                    else:
+                        changed.append(entry)
+                pending = changed
+            
+            local_entries = list(pending)
+            
+            # Many small files: one tar stream; large files stay on parallel SFTP
+            small = [entry for entry in pending if entry[2] <= TAR_MAX_FILE_SIZE]
+            if len(small) >= TAR_UPLOAD_MIN_FILES:
+                try:
+                    self._upload_tar([entry[0] for entry in small], remote_dir, compress)
+                    uploaded = [entry[1] for entry in small]
+                    pending = [entry for entry in pending if entry[2] > TAR_MAX_FILE_SIZE]
+                except Exception as e:
+                    self._log(f"Tar upload failed, falling back to SFTP: {e}")
+            
+            pool = self._transfer_pool()
+            futures = {
+                pool.submit(self._put_file, local_path, posixpath.join(remote_dir, filename)): filename
+                for local_path, filename, _, _ in pending
+            }
+            for future in as_completed(futures):
+                filename = futures[future]
                 try:
-                    self.sftp_client.put(local_path, remote_path)
+                    future.result()
                     uploaded.append(filename)
                 except Exception as e:
                     failed.append(f"{filename} ({str(e)})")
             
+            # Verify every upload with one directory listing instead of a stat per file
+            if uploaded:
+                local_sizes = {entry[1]: entry[2] for entry in local_entries}
+                remote_sizes = {a.filename: a.st_size for a in self.sftp_client.listdir_attr(remote_dir)}
+                for filename in list(uploaded):
+                    if remote_sizes.get(filename) != local_sizes[filename]:
+                        uploaded.remove(filename)
+                        failed.append(f"{filename} (size mismatch: local {local_sizes[filename]}, "
+                                      f"remote {remote_sizes.get(filename)})")
+            
             result = f"✅ Upload completed:\n  📤 Uploaded: {len(uploaded)} files"
             if uploaded:
                 result += f"\n  📁 Files: {', '.join(uploaded)}"
+            if unchanged:
+                result += f"\n  ⏭️  Unchanged (skipped): {', '.join(unchanged)}"
             if failed:
                 result += f"\n  ❌ Failed: {', '.join(failed)}"
             
@@ -174,7 +709,7 @@ class SLURMManager:
         
         self._log(f"Downloading results from HPC")
         
-        remote_dir = os.path.join(self.hpc_workdir, remote_subdir) if remote_subdir else self.hpc_workdir
+        remote_dir = posixpath.join(self.hpc_workdir, remote_subdir) if remote_subdir else self.hpc_workdir
         local_dir = os.path.join(self.workdir, local_subdir) if local_subdir else self.workdir
         
         os.makedirs(local_dir, exist_ok=True)
@@ -182,29 +717,52 @@ class SLURMManager:
         try:
             downloaded = []
             failed = []
+            targets = []
+            listings = {}
             
             for remote_file in remote_files:
-                # Handle wildcards
-                if '*' in remote_file:
-                    stdin, stdout, stderr = self.ssh_client.exec_command(
-                        f"ls {remote_dir}/{remote_file} 2>/dev/null"
-                    )
-                    matching_files = stdout.read().decode().strip().split('\n')
-                    matching_files = [f for f in matching_files if f]
+                # Handle wildcards: one SFTP listing per directory, matched locally
+                if any(c in remote_file for c in '*?['):
+                    pattern_dir, pattern = posixpath.split(remote_file)
+                    list_dir = posixpath.join(remote_dir, pattern_dir) if pattern_dir else remote_dir
+                    if list_dir not in listings:
+                        try:
+                            listings[list_dir] = {a.filename: a.st_size
+                                                  for a in self.sftp_client.listdir_attr(list_dir)}
+                        except IOError:
+                            listings[list_dir] = {}
+                    sizes = listings[list_dir]
+                    targets.extend((posixpath.join(list_dir, name), sizes[name])
+                                   for name in sorted(fnmatch.filter(sizes, pattern)))
                 else:
-                    matching_files = [f"{remote_dir}/{remote_file}"]
-                
-                for remote_path in matching_files:
-                    if not remote_path:
-                        continue
-                    filename = os.path.basename(remote_path)
-                    local_path = os.path.join(local_dir, filename)
-                    
-                    try:
-                        self.sftp_client.get(remote_path, local_path)
-                        downloaded.append(filename)
-                    except Exception as e:
-                        failed.append(f"{filename} ({str(e)})")
+                    targets.append((posixpath.join(remote_dir, remote_file), None))
+            
+            # Large trajectories go through rsync when available, the rest over SFTP
+            large = [path for path, size in targets
+                     if os.path.splitext(path)[1].lower() in RSYNC_EXTENSIONS
+                     or (size or 0) > RSYNC_MIN_SIZE]
+            if large and shutil.which('rsync'):
+                try:
+                    self._rsync(large, local_dir)
+                    downloaded.extend(posixpath.basename(path) for path in large)
+                    targets = [(path, size) for path, size in targets if path not in large]
+                except RuntimeError as e:
+                    self._log(f"rsync failed, falling back to SFTP: {e}")
+            
+            pool = self._transfer_pool()
+            futures = {}
+            for remote_path, _ in targets:
+                filename = posixpath.basename(remote_path)
+                local_path = os.path.join(local_dir, filename)
+                futures[pool.submit(self._get_file, remote_path, local_path)] = filename
+            
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    future.result()
+                    downloaded.append(filename)
+                except Exception as e:
+                    failed.append(f"{filename} ({str(e)})")
             
             result = f"✅ Download completed:\n  📥 Downloaded: {len(downloaded)} files"
             if downloaded:
@@ -219,6 +777,65 @@ class SLURMManager:
         except Exception as e:
             return f"❌ Download failed: {str(e)}"
     
+    def _rsync(self, remote_paths: List[str], local_dir: str):
+        """Pull remote paths into local_dir with rsync over the system ssh binary."""
+        # The only out-of-process transfer; everything else stays on paramiko
+        from subprocess import run, DEVNULL
+        
+        # Fast ciphers first; ssh negotiates down the list with older servers
+        ciphers = ','.join(AES_CIPHERS + CHACHA_CIPHERS)
+        ssh_cmd = (['ssh', '-T', '-c', ciphers, '-o', 'Compression=no']
+                   + RSYNC_SSH_OPTS + SSH_MULTIPLEX_OPTS)
+        if os.path.exists(self.ssh_key_path):
+            ssh_cmd += ['-i', self.ssh_key_path]
+        sources = [f"{self.hpc_username}@{self.hpc_host}:{path}" for path in remote_paths]
+        result = run(
+            ['rsync', '-a', '--partial', '--inplace', f'--timeout={RSYNC_IO_TIMEOUT_S}',
+             '-e', shlex.join(ssh_cmd), *sources, os.path.join(local_dir, '')],
+            stdin=DEVNULL, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"rsync exited {result.returncode}: {result.stderr.strip()}")
+    
+    def download_large(self, remote_files: List[str], remote_subdir: str = "",
+                       local_subdir: str = "") -> str:
+        """
+        Download large files (multi-GB trajectories) with resumable rsync.
+        
+        Runs over the system OpenSSH client, so crypto is not done in Python and
+        an interrupted transfer resumes where it stopped. Wildcards are expanded
+        by the remote shell.
+        
+        Args:
+            remote_files: List of remote filenames (or wildcards)
+            remote_subdir: Remote subdirectory
+            local_subdir: Local subdirectory for downloads
+            
+        Returns:
+            Status message
+        """
+        if not shutil.which('rsync'):
+            return "❌ rsync not found locally. Use download_results() instead."
+        if not remote_files or any(not f or f.startswith('/') or '..' in f.split('/')
+                                   for f in remote_files):
+            return "❌ Remote files must be non-empty paths relative to the HPC work dir."
+        
+        self._log(f"Downloading {len(remote_files)} large files from HPC with rsync")
+        
+        remote_dir = posixpath.join(self.hpc_workdir, remote_subdir) if remote_subdir else self.hpc_workdir
+        local_dir = os.path.join(self.workdir, local_subdir) if local_subdir else self.workdir
+        os.makedirs(local_dir, exist_ok=True)
+        
+        try:
+            self._rsync([posixpath.join(remote_dir, f) for f in remote_files], local_dir)
+            return f"""✅ rsync download completed:
+  📥 Files: {', '.join(remote_files)}
+  📁 Local dir: {local_dir}"""
+        except RuntimeError as e:
+            return f"❌ rsync failed: {str(e)}"
+        except Exception as e:
+            return f"❌ Download failed: {str(e)}"
+    
     def submit_openmm_job(self, pdb_file: str, script_name: str = "run_openmm.py",
                          nodes: int = 1, gpus_per_node: int = 1,
                          walltime: str = "24:00:00", job_name: str = None) -> Tuple[bool, str]:
@@ -244,53 +861,23 @@ class SLURMManager:
         
         self._log(f"Submitting OpenMM job: {job_name}")
         
-        slurm_script = f"""#!/bin/bash
-#SBATCH --job-name={job_name}
-#SBATCH --nodes={nodes}
-#SBATCH --ntasks-per-node=1
-#SBATCH --gres=gpu:{gpus_per_node}
-#SBATCH --partition={self.partition}
-#SBATCH --time={walltime}
-#SBATCH --output=openmm_%j.out
-#SBATCH --error=openmm_%j.err
-
-# Load required modules (adjust for your HPC)
-module load cuda/11.8 2>/dev/null || true
-module load python/3.11 2>/dev/null || true
-
-# Activate virtual environment if exists
-if [ -f "$HOME/openmm_env/bin/activate" ]; then
-    source $HOME/openmm_env/bin/activate
-fi
-
-# Change to working directory
-cd {self.hpc_workdir}
-
-# Run simulation
-echo "Starting OpenMM simulation..."
-python {script_name}
-
-echo "OpenMM job completed: $(date)"
-"""
+        partition_error = self._partition_error()
+        if partition_error:
+            return False, partition_error
+        
+        slurm_script = self.OPENMM_SCRIPT_TEMPLATE.format_map({
+            'job_name': job_name,
+            'nodes': nodes,
+            'gpus_per_node': gpus_per_node,
+            'partition': self.partition,
+            'walltime': walltime,
+            'hpc_workdir': self.hpc_workdir,
+            'script_name': script_name,
+        }).encode()
         
         try:
-            # Write SLURM script to HPC
-            script_path = f"{self.hpc_workdir}/submit_openmm.sh"
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                f"cat > {script_path} << 'EOF'\n{slurm_script}\nEOF"
-            )
-            stdout.read()  # Wait for completion
-            
-            # Make script executable
-            self.ssh_client.exec_command(f"chmod +x {script_path}")
-            
-            # Submit job
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                f"cd {self.hpc_workdir} && sbatch submit_openmm.sh"
-            )
-            
-            output = stdout.read().decode()
-            error = stderr.read().decode()
+            # Submit the script on sbatch's stdin in one round trip
+            output, error = self._sbatch(slurm_script, self.hpc_workdir)
             
             if "Submitted batch job" in output:
                 job_id = output.split()[-1]
@@ -329,61 +916,25 @@ echo "OpenMM job completed: $(date)"
         
         self._log(f"Submitting WESTPA job: {iterations} iterations, {walkers} walkers")
         
+        partition_error = self._partition_error()
+        if partition_error:
+            return False, partition_error
+        
         # Calculate GPUs needed (one per walker, up to available)
         gpus = min(walkers, 8)  # Typically max 8 GPUs per node
         
-        slurm_script = f"""#!/bin/bash
-#SBATCH --job-name=westpa_we
-#SBATCH --nodes=1
-#SBATCH --ntasks={walkers}
-#SBATCH --gres=gpu:{gpus}
-#SBATCH --partition={self.partition}
-#SBATCH --time={walltime}
-#SBATCH --output=westpa_%j.out
-#SBATCH --error=westpa_%j.err
-
-# Load modules
-module load cuda/11.8 2>/dev/null || true
-module load python/3.11 2>/dev/null || true
-
-# Activate WESTPA environment
-if [ -f "$HOME/westpa_env/bin/activate" ]; then
-    source $HOME/westpa_env/bin/activate
-fi
-
-cd {self.hpc_workdir}/westpa
-
-# Initialize WESTPA (first time only)
-if [ ! -d "west_data" ]; then
-    echo "Initializing WESTPA..."
-    ./init.sh
-fi
-
-# Run weighted ensemble
-echo "Starting WESTPA simulation..."
-w_run --max-iterations {iterations}
-
-echo "WESTPA job completed: $(date)"
-"""
+        slurm_script = self.WESTPA_SCRIPT_TEMPLATE.format_map({
+            'walkers': walkers,
+            'gpus': gpus,
+            'partition': self.partition,
+            'walltime': walltime,
+            'hpc_workdir': self.hpc_workdir,
+            'iterations': iterations,
+        }).encode()
         
         try:
-            # Ensure westpa directory exists
-            self.ssh_client.exec_command(f"mkdir -p {self.hpc_workdir}/westpa")
-            
-            # Write SLURM script
-            script_path = f"{self.hpc_workdir}/westpa/submit_westpa.sh"
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                f"cat > {script_path} << 'EOF'\n{slurm_script}\nEOF"
-            )
-            stdout.read()
-            
-            # Submit job
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                f"cd {self.hpc_workdir}/westpa && sbatch submit_westpa.sh"
-            )
-            
-            output = stdout.read().decode()
-            error = stderr.read().decode()
+            # Ensure westpa directory exists and submit the script on sbatch's stdin
+            output, error = self._sbatch(slurm_script, posixpath.join(self.hpc_workdir, "westpa"))
             
             if "Submitted batch job" in output:
                 job_id = output.split()[-1]
@@ -404,6 +955,127 @@ echo "WESTPA job completed: $(date)"
         except Exception as e:
             return False, f"❌ WESTPA job error: {str(e)}"
     
+    def _query_job_states(self, job_ids: List[str]) -> Dict[str, dict]:
+        """
+        Look up many jobs with one squeue call plus one sacct call for the rest.
+        
+        Results are cached for JOB_STATUS_TTL_S so repeated polls within one
+        agent tick do not go back to the login node.
+        """
+        now = time.monotonic()
+        states = {}
+        missing = []
+        for job_id in job_ids:
+            cached = self._status_cache.get(job_id)
+            if cached and now - cached[0] < JOB_STATUS_TTL_S:
+                states[job_id] = cached[1]
+            else:
+                missing.append(job_id)
+        
+        if missing:
+            # Jobs still in the queue
+            _, out, _ = self._run(
+                f"squeue -j {shlex.quote(','.join(missing))} -h -o '%i %T %M %L'"
+            )
+            for line in out.decode().splitlines():
+                parts = line.split()
+                if parts and parts[0] in missing:
+                    states[parts[0]] = self._parse_squeue(parts)
+            
+            # Jobs no longer queued - one sacct for all of them
+            finished = [job_id for job_id in missing if job_id not in states]
+            if finished:
+                _, out, _ = self._run(
+                    f"sacct -j {shlex.quote(','.join(finished))} -n -X "
+                    f"-o JobID,State,Elapsed,ExitCode --parsable2"
+                )
+                for line in out.decode().splitlines():
+                    parts = line.split('|')
+                    if parts and parts[0] in finished and parts[0] not in states:
+                        states[parts[0]] = self._parse_sacct(parts)
+            
+            for job_id in missing:
+                if job_id in states:
+                    self._record_job_state(job_id, states[job_id], now)
+        
+        return states
+    
+    @staticmethod
+    def _parse_squeue(parts: List[str]) -> dict:
+        """State dict from a split `squeue -o '%i %T %M %L'` line."""
+        return {
+            'queued': True,
+            'state': parts[1] if len(parts) > 1 else "UNKNOWN",
+            'runtime': parts[2] if len(parts) > 2 else "N/A",
+            'remaining': parts[3] if len(parts) > 3 else "N/A",
+        }
+    
+    @staticmethod
+    def _parse_sacct(parts: List[str]) -> dict:
+        """State dict from a split `sacct -o JobID,State,Elapsed,ExitCode --parsable2` line."""
+        return {
+            'queued': False,
+            'state': parts[1] if len(parts) > 1 else "UNKNOWN",
+            'elapsed': parts[2] if len(parts) > 2 else "N/A",
+            'exit_code': parts[3] if len(parts) > 3 else "N/A",
+        }
+    
+    def _record_job_state(self, job_id: str, info: dict, now: float):
+        """Cache a fresh job state and mirror finished states into submitted_jobs."""
+        self._status_cache[job_id] = (now, info)
+        if not info['queued'] and job_id in self.submitted_jobs:
+            self.submitted_jobs[job_id]['status'] = info['state']
+    
+    def _format_job_status(self, job_id: str, info: Optional[dict]) -> str:
+        """Render one job's state dict as a status message."""
+        if info is None:
+            return f"❓ Job {job_id} not found in queue or history"
+        
+        if info['queued']:
+            emoji = self.STATUS_EMOJI.get(info['state'], '❓')
+            return f"""{emoji} Job {job_id} Status:
+  📊 State: {info['state']}
+  ⏱️  Runtime: {info['runtime']}
+  ⏳ Remaining: {info['remaining']}"""
+        
+        return f"""Job {job_id} completed:
+  📊 Final state: {info['state']}
+  ⏱️  Total runtime: {info['elapsed']}
+  🔢 Exit code: {info['exit_code']}"""
+    
+    def check_job_statuses(self, job_ids: List[str]) -> str:
+        """
+        Check status of several SLURM jobs in one round trip.
+        
+        Args:
+            job_ids: SLURM job IDs
+            
+        Returns:
+            Status table
+        """
+        if not self.connected:
+            return "❌ Not connected to HPC."
+        
+        try:
+            states = self._query_job_states(job_ids)
+            lines = [f"📋 Status of {len(job_ids)} jobs:"]
+            for job_id in job_ids:
+                info = states.get(job_id)
+                if info is None:
+                    lines.append(f"  ❓ {job_id}: not found in queue or history")
+                elif info['queued']:
+                    emoji = self.STATUS_EMOJI.get(info['state'], '❓')
+                    lines.append(f"  {emoji} {job_id}: {info['state']} "
+                                 f"(runtime {info['runtime']}, remaining {info['remaining']})")
+                else:
+                    emoji = self.STATUS_EMOJI.get(info['state'].split()[0], '❓')
+                    lines.append(f"  {emoji} {job_id}: {info['state']} "
+                                 f"(elapsed {info['elapsed']}, exit {info['exit_code']})")
+            return "\n".join(lines)
+            
+        except Exception as e:
+            return f"❌ Status check failed: {str(e)}"
+    
     def check_job_status(self, job_id: str) -> str:
         """
         Check status of a SLURM job.
@@ -418,76 +1090,120 @@ echo "WESTPA job completed: $(date)"
             return "❌ Not connected to HPC."
         
         try:
-            # Check job status using squeue
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                f"squeue -j {job_id} -h -o '%T %M %L'"
-            )
-            output = stdout.read().decode().strip()
+            return self._format_job_status(job_id, self._query_job_states([job_id]).get(job_id))
+        except Exception as e:
+            return f"❌ Status check failed: {str(e)}"
+    
+    async def _async_connection(self):
+        """Return an asyncssh connection for this host/user, kept open per event loop."""
+        import asyncssh
+        
+        loop = asyncio.get_running_loop()
+        key = (self.hpc_host, self.hpc_username)
+        cached = _ASYNC_CONNECTIONS.get(key)
+        if cached and cached[0] is loop:
+            connecting = cached[1]
+        else:
+            if cached:
+                # Connection from an earlier event loop; close it before replacing it
+                self._close_async_entry(*cached)
+            # known_hosts=None matches the paramiko path's AutoAddPolicy
+            connect_kwargs = {'username': self.hpc_username, 'known_hosts': None}
+            if os.path.exists(self.ssh_key_path):
+                connect_kwargs['client_keys'] = [self.ssh_key_path]
+            # Stored before the first await, so concurrent callers find and share it
+            connecting = loop.create_task(asyncssh.connect(self.hpc_host, **connect_kwargs))
+            _ASYNC_CONNECTIONS[key] = (loop, connecting)
+        
+        try:
+            # Shielded: one caller being cancelled must not cancel the shared connect
+            return await asyncio.shield(connecting)
+        except Exception:
+            if _ASYNC_CONNECTIONS.get(key, (None, None))[1] is connecting:
+                del _ASYNC_CONNECTIONS[key]  # let the next call retry
+            raise
+    
+    @staticmethod
+    def _close_async_entry(loop, connecting):
+        """Close (or cancel) a cached asyncssh connection from another event loop."""
+        if not connecting.done():
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(connecting.cancel)
+            return
+        if connecting.cancelled() or connecting.exception() is not None:
+            return
+        try:
+            connecting.result().close()
+        except Exception:
+            pass
+    
+    async def check_job_status_async(self, job_id: str) -> str:
+        """
+        Check status of a SLURM job without blocking the event loop.
+        
+        Uses one shared asyncssh connection, so many calls can be awaited
+        together (see check_job_statuses_async).
+        
+        Args:
+            job_id: SLURM job ID
             
-            if output:
-                parts = output.split()
-                status = parts[0] if len(parts) > 0 else "UNKNOWN"
-                runtime = parts[1] if len(parts) > 1 else "N/A"
-                remaining = parts[2] if len(parts) > 2 else "N/A"
-                
-                status_emoji = {
-                    'PENDING': '⏳',
-                    'RUNNING': '🔄',
-                    'COMPLETING': '⏹️',
-                    'COMPLETED': '✅',
-                    'FAILED': '❌',
-                    'CANCELLED': '🚫',
-                    'TIMEOUT': '⏰'
-                }
-                
-                emoji = status_emoji.get(status, '❓')
-                
-                return f"""{emoji} Job {job_id} Status:
-  📊 State: {status}
-  ⏱️  Runtime: {runtime}
-  ⏳ Remaining: {remaining}"""
-            else:
-                # Job not in queue - check sacct for completed jobs
-                stdin, stdout, stderr = self.ssh_client.exec_command(
-                    f"sacct -j {job_id} -n -o State,Elapsed,ExitCode --parsable2"
+        Returns:
+            Status message
+        """
+        now = time.monotonic()
+        cached = self._status_cache.get(job_id)
+        if cached and now - cached[0] < JOB_STATUS_TTL_S:
+            return self._format_job_status(job_id, cached[1])
+        
+        try:
+            conn = await self._async_connection()
+            quoted = shlex.quote(job_id)
+            
+            info = None
+            result = await conn.run(f"squeue -j {quoted} -h -o '%i %T %M %L'", check=False)
+            for line in (result.stdout or "").splitlines():
+                parts = line.split()
+                if parts and parts[0] == job_id:
+                    info = self._parse_squeue(parts)
+            
+            if info is None:
+                result = await conn.run(
+                    f"sacct -j {quoted} -n -X -o JobID,State,Elapsed,ExitCode --parsable2",
+                    check=False
                 )
-                sacct_output = stdout.read().decode().strip()
-                
-                if sacct_output:
-                    lines = sacct_output.split('\n')
-                    if lines:
-                        parts = lines[0].split('|')
-                        status = parts[0] if len(parts) > 0 else "UNKNOWN"
-                        elapsed = parts[1] if len(parts) > 1 else "N/A"
-                        exit_code = parts[2] if len(parts) > 2 else "N/A"
-                        
-                        if job_id in self.submitted_jobs:
-                            self.submitted_jobs[job_id]['status'] = status
-                        
-                        return f"""Job {job_id} completed:
-  📊 Final state: {status}
-  ⏱️  Total runtime: {elapsed}
-  🔢 Exit code: {exit_code}"""
-                
-                return f"❓ Job {job_id} not found in queue or history"
-                
+                for line in (result.stdout or "").splitlines():
+                    parts = line.split('|')
+                    if parts and parts[0] == job_id:
+                        info = self._parse_sacct(parts)
+                        break
+            
+            if info is not None:
+                self._record_job_state(job_id, info, now)
+            return self._format_job_status(job_id, info)
+            
+        except ImportError:
+            return "❌ asyncssh not installed. Run: pip install asyncssh"
         except Exception as e:
             return f"❌ Status check failed: {str(e)}"
     
+    async def check_job_statuses_async(self, job_ids: List[str]) -> List[str]:
+        """Poll several jobs concurrently over the shared asyncssh connection."""
+        return list(await asyncio.gather(*(self.check_job_status_async(j) for j in job_ids)))
+    
     def cancel_job(self, job_id: str) -> str:
         """Cancel a SLURM job."""
         if not self.connected:
             return "❌ Not connected to HPC."
         
         try:
-            stdin, stdout, stderr = self.ssh_client.exec_command(f"scancel {job_id}")
-            error = stderr.read().decode()
+            exit_code, out, err = self._run(f"scancel {shlex.quote(job_id)}")
             
-            if error:
-                return f"❌ Cancel failed: {error}"
+            if exit_code != 0:
+                return f"❌ Cancel failed: {(err or out).decode()}"
             
             if job_id in self.submitted_jobs:
                 self.submitted_jobs[job_id]['status'] = 'cancelled'
+            self._status_cache.pop(job_id, None)
             
             return f"✅ Job {job_id} cancelled"
             
@@ -500,10 +1216,10 @@ echo "WESTPA job completed: $(date)"
             return "❌ Not connected to HPC."
         
         try:
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                f"squeue -u {self.hpc_username} -o '%.10i %.20j %.8T %.10M %.9l %.6D %R'"
+            _, out, _ = self._run(
+                f"squeue -u {shlex.quote(self.hpc_username)} -o '%.10i %.20j %.8T %.10M %.9l %.6D %R'"
             )
-            output = stdout.read().decode()
+            output = out.decode()
             
             if output.strip():
                 return f"📋 Jobs for {self.hpc_username}:\n{output}"
@@ -519,25 +1235,36 @@ echo "WESTPA job completed: $(date)"
             return "❌ Not connected to HPC."
         
         try:
-            # Get partition info
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                "sinfo -o '%P %.5a %.10l %.6D %.6t %N'"
-            )
-            partition_info = stdout.read().decode()
-            
-            # Get GPU info if available
-            stdin, stdout, stderr = self.ssh_client.exec_command(
-                "sinfo -o '%P %G' | head -10"
-            )
-            gpu_info = stdout.read().decode()
-            
             return f"""🖥️  HPC Cluster Information:
   
-📊 Partitions:
-{partition_info}
-
-🎮 GPU Resources:
-{gpu_info}"""
+📊 Partitions and 🎮 GPU Resources:
+{self._sinfo()}"""
             
         except Exception as e:
             return f"❌ Cluster info failed: {str(e)}"
+    
+    @_cached(CLUSTER_INFO_TTL_S)
+    def _sinfo(self) -> str:
+        """Partition, node and GRES layout from a single sinfo call."""
+        _, out, _ = self._run("sinfo -o '%P %.5a %.10l %.6D %.6t %G %N'")
+        return out.decode()
+    
+    def _partitions(self) -> List[str]:
+        """Partition names from the cached sinfo output (default marker stripped)."""
+        names = []
+        for line in self._sinfo().splitlines()[1:]:
+            parts = line.split()
+            if parts and parts[0].rstrip('*') not in names:
+                names.append(parts[0].rstrip('*'))
+        return names
+    
+    def _partition_error(self) -> Optional[str]:
+        """Error message if the configured partition is missing from the cluster."""
+        try:
+            partitions = self._partitions()
+        except Exception:
+            return None
+        if partitions and self.partition not in partitions:
+            return (f"❌ Partition '{self.partition}' not found on cluster. "
+                    f"Available: {', '.join(partitions)}")
+        return None
@@ -7,13 +7,44 @@ structure preparation, validation, and system setup for MD simulations.
 Replaces materials-science Atomsk-based structure creation.
 """
 
+import functools
+import gzip
+import hashlib
+import json
 import os
+import re
+import shutil
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Tuple, Dict, List
 
+try:
+    from orjson import loads as _json_loads  # parses bytes directly, ~3-5x faster
+except ImportError:
+    _json_loads = json.loads
+
+# PDB IDs are a digit followed by three alphanumerics (e.g. 1LYZ)
+_PDB_ID_RE = re.compile(r'^[0-9][A-Za-z0-9]{3}$')
+
 
 class StructureCreator:
     """Handles protein structure creation and preparation for MD simulations."""
+    
+    HTTP_POOL_SIZE = 16  # pooled connections per host; also caps batch download threads
+    INFO_CACHE_TTL_S = 24 * 3600  # RCSB entry metadata rarely changes within a day
+    
+    # Fixed-width PDB record names (columns 1-6)
+    RECORD_ATOM = 'ATOM  '
+    RECORD_HETATM = 'HETATM'
+    RECORD_REMARK = 'REMARK'
+    COORD_RECORDS = (RECORD_ATOM, RECORD_HETATM)
+    ION_NAMES = frozenset(('NA', 'CL', 'K'))
+    
+    VECTOR_SCAN_MIN_BYTES = 8 * 1024 * 1024  # below this the plain line loop is faster
+    MAX_PARSE_BYTES = 200 * 1024 * 1024  # larger files are saved but not parsed
 
     def __init__(self, workdir: str):
         self.workdir = workdir
@@ -23,10 +54,32 @@ class StructureCreator:
         self.structure_validated = False
         self.last_structure_file = None
         self.system_prepared = False
+        self.max_parse_bytes = self.MAX_PARSE_BYTES
+        self._last_scan = None  # ((path, mtime), scan dict) of the last parsed file
         
         # PDB/AlphaFold base URLs
         self.rcsb_url = "https://files.rcsb.org/download"
         self.alphafold_url = "https://alphafold.ebi.ac.uk/files"
+        
+        # One keep-alive session for all RCSB/AlphaFold calls (no repeated TLS handshakes)
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=self.HTTP_POOL_SIZE, pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        ))
+        
+        # In-process memo of REST lookups (per instance; failures are not cached)
+        self._fetch_pdb_info = functools.lru_cache(maxsize=256)(self._fetch_pdb_info_uncached)
+        self._search_entries = functools.lru_cache(maxsize=256)(self._search_entries_uncached)
+    
+    def close(self):
+        """Close the pooled HTTP connections."""
+        self._session.close()
+    
+    def __del__(self):
+        session = getattr(self, '_session', None)
+        if session is not None:
+            session.close()
     
     def _log(self, message: str):
         """Log message if workflow logger is available."""
@@ -35,13 +88,65 @@ class StructureCreator:
                 "StructureCreator", {}, message
             )
     
-    def download_pdb_structure(self, pdb_id: str, format: str = "pdb") -> str:
+    @staticmethod
+    def _write_stream(response, output_file: str, gunzip: bool = False):
+        """Write a streamed HTTP response body to disk in binary chunks.
+        
+        With gunzip, the body is a .gz file and is decompressed while streaming.
+        """
+        # Write to a temp name first so an interrupted download never looks cached
+        tmp_file = output_file + '.part'
+        response.raw.decode_content = True  # undo any transport encoding first
+        with open(tmp_file, 'wb') as f:
+            if gunzip:
+                with gzip.GzipFile(fileobj=response.raw) as gz:
+                    shutil.copyfileobj(gz, f, length=1 << 16)
+            else:
+                shutil.copyfileobj(response.raw, f, length=1 << 16)
+        os.replace(tmp_file, output_file)
+    
+    @staticmethod
+    def _is_cached(path: str) -> bool:
+        """Whether a previously downloaded, non-empty file exists."""
+        try:
+            return os.path.getsize(path) > 0
+        except OSError:
+            return False
+    
+    def _info_cache_path(self, pdb_id: str) -> str:
+        return os.path.join(self.workdir, '.pdb_info_cache', f"{pdb_id}.json")
+    
+    def _load_info_cache(self, pdb_id: str) -> Optional[Dict]:
+        """Cached RCSB entry JSON, or None if missing or older than INFO_CACHE_TTL_S."""
+        path = self._info_cache_path(pdb_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.INFO_CACHE_TTL_S:
+                return None
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def _save_info_cache(self, pdb_id: str, content: bytes):
+        path = self._info_cache_path(pdb_id)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+        except OSError:
+            pass
+    
+    def download_pdb_structure(self, pdb_id: str, format: str = "pdb",
+                               force_refresh: bool = False) -> str:
         """
         Download PDB structure from RCSB database.
         
+        A non-empty file already in the workdir is reused unless force_refresh.
+        
         Args:
             pdb_id: 4-character PDB identifier (e.g., '1LYZ')
             format: File format ('pdb' or 'cif')
+            force_refresh: Download again even if the file exists
             
         Returns:
             Status message with file path
@@ -50,57 +155,106 @@ class StructureCreator:
         
         pdb_id = pdb_id.upper().strip()
         
-        if len(pdb_id) != 4:
-            return f"❌ Invalid PDB ID: {pdb_id}. Must be 4 characters."
+        if not _PDB_ID_RE.match(pdb_id):
+            return f"❌ Invalid PDB ID: {pdb_id}. Must be 4 characters starting with a digit."
         
-        # Determine file extension
+        # Determine file extension (fetch the gzipped variant, ~5x fewer bytes)
         if format.lower() == "cif":
             extension = "cif"
-            url = f"{self.rcsb_url}/{pdb_id}.cif"
+            url = f"{self.rcsb_url}/{pdb_id}.cif.gz"
         else:
             extension = "pdb"
-            url = f"{self.rcsb_url}/{pdb_id}.pdb"
+            url = f"{self.rcsb_url}/{pdb_id}.pdb.gz"
         
         output_file = os.path.join(self.workdir, f"{pdb_id}.{extension}")
         
         try:
-            response = requests.get(url, timeout=30)
+            cached = not force_refresh and self._is_cached(output_file)
+            if not cached:
+                with self._session.get(url, stream=True, timeout=30) as response:
+                    if response.status_code == 404:
+                        return f"❌ PDB ID '{pdb_id}' not found in RCSB database"
+                    if response.status_code != 200:
+                        return f"❌ Download failed with status code: {response.status_code}"
+                    self._write_stream(response, output_file, gunzip=True)
             
-            if response.status_code == 200:
-                with open(output_file, 'w') as f:
-                    f.write(response.text)
-                
-                # Parse structure info
-                info = self._parse_pdb_info(output_file)
-                
-                self.last_structure_file = output_file
-                
-                return f"""✅ PDB structure downloaded successfully:
+            # Parse structure info
+            info = self._structure_info(output_file)
+            
+            self.last_structure_file = output_file
+            
+            return f"""✅ PDB structure downloaded successfully:
   🆔 PDB ID: {pdb_id}
-  📄 File: {pdb_id}.{extension}
+  📄 File: {pdb_id}.{extension}{' (cached)' if cached else ''}
   🔬 Title: {info.get('title', 'N/A')}
   ⚛️  Atoms: {info.get('atoms', 'N/A')}
   🧬 Residues: {info.get('residues', 'N/A')}
   🔗 Chains: {info.get('chains', 'N/A')}
   📊 Resolution: {info.get('resolution', 'N/A')}"""
                 
-            elif response.status_code == 404:
-                return f"❌ PDB ID '{pdb_id}' not found in RCSB database"
-            else:
-                return f"❌ Download failed with status code: {response.status_code}"
-                
         except requests.exceptions.Timeout:
             return "❌ Download timed out. Please try again."
         except Exception as e:
             return f"❌ Download error: {str(e)}"
     
-    def download_alphafold_structure(self, uniprot_id: str, version: int = 4) -> str:
+    def pdb_exists(self, pdb_id: str, format: str = "pdb") -> bool:
+        """
+        Check whether an entry is downloadable from RCSB without fetching it.
+        
+        Sends a HEAD request, so no file body or REST JSON is transferred.
+        
+        Args:
+            pdb_id: 4-character PDB identifier
+            format: File format ('pdb' or 'cif')
+            
+        Returns:
+            True if the file is available
+        """
+        pdb_id = pdb_id.upper().strip()
+        extension = "cif" if format.lower() == "cif" else "pdb"
+        try:
+            response = self._session.head(f"{self.rcsb_url}/{pdb_id}.{extension}",
+                                          timeout=5, allow_redirects=True)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+    
+    def download_pdb_structures(self, pdb_ids: List[str], format: str = "pdb",
+                                max_workers: int = 8) -> Dict[str, str]:
+        """
+        Download several PDB structures concurrently.
+        
+        Args:
+            pdb_ids: PDB identifiers
+            format: File format ('pdb' or 'cif')
+            max_workers: Parallel downloads (capped at HTTP_POOL_SIZE)
+            
+        Returns:
+            Dict mapping each PDB ID to its download status message
+        """
+        self._log(f"Downloading {len(pdb_ids)} PDB structures")
+        
+        results = {}
+        workers = max(1, min(max_workers, self.HTTP_POOL_SIZE, len(pdb_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.download_pdb_structure, pdb_id, format): pdb_id
+                       for pdb_id in pdb_ids}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
+    
+    def download_alphafold_structure(self, uniprot_id: str, version: int = 4,
+                                     force_refresh: bool = False) -> str:
         """
         Download AlphaFold predicted structure from EBI.
         
+        A non-empty file already in the workdir is reused unless force_refresh
+        (pass it when switching model versions).
+        
         Args:
             uniprot_id: UniProt accession (e.g., 'P00520')
             version: AlphaFold model version (default: 4)
+            force_refresh: Download again even if the file exists
             
         Returns:
             Status message with file path
@@ -115,29 +269,27 @@ class StructureCreator:
         output_file = os.path.join(self.workdir, f"AF_{uniprot_id}.pdb")
         
         try:
-            response = requests.get(url, timeout=30)
+            cached = not force_refresh and self._is_cached(output_file)
+            if not cached:
+                with self._session.get(url, stream=True, timeout=30) as response:
+                    if response.status_code == 404:
+                        return f"❌ UniProt ID '{uniprot_id}' not found in AlphaFold database"
+                    if response.status_code != 200:
+                        return f"❌ AlphaFold download failed: status {response.status_code}"
+                    self._write_stream(response, output_file)
             
-            if response.status_code == 200:
-                with open(output_file, 'w') as f:
-                    f.write(response.text)
-                
-                info = self._parse_pdb_info(output_file)
-                
-                self.last_structure_file = output_file
-                
-                return f"""✅ AlphaFold structure downloaded:
+            info = self._structure_info(output_file)
+            
+            self.last_structure_file = output_file
+            
+            return f"""✅ AlphaFold structure downloaded:
   🆔 UniProt: {uniprot_id}
-  📄 File: AF_{uniprot_id}.pdb
+  📄 File: AF_{uniprot_id}.pdb{' (cached)' if cached else ''}
   🔬 Model version: {version}
   ⚛️  Atoms: {info.get('atoms', 'N/A')}
   🧬 Residues: {info.get('residues', 'N/A')}
   ⚠️  Note: Check pLDDT scores for model confidence"""
                 
-            elif response.status_code == 404:
-                return f"❌ UniProt ID '{uniprot_id}' not found in AlphaFold database"
-            else:
-                return f"❌ AlphaFold download failed: status {response.status_code}"
-                
         except Exception as e:
             return f"❌ AlphaFold download error: {str(e)}"
     
@@ -161,36 +313,23 @@ class StructureCreator:
         if not os.path.exists(pdb_path):
             return False, f"❌ File not found: {pdb_file}"
         
+        size = os.path.getsize(pdb_path)
+        if size > self.max_parse_bytes:
+            # A skipped check is not a failed one; don't block the gate on size alone
+            return True, (f"⚠️  Skipped validation: {pdb_file} is {size / 1e6:.0f} MB "
+                           f"(limit {self.max_parse_bytes / 1e6:.0f} MB). Validate with a streaming tool.")
+        
         issues = []
         warnings = []
         
         try:
-            with open(pdb_path, 'r') as f:
-                content = f.read()
-                lines = content.split('\n')
-            
-            # Count atoms and check for common issues
-            atom_count = 0
-            has_hydrogens = False
-            missing_residues = []
-            hetatm_count = 0
-            water_count = 0
-            
-            for line in lines:
-                if line.startswith('ATOM'):
-                    atom_count += 1
-                    if ' H' in line[12:16] or line[12:16].strip().startswith('H'):
-                        has_hydrogens = True
-                        
-                elif line.startswith('HETATM'):
-                    hetatm_count += 1
-                    if 'HOH' in line or 'WAT' in line:
-                        water_count += 1
-                        
-                elif line.startswith('REMARK 465'):
-                    # Missing residues
-                    if 'M RES' not in line and len(line) > 20:
-                        missing_residues.append(line[15:27].strip())
+            # Count atoms and check for common issues (shared, cached scan)
+            scan = self._scan_pdb(pdb_path)
+            atom_count = scan['atoms']
+            hetatm_count = scan['hetatms']
+            water_count = scan['waters']
+            has_hydrogens = scan['has_hydrogens']
+            missing_residues = scan['missing_residues']
             
             # Check for critical issues
             if atom_count == 0:
@@ -258,11 +397,6 @@ class StructureCreator:
         """
         self._log(f"Creating protein system from: {pdb_file}")
         
-        try:
-            from openmm import app, unit
-        except ImportError:
-            return "❌ OpenMM not installed. Run: pip install openmm"
-        
         if not os.path.isabs(pdb_file):
             pdb_path = os.path.join(self.workdir, pdb_file)
         else:
@@ -271,6 +405,40 @@ class StructureCreator:
         if not os.path.exists(pdb_path):
             return f"❌ PDB file not found: {pdb_file}"
         
+        base_name = os.path.splitext(os.path.basename(pdb_file))[0]
+        output_file = f"{base_name}_prepared.pdb"
+        output_path = os.path.join(self.workdir, output_file)
+        
+        # Same input + parameters -> same prepared system; reuse it instead of
+        # re-running addHydrogens/addSolvent
+        cache_key = hashlib.sha1(repr((
+            os.path.abspath(pdb_path), os.path.getmtime(pdb_path),
+            padding, ionic_strength, forcefield, add_waters
+        )).encode()).hexdigest()
+        cache_dir = os.path.join(self.workdir, '.prepared_cache')
+        cached_pdb = os.path.join(cache_dir, f"prepared_{cache_key}.pdb")
+        cached_counts = os.path.join(cache_dir, f"prepared_{cache_key}.json")
+        
+        if os.path.exists(cached_pdb) and os.path.exists(cached_counts):
+            try:
+                with open(cached_counts, 'rb') as f:
+                    counts = json.load(f)
+                if os.path.abspath(cached_pdb) != os.path.abspath(output_path):
+                    shutil.copyfile(cached_pdb, output_path)
+                self.system_prepared = True
+                self.last_structure_file = output_path
+                return self._format_system_summary(
+                    pdb_file, output_file + " (cached)", counts,
+                    padding, ionic_strength, forcefield
+                )
+            except (OSError, ValueError):
+                pass  # Fall through and rebuild
+        
+        try:
+            from openmm import app, unit
+        except ImportError:
+            return "❌ OpenMM not installed. Run: pip install openmm"
+        
         try:
             # Load structure
             pdb = app.PDBFile(pdb_path)
@@ -292,39 +460,58 @@ class StructureCreator:
                     ionicStrength=ionic_strength * unit.molar
                 )
             
-            # Count molecules
+            # Count molecules in one pass over the residues
             n_atoms = modeller.topology.getNumAtoms()
-            n_residues = modeller.topology.getNumResidues()
-            n_waters = sum(1 for r in modeller.topology.residues() if r.name == 'HOH')
-            n_ions = sum(1 for r in modeller.topology.residues() if r.name in ['NA', 'CL', 'K'])
+            n_residues = n_waters = n_ions = 0
+            for residue in modeller.topology.residues():
+                n_residues += 1
+                name = residue.name
+                if name == 'HOH':
+                    n_waters += 1
+                elif name in self.ION_NAMES:
+                    n_ions += 1
             
             # Save prepared system
-            base_name = os.path.splitext(os.path.basename(pdb_file))[0]
-            output_file = f"{base_name}_prepared.pdb"
-            output_path = os.path.join(self.workdir, output_file)
-            
             app.PDBFile.writeFile(
                 modeller.topology, 
                 modeller.positions, 
                 open(output_path, 'w')
             )
             
+            counts = {'atoms': n_atoms, 'residues': n_residues,
+                      'waters': n_waters, 'ions': n_ions}
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                shutil.copyfile(output_path, cached_pdb)
+                with open(cached_counts, 'w') as f:
+                    json.dump(counts, f)
+            except OSError:
+                pass
+            
             self.system_prepared = True
             self.last_structure_file = output_path
             
-            return f"""✅ Protein system created successfully:
+            return self._format_system_summary(
+                pdb_file, output_file, counts, padding, ionic_strength, forcefield
+            )
+            
+        except Exception as e:
+            return f"❌ System creation failed: {str(e)}"
+    
+    @staticmethod
+    def _format_system_summary(pdb_file: str, output_file: str, counts: Dict,
+                               padding: float, ionic_strength: float, forcefield: str) -> str:
+        """Status message for a prepared protein system."""
+        return f"""✅ Protein system created successfully:
   📄 Input: {pdb_file}
   📄 Output: {output_file}
-  ⚛️  Total atoms: {n_atoms}
-  🧬 Residues: {n_residues}
-  💧 Water molecules: {n_waters}
-  🧂 Ions: {n_ions}
+  ⚛️  Total atoms: {counts['atoms']}
+  🧬 Residues: {counts['residues']}
+  💧 Water molecules: {counts['waters']}
+  🧂 Ions: {counts['ions']}
   📦 Box padding: {padding} nm
   ⚗️  Ionic strength: {ionic_strength} M
   🔬 Force field: {forcefield}"""
-            
-        except Exception as e:
-            return f"❌ System creation failed: {str(e)}"
     
     def get_pdb_info(self, pdb_id: str) -> str:
         """
@@ -338,39 +525,49 @@ class StructureCreator:
         """
         pdb_id = pdb_id.upper().strip()
         
-        # Use RCSB REST API
-        url = f"https://data.rcsb.org/rest/v1/core/entry/{pdb_id}"
+        if not _PDB_ID_RE.match(pdb_id):
+            return f"❌ Invalid PDB ID: {pdb_id}. Must be 4 characters starting with a digit."
         
         try:
-            response = requests.get(url, timeout=10)
+            data = self._fetch_pdb_info(pdb_id)
+            if data is None:
+                return f"❌ PDB ID '{pdb_id}' not found"
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                title = data.get('struct', {}).get('title', 'N/A')
-                method = data.get('exptl', [{}])[0].get('method', 'N/A')
-                resolution = data.get('rcsb_entry_info', {}).get('resolution_combined', ['N/A'])[0]
-                deposit_date = data.get('rcsb_accession_info', {}).get('deposit_date', 'N/A')
-                
-                # Get polymer info
-                polymers = data.get('rcsb_entry_info', {}).get('polymer_entity_count', 0)
-                
-                return f"""📋 PDB Entry: {pdb_id}
+            title = data.get('struct', {}).get('title', 'N/A')
+            method = data.get('exptl', [{}])[0].get('method', 'N/A')
+            resolution = data.get('rcsb_entry_info', {}).get('resolution_combined', ['N/A'])[0]
+            deposit_date = data.get('rcsb_accession_info', {}).get('deposit_date', 'N/A')
+            
+            # Get polymer info
+            polymers = data.get('rcsb_entry_info', {}).get('polymer_entity_count', 0)
+            
+            return f"""📋 PDB Entry: {pdb_id}
   🔬 Title: {title}
   📊 Method: {method}
   📐 Resolution: {resolution} Å
   📅 Deposited: {deposit_date}
   🔗 Polymer entities: {polymers}
   🌐 URL: https://www.rcsb.org/structure/{pdb_id}"""
-                
-            elif response.status_code == 404:
-                return f"❌ PDB ID '{pdb_id}' not found"
-            else:
-                return f"❌ API error: status {response.status_code}"
-                
+            
+        except requests.HTTPError as e:
+            return f"❌ API error: status {e.response.status_code}"
         except Exception as e:
             return f"❌ Failed to get PDB info: {str(e)}"
     
+    def _fetch_pdb_info_uncached(self, pdb_id: str) -> Optional[Dict]:
+        """RCSB REST entry JSON (disk cache, then network); None if the entry does not exist."""
+        data = self._load_info_cache(pdb_id)
+        if data is not None:
+            return data
+        
+        # Use RCSB REST API
+        response = self._session.get(f"https://data.rcsb.org/rest/v1/core/entry/{pdb_id}", timeout=10)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        self._save_info_cache(pdb_id, response.content)
+        return _json_loads(response.content)
+    
     def search_pdb(self, query: str, max_results: int = 10) -> str:
         """
         Search RCSB PDB database.
@@ -382,6 +579,27 @@ class StructureCreator:
         Returns:
             Search results
         """
+        try:
+            total, results = self._search_entries(query, max_results)
+            
+            if not results:
+                return f"No results found for: {query}"
+            
+            output = f"🔍 Search results for '{query}' ({total} total):\n\n"
+            
+            for pdb_id, score in results[:max_results]:
+                output += f"  • {pdb_id} (score: {score:.2f})\n"
+            
+            output += f"\nUse download_pdb_structure(pdb_id) to download."
+            return output
+            
+        except requests.HTTPError as e:
+            return f"❌ Search failed: status {e.response.status_code}"
+        except Exception as e:
+            return f"❌ Search error: {str(e)}"
+    
+    def _search_entries_uncached(self, query: str, max_results: int) -> Tuple[int, Tuple[Tuple[str, float], ...]]:
+        """Run an RCSB full-text search; returns (total_count, ((pdb_id, score), ...))."""
         # RCSB Search API
         search_url = "https://search.rcsb.org/rcsbsearch/v2/query"
         
@@ -402,83 +620,195 @@ class StructureCreator:
             }
         }
         
-        try:
-            response = requests.post(search_url, json=search_query, timeout=15)
+        response = self._session.post(search_url, json=search_query, timeout=15)
+        if response.status_code == 204:  # RCSB answers an empty result set with 204
+            return 0, ()
+        response.raise_for_status()
+        
+        data = _json_loads(response.content)
+        results = tuple((entry.get('identifier', 'N/A'), entry.get('score', 0))
+                        for entry in data.get('result_set', []))
+        return data.get('total_count', 0), results
+    
+    @staticmethod
+    def _scan_pdb_numpy(pdb_path: str) -> Dict:
+        """
+        Vectorized scan of a fixed-width PDB file.
+        
+        Memory-maps the file and reads ATOM/HETATM columns as NumPy views, so
+        counting atoms, chains and residues runs in C instead of a per-line loop.
+        The few TITLE/REMARK lines are returned decoded for the callers to parse.
+        """
+        import numpy as np
+        
+        scan = {'atoms': 0, 'hetatms': 0, 'waters': 0, 'has_hydrogens': False,
+                'chains': set(), 'residues': 0, 'titles': [], 'remarks': []}
+        if os.path.getsize(pdb_path) == 0:
+            return scan
+        
+        buf = np.memmap(pdb_path, dtype=np.uint8, mode='r')
+        ends = np.flatnonzero(buf == 0x0A)
+        if ends.size == 0 or ends[-1] != buf.size - 1:
+            ends = np.append(ends, buf.size)  # last line without trailing newline
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        lengths = ends - starts
+        last = buf.size - 1
+        
+        def column(rows, col):
+            # Byte at a fixed column for the selected lines, space past end of line
+            return np.where(lengths[rows] > col, buf[np.minimum(starts[rows] + col, last)], 0x20).astype(np.uint8)
+        
+        def is_record(name):
+            mask = np.ones(starts.size, dtype=bool)
+            for col, ch in enumerate(name.encode('ascii')):
+                mask &= column(slice(None), col) == ch
+            return mask
+        
+        atom = is_record(StructureCreator.RECORD_ATOM)
+        hetatm = is_record(StructureCreator.RECORD_HETATM)
+        coords = atom | hetatm
+        scan['atoms'] = int(atom.sum())
+        scan['hetatms'] = int(hetatm.sum())
+        
+        # Waters by residue name (columns 18-20)
+        resname = np.stack([column(hetatm, c) for c in range(17, 20)], axis=1)
+        resname = np.ascontiguousarray(resname).view('S3').ravel()
+        scan['waters'] = int(np.isin(resname, [b'HOH', b'WAT']).sum())
+        
+        # Hydrogens by atom name (columns 13-14): 'H...' or ' H..'
+        c12, c13 = column(atom, 12), column(atom, 13)
+        scan['has_hydrogens'] = bool(np.any((c12 == 0x48) | ((c12 == 0x20) & (c13 == 0x48))))
+        
+        chain_rows = coords & (lengths > 21)
+        scan['chains'] = {chr(c) for c in np.unique(column(chain_rows, 21))}
+        
+        # Residue key = chain + resSeq + iCode (columns 22-27)
+        res_rows = coords & (lengths > 26)
+        res_ids = np.stack([column(res_rows, c) for c in range(21, 27)], axis=1)
+        scan['residues'] = int(np.unique(np.ascontiguousarray(res_ids).view('S6').ravel()).size)
+        
+        for key, record in (('titles', 'TITLE '), ('remarks', StructureCreator.RECORD_REMARK)):
+            for i in np.flatnonzero(is_record(record)):
+                scan[key].append(bytes(buf[starts[i]:ends[i]]).decode('ascii', 'replace').rstrip('\r'))
+        
+        return scan
+    
+    def _structure_info(self, pdb_file: str) -> Dict:
+        """Parsed structure info, or file size only when above max_parse_bytes."""
+        size = os.path.getsize(pdb_file)
+        if size > self.max_parse_bytes:
+            return {'title': f'not parsed ({size / 1e6:.0f} MB > max_parse_bytes); use a streaming tool'}
+        return self._parse_pdb_info(pdb_file)
+    
+    def _scan_pdb(self, pdb_path: str) -> Dict:
+        """
+        Single pass over a PDB file collecting everything the parsers report.
+        
+        The last scan is cached on (path, mtime), so validating a structure
+        that was just downloaded does not read the file again.
+        """
+        key = (os.path.abspath(pdb_path), os.path.getmtime(pdb_path))
+        if self._last_scan is not None and self._last_scan[0] == key:
+            return self._last_scan[1]
+        
+        if os.path.getsize(pdb_path) >= self.VECTOR_SCAN_MIN_BYTES:
+            # Large file: vectorized column scan, only header lines parsed below
+            scan = self._scan_pdb_numpy(pdb_path)
+            header = scan.pop('titles') + scan.pop('remarks')
+        else:
+            atoms = hetatms = waters = 0
+            has_hydrogens = False
+            chains = set()
+            residues = set()
+            chains_add = chains.add
+            residues_add = residues.add
+            header = []
             
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('result_set', [])
-                total = data.get('total_count', 0)
-                
-                if not results:
-                    return f"No results found for: {query}"
-                
-                output = f"🔍 Search results for '{query}' ({total} total):\n\n"
-                
-                for entry in results[:max_results]:
-                    pdb_id = entry.get('identifier', 'N/A')
-                    score = entry.get('score', 0)
-                    output += f"  • {pdb_id} (score: {score:.2f})\n"
-                
-                output += f"\nUse download_pdb_structure(pdb_id) to download."
-                return output
-                
-            else:
-                return f"❌ Search failed: status {response.status_code}"
-                
-        except Exception as e:
-            return f"❌ Search error: {str(e)}"
+            with open(pdb_path, 'r') as f:
+                for line in f:
+                    # Slice the record name once; ATOM/HETATM are >99% of lines
+                    rec = line[:6]
+                    if rec == self.RECORD_ATOM:
+                        atoms += 1
+                        if not has_hydrogens:
+                            name = line[12:16]
+                            if ' H' in name or name.strip().startswith('H'):
+                                has_hydrogens = True
+                    elif rec == self.RECORD_HETATM:
+                        hetatms += 1
+                        if 'HOH' in line or 'WAT' in line:
+                            waters += 1
+                    else:
+                        if rec == 'TITLE ' or rec == self.RECORD_REMARK:
+                            header.append(line)
+                        continue
+                    
+                    # Residue key = chain + resSeq + iCode; resName adds nothing to uniqueness
+                    n = len(line)
+                    if n > 26:
+                        chains_add(line[21])
+                        residues_add(line[21:27])
+                    elif n > 21:
+                        chains_add(line[21])
+            
+            scan = {'atoms': atoms, 'hetatms': hetatms, 'waters': waters,
+                    'has_hydrogens': has_hydrogens, 'chains': chains,
+                    'residues': len(residues)}
+        
+        title = ''
+        resolution = 'N/A'
+        missing_residues = []
+        for line in header:
+            if line.startswith('TITLE'):
+                title += line[10:].strip() + ' '
+            elif line.startswith('REMARK   2 RESOLUTION'):
+                parts = line.split()
+                for i, p in enumerate(parts):
+                    if p == 'ANGSTROMS' and i > 0:
+                        try:
+                            resolution = f"{float(parts[i-1]):.2f} Å"
+                        except:
+                            pass
+            elif line[7:10] == '465':
+                # Missing residues
+                if 'M RES' not in line and len(line) > 20:
+                    missing_residues.append(line[15:27].strip())
+        
+        scan['title'] = title.strip()
+        scan['resolution'] = resolution
+        scan['missing_residues'] = missing_residues
+        
+        self._last_scan = (key, scan)
+        return scan
     
     def _parse_pdb_info(self, pdb_file: str) -> Dict:
         """Parse basic information from PDB file."""
-        info = {
-            'atoms': 0,
-            'residues': set(),
-            'chains': set(),
-            'title': '',
-            'resolution': 'N/A'
-        }
-        
         try:
-            with open(pdb_file, 'r') as f:
-                for line in f:
-                    if line.startswith('ATOM') or line.startswith('HETATM'):
-                        info['atoms'] += 1
-                        if len(line) > 21:
-                            info['chains'].add(line[21])
-                        if len(line) > 26:
-                            res_id = line[17:26]
-                            info['residues'].add(res_id)
-                    elif line.startswith('TITLE'):
-                        info['title'] += line[10:].strip() + ' '
-                    elif line.startswith('REMARK   2 RESOLUTION'):
-                        parts = line.split()
-                        for i, p in enumerate(parts):
-                            if p == 'ANGSTROMS' and i > 0:
-                                try:
-                                    info['resolution'] = f"{float(parts[i-1]):.2f} Å"
-                                except:
-                                    pass
-            
-            info['residues'] = len(info['residues'])
-            info['chains'] = ','.join(sorted(info['chains'])) if info['chains'] else 'N/A'
-            info['title'] = info['title'].strip()[:100]  # Truncate
-            
+            scan = self._scan_pdb(pdb_file)
         except Exception:
-            pass
-        
-        return info
+            return {'atoms': 0, 'residues': 0, 'chains': 'N/A', 'title': '', 'resolution': 'N/A'}
+        
+        return {
+            'atoms': scan['atoms'] + scan['hetatms'],
+            'residues': scan['residues'],
+            'chains': ','.join(sorted(scan['chains'])) if scan['chains'] else 'N/A',
+            'title': scan['title'][:100],  # Truncate
+            'resolution': scan['resolution']
+        }
     
     def list_structures(self) -> str:
         """List all PDB/structure files in the working directory."""
-        extensions = ['.pdb', '.cif', '.pdbx', '.mmcif']
+        extensions = ('.pdb', '.cif', '.pdbx', '.mmcif')
         structures = []
         
-        for file in os.listdir(self.workdir):
-            if any(file.lower().endswith(ext) for ext in extensions):
-                filepath = os.path.join(self.workdir, file)
-                size = os.path.getsize(filepath)
-                structures.append(f"  • {file} ({size/1024:.1f} KB)")
+        # scandir yields entries with cached type/stat, no per-file stat() call
+        with os.scandir(self.workdir) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(extensions) and entry.is_file():
+                    size = entry.stat().st_size
+                    structures.append(f"  • {entry.name} ({size/1024:.1f} KB)")
         
         if structures:
             return f"📁 Structure files in workdir:\n" + "\n".join(structures)
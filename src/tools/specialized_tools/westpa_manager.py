@@ -5,113 +5,92 @@ Handles WESTPA weighted ensemble simulations for rare event sampling.
 Provides basic weighted ensemble functionality for protein folding and binding studies.
 """
 
+import errno
 import os
+import selectors
+import signal
 import subprocess
 import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional, Tuple, List, Dict
 
+# Optional analysis dependencies; methods report a missing package on use
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class WESTPAManager:
-    """Manages WESTPA weighted ensemble simulations."""
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+# RMSD kernel and reference coordinates (nm) of the current pool worker (set by _load_ref_once)
+_RMSD_PCOORD = None
+_REFERENCE = None
+
+
+def _load_ref_once(sim_root: str, ref_pdb: str):
+    """Process-pool initializer: import the project's system.py kernel and parse the reference once per worker."""
+    global _RMSD_PCOORD, _REFERENCE
+    # Same QCP kernel and PDB reader the segments use for their progress coordinate
+    sys.path.insert(0, sim_root)
+    from system import load_reference, rmsd_pcoord
+    _RMSD_PCOORD = rmsd_pcoord
+    _REFERENCE = load_reference(ref_pdb)
+
+
+def _segment_rmsd(seg_dir: str):
+    """Superposed RMSD (nm) of every frame in a segment's coords.npy to the reference."""
+    frames = np.load(os.path.join(seg_dir, 'coords.npy')).astype(np.float64) / 10.0  # Å -> nm
+    return _RMSD_PCOORD(frames, _REFERENCE)
+
+
+def _resample_walkers(weights, bin_ids, n_target: int, rng=None):
+    """
+    Systematic per-bin resampling of WE walkers to n_target walkers per bin.
     
-    def __init__(self, workdir: str):
-        self.workdir = workdir
-        self.westpa_dir = os.path.join(workdir, 'westpa')
-        self.workflow_logger = None  # Set by AutoGenSystem
+    Walkers are grouped by bin with a stable sort; one global cumulative-weight
+    array serves every bin, so all draws are placed with a single searchsorted.
+    Each bin keeps its total weight, split evenly over its n_target walkers.
+    
+    Args:
+        weights: Walker weights, shape (n,)
+        bin_ids: Bin index of each walker, shape (n,)
+        n_target: Walkers per occupied bin after resampling
+        rng: numpy Generator (default: fresh default_rng())
         
-        # State tracking
-        self.project_initialized = False
-        self.simulation_running = False
-        self.current_iteration = 0
+    Returns:
+        (indices into the input walkers, new weights), each shape (n_bins * n_target,)
+    """
+    rng = np.random.default_rng() if rng is None else rng
     
-    def _log(self, message: str):
-        """Log message if workflow logger is available."""
-        if self.workflow_logger:
-            self.workflow_logger.log_tool_invocation("WESTPAManager", {}, message)
+    order = np.argsort(bin_ids, kind='stable')
+    w = np.asarray(weights, dtype=np.float64)[order]
+    bins = np.asarray(bin_ids)[order]
     
-    def initialize_westpa_project(self, pdb_file: str, 
-                                  basis_state: str = "folded",
-                                  target_state: str = "unfolded",
-                                  n_walkers: int = 48,
-                                  tau: float = 10.0) -> str:
-        """
-        Initialize a WESTPA project directory structure.
-        
-        Args:
-            pdb_file: Input PDB structure (basis state)
-            basis_state: Name of the basis state
-            target_state: Name of the target state  
-            n_walkers: Number of walkers per bin
-            tau: Resampling interval in ps
-            
-        Returns:
-            Status message
-        """
-        self._log(f"Initializing WESTPA project: {pdb_file}")
-        
-        if not os.path.isabs(pdb_file):
-            pdb_path = os.path.join(self.workdir, pdb_file)
-        else:
-            pdb_path = pdb_file
-        
-        if not os.path.exists(pdb_path):
-            return f"❌ PDB file not found: {pdb_file}"
-        
-        try:
-            # Create WESTPA directory structure
-            dirs_to_create = [
-                self.westpa_dir,
-                os.path.join(self.westpa_dir, 'bstates'),
-                os.path.join(self.westpa_dir, 'tstates'),
-                os.path.join(self.westpa_dir, 'common_files'),
-                os.path.join(self.westpa_dir, 'westpa_scripts'),
-            ]
-            
-            for d in dirs_to_create:
-                os.makedirs(d, exist_ok=True)
-            
-            # Copy basis state structure
-            basis_pdb = os.path.join(self.westpa_dir, 'bstates', f'{basis_state}.pdb')
-            shutil.copy(pdb_path, basis_pdb)
-            
-            # Create west.cfg
-            self._create_west_cfg(n_walkers, tau)
-            
-            # Create system.py for progress coordinate
-            self._create_system_py()
-            
-            # Create runseg.sh script
-            self._create_runseg_script()
-            
-            # Create init.sh
-            self._create_init_script()
-            
-            self.project_initialized = True
-            
-            return f"""✅ WESTPA project initialized:
-  📁 Directory: {self.westpa_dir}
-  📄 Basis state: {basis_state} ({pdb_file})
-  🎯 Target state: {target_state}
-  🚶 Walkers: {n_walkers}
-  ⏱️  τ (tau): {tau} ps
-  
-  📂 Structure:
-    westpa/
-    ├── west.cfg
-    ├── system.py
-    ├── bstates/
-    ├── tstates/
-    ├── common_files/
-    └── westpa_scripts/
-  
-  Next: Run init.sh, then w_run"""
-            
-        except Exception as e:
-            return f"❌ WESTPA initialization failed: {str(e)}"
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], bins.size]
+    cum = np.cumsum(w)
+    before = cum[starts] - w[starts]  # cumulative weight preceding each bin
+    bin_weight = cum[ends - 1] - before
     
-    def _create_west_cfg(self, n_walkers: int, tau: float):
-        """Create WESTPA configuration file."""
-        config = f"""# WESTPA Configuration
+    # One uniform offset per bin, then n_target evenly spaced draws within it
+    u = rng.random(starts.size)
+    positions = before[:, None] + (u[:, None] + np.arange(n_target)) / n_target * bin_weight[:, None]
+    idx = np.searchsorted(cum, positions.ravel(), side='right')
+    idx = np.clip(idx, np.repeat(starts, n_target), np.repeat(ends - 1, n_target))  # float round-off
+    
+    return order[idx], np.repeat(bin_weight / n_target, n_target)
+
+
+# Generated project files. Static text is built once at import; west.cfg
+# only fills its run and HDF5 layout parameters via format_map.
+_WEST_CFG_TEMPLATE = """# WESTPA Configuration
 ---
 west:
   system:
@@ -130,10 +109,16 @@ west:
 
   data:
     west_data_file: west.h5
-    aux_compression_threshold: 0
+    # Per-segment working dirs ($WEST_CURRENT_SEG_DATA_REF in runseg.sh);
+    # aggregate_iteration reads coords.npy from here
+    data_refs:
+      segment: $WEST_SIM_ROOT/traj_segs/{{segment.n_iter:06d}}/{{segment.seg_id:06d}}
+    aux_compression_threshold: {aux_compression_threshold}
     datasets:
       - name: pcoord
         dtype: float64
+        chunks: {pcoord_chunks}
+        compression: {compression}
 
   plugins:
     - plugin: westpa.westext.wess.WESSDriver
@@ -150,28 +135,188 @@ west:
       cwd: null
       environ:
         SEG_DEBUG: 0
+    datasets:
+      # Segment coordinates (Å) from runseg.sh via $WEST_COORDS_RETURN; 'trajectory'
+      # is reserved for WESTPA's own trajectory loaders, so a plain dataset is used
+      - name: coords
+        loader: npy_data_loader
+        enabled: true
 
   we:
     n_iter: 100
     tau: {tau}
     n_walkers: {n_walkers}
 """
-        
-        config_path = os.path.join(self.westpa_dir, 'west.cfg')
-        with open(config_path, 'w') as f:
-            f.write(config)
-    
-    def _create_system_py(self):
-        """Create WESTPA system.py for progress coordinate calculation."""
-        system_py = '''"""
+
+_SYSTEM_PY_TEMPLATE = '''"""
 WESTPA System Configuration
 
 Defines progress coordinate calculation and binning for weighted ensemble.
 """
 
+import os
+from functools import lru_cache
+
 import numpy as np
 import westpa
 
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+# Compiled kernels are cached on disk, so only the first run pays for JIT
+_jit = njit(cache=True, fastmath=True) if HAVE_NUMBA else (lambda f: f)
+_parallel_jit = njit(parallel=True, cache=True, fastmath=True) if HAVE_NUMBA else (lambda f: f)
+
+
+if HAVE_NUMBA:
+    @_jit
+    def _inner_products(X, Y):
+        """Cross inner-product matrix and E0 of the centered coordinates (explicit loops)."""
+        n = X.shape[0]
+        cx = np.zeros(3)
+        cy = np.zeros(3)
+        for k in range(n):
+            for d in range(3):
+                cx[d] += X[k, d]
+                cy[d] += Y[k, d]
+        cx /= n
+        cy /= n
+        M = np.zeros((3, 3))
+        G = 0.0
+        for k in range(n):
+            for i in range(3):
+                xi = X[k, i] - cx[i]
+                yi = Y[k, i] - cy[i]
+                G += xi * xi + yi * yi
+                for j in range(3):
+                    M[i, j] += xi * (Y[k, j] - cy[j])
+        return M, 0.5 * G
+else:
+    def _inner_products(X, Y):
+        """Cross inner-product matrix and E0 of the centered coordinates (NumPy)."""
+        X = X - X.mean(axis=0)
+        Y = Y - Y.mean(axis=0)
+        E0 = 0.5 * (np.einsum('ij,ij->', X, X) + np.einsum('ij,ij->', Y, Y))
+        return X.T @ Y, E0
+
+
+@_jit
+def _qcp_from_inner_products(M, E0, n_atoms, max_iter=50, tol=1e-11):
+    """
+    RMSD from the 3x3 inner-product matrix M = X.T @ Y of centered coordinates.
+    
+    Theobald's QCP method: the largest eigenvalue of the 4x4 key matrix is
+    found by Newton iteration on its characteristic polynomial, so no SVD or
+    diagonalization is needed.
+    """
+    Sxx, Sxy, Sxz = M[0, 0], M[0, 1], M[0, 2]
+    Syx, Syy, Syz = M[1, 0], M[1, 1], M[1, 2]
+    Szx, Szy, Szz = M[2, 0], M[2, 1], M[2, 2]
+    
+    Sxx2, Syy2, Szz2 = Sxx * Sxx, Syy * Syy, Szz * Szz
+    Sxy2, Syz2, Sxz2 = Sxy * Sxy, Syz * Syz, Sxz * Sxz
+    Syx2, Szy2, Szx2 = Syx * Syx, Szy * Szy, Szx * Szx
+    
+    SyzSzymSyySzz2 = 2.0 * (Syz * Szy - Syy * Szz)
+    Sxx2Syy2Szz2Syz2Szy2 = Syy2 + Szz2 - Sxx2 + Syz2 + Szy2
+    Sxy2Sxz2Syx2Szx2 = Sxy2 + Sxz2 - Syx2 - Szx2
+    SxzpSzx, SyzpSzy, SxypSyx = Sxz + Szx, Syz + Szy, Sxy + Syx
+    SyzmSzy, SxzmSzx, SxymSyx = Syz - Szy, Sxz - Szx, Sxy - Syx
+    SxxpSyy, SxxmSyy = Sxx + Syy, Sxx - Syy
+    
+    # Characteristic polynomial x^4 + C2 x^2 + C1 x + C0 of the key matrix
+    C2 = -2.0 * (Sxx2 + Syy2 + Szz2 + Sxy2 + Syx2 + Sxz2 + Szx2 + Syz2 + Szy2)
+    C1 = 8.0 * (Sxx * Syz * Szy + Syy * Szx * Sxz + Szz * Sxy * Syx
+                - Sxx * Syy * Szz - Syz * Szx * Sxy - Szy * Syx * Sxz)
+    C0 = (Sxy2Sxz2Syx2Szx2 * Sxy2Sxz2Syx2Szx2
+          + (Sxx2Syy2Szz2Syz2Szy2 + SyzSzymSyySzz2) * (Sxx2Syy2Szz2Syz2Szy2 - SyzSzymSyySzz2)
+          + (-SxzpSzx * SyzmSzy + SxymSyx * (SxxmSyy - Szz)) * (-SxzmSzx * SyzpSzy + SxymSyx * (SxxmSyy + Szz))
+          + (-SxzpSzx * SyzpSzy - SxypSyx * (SxxpSyy - Szz)) * (-SxzmSzx * SyzmSzy - SxypSyx * (SxxpSyy + Szz))
+          + (SxypSyx * SyzpSzy + SxzpSzx * (SxxmSyy + Szz)) * (-SxymSyx * SyzmSzy + SxzpSzx * (SxxpSyy + Szz))
+          + (SxypSyx * SyzmSzy + SxzmSzx * (SxxmSyy - Szz)) * (-SxymSyx * SyzpSzy + SxzmSzx * (SxxpSyy - Szz)))
+    
+    # Newton-Raphson from the upper bound E0
+    lam = E0
+    for _ in range(max_iter):
+        old = lam
+        x2 = lam * lam
+        b = (x2 + C2) * lam
+        a = b + C1
+        denom = 2.0 * x2 * lam + b + a
+        if denom == 0.0:  # degenerate (e.g. identical or collinear) structures
+            break
+        lam -= (a * lam + C0) / denom
+        if abs(lam - old) < abs(tol * lam):
+            break
+    
+    return np.sqrt(max(0.0, 2.0 * (E0 - lam) / n_atoms))
+
+
+@_jit
+def qcp_rmsd(X, Y):
+    """Minimum (superposed) RMSD between two (n_atoms, 3) coordinate arrays."""
+    M, E0 = _inner_products(X, Y)
+    return _qcp_from_inner_products(M, E0, X.shape[0])
+
+
+@_parallel_jit
+def rmsd_pcoord(frames, reference):
+    """RMSD progress coordinate for each frame of an (n_frames, n_atoms, 3) array."""
+    out = np.empty(frames.shape[0])
+    for i in prange(frames.shape[0]):
+        out[i] = qcp_rmsd(frames[i], reference)
+    return out
+
+
+# Structure the RMSD progress coordinate is measured against
+REFERENCE_PDB = os.path.join(os.environ.get('WEST_SIM_ROOT', '.'), 'common_files', 'reference.pdb')
+
+
+@lru_cache(maxsize=None)
+def load_reference(path=REFERENCE_PDB):
+    """Reference coordinates (n_atoms, 3) in nm, read from the ATOM/HETATM records of a PDB."""
+    with open(path) as f:
+        coords = [(float(line[30:38]), float(line[38:46]), float(line[46:54]))
+                  for line in f if line.startswith(('ATOM  ', 'HETATM'))]
+    return np.array(coords) / 10.0  # Å -> nm
+
+
+class CloseStructureCache:
+    """
+    Reuse superposition rotations for structures that barely moved.
+    
+    Entries are keyed by (parent_id, reference_id). While a structure's centered
+    coordinates stay within epsilon (RMS, coordinate units) of the anchor the
+    rotation was fitted on, that rotation is applied and only the residual is
+    evaluated; otherwise the rotation is refitted and the anchor moves.
+    """
+    
+    def __init__(self, epsilon=0.1):
+        self.R = {}
+        self.anchor = {}
+        self.eps = epsilon
+    
+    def rmsd(self, key, X, Y):
+        """RMSD of X onto reference Y, refitting the rotation only on a cache miss."""
+        X = X - X.mean(axis=0)
+        Y = Y - Y.mean(axis=0)
+        
+        anchor = self.anchor.get(key)
+        if anchor is None or np.sqrt(np.einsum('ij,ij->', X - anchor, X - anchor) / X.shape[0]) > self.eps:
+            # Kabsch fit from the 3x3 inner-product matrix
+            U, _, Vt = np.linalg.svd(X.T @ Y)
+            U[:, -1] *= np.sign(np.linalg.det(U @ Vt))  # proper rotation, no reflection
+            self.R[key] = U @ Vt
+            self.anchor[key] = X
+        
+        diff = X @ self.R[key] - Y
+        return np.sqrt(np.einsum('ij,ij->', diff, diff) / X.shape[0])
+
+
 class System(westpa.core.systems.WESTSystem):
     """WESTPA system configuration."""
     
@@ -197,18 +342,34 @@ class System(westpa.core.systems.WESTSystem):
         # Target state: RMSD < 0.2 nm from target
         self.bin_target_counts = np.zeros(n_bins, dtype=np.int64)
         
-    def get_pcoord(self, pcoord):
-        """Get progress coordinate from trajectory."""
-        return pcoord
-'''
+        # Rotations reused across adjacent segments (pathMSD-style pcoords)
+        self.rotation_cache = CloseStructureCache(epsilon=0.1)
         
-        system_path = os.path.join(self.westpa_dir, 'system.py')
-        with open(system_path, 'w') as f:
-            f.write(system_py)
-    
-    def _create_runseg_script(self):
-        """Create WESTPA segment propagation script."""
-        runseg = '''#!/bin/bash
+        # Compile (or load) the RMSD kernels now, not during iteration 1
+        ref = np.arange(30, dtype=np.float64).reshape(10, 3)
+        rmsd_pcoord(ref[np.newaxis] + 0.1, ref)
+        
+    def get_pcoord(self, coords, parent_id=None):
+        """
+        RMSD progress coordinate (nm) of each frame against the reference structure.
+        
+        Args:
+            coords: Frame coordinates in nm, (n_frames, n_atoms, 3) or (n_atoms, 3)
+            parent_id: Parent segment id; when given, the superposition rotation
+                       fitted for that parent is reused while the structure stays
+                       within the cache epsilon
+        """
+        frames = np.asarray(coords, dtype=np.float64)
+        if frames.ndim == 2:
+            frames = frames[np.newaxis]
+        reference = load_reference()
+        if parent_id is None:
+            return rmsd_pcoord(frames, reference)
+        return np.array([self.rotation_cache.rmsd((parent_id, REFERENCE_PDB), frame, reference)
+                         for frame in frames])
+'''
+
+_RUNSEG_TEMPLATE = '''#!/bin/bash
 # WESTPA segment propagation script
 
 # Source WESTPA environment
@@ -216,6 +377,7 @@ if [ -n "$WEST_ROOT" ]; then
     source $WEST_ROOT/westpa.sh
 fi
 
+mkdir -p $WEST_CURRENT_SEG_DATA_REF
 cd $WEST_CURRENT_SEG_DATA_REF
 
 # Get parent coordinates
@@ -246,27 +408,40 @@ else:
 # Run segment (tau ps)
 # simulation.step(n_steps)
 
-# Calculate progress coordinate (RMSD)
-# ... mdtraj or internal calculation
+# Calculate progress coordinate: QCP RMSD kernels from $WEST_SIM_ROOT/system.py
+# (no mdtraj needed)
+import sys
+import numpy as np
+sys.path.insert(0, os.environ['WEST_SIM_ROOT'])
+from system import load_reference, rmsd_pcoord
+
+positions = simulation.context.getState(getPositions=True).getPositions(asNumpy=True)
+frames = positions.value_in_unit(unit.nanometer)[np.newaxis].astype(np.float64)
+rmsd = rmsd_pcoord(frames, load_reference())[-1]
 
 # Save pcoord
 with open('pcoord.txt', 'w') as f:
     f.write(f'{rmsd}\\n')
 
+# Keep coordinates (Å) in the segment dir (traj_segs/<iter>/<seg>/, read by
+# WESTPAManager.aggregate_iteration) and hand them back as .npy so the WESTPA
+# server loads them with npy_data_loader instead of building an MDTraj
+# trajectory per segment
+coords = positions.value_in_unit(unit.angstrom)[np.newaxis].astype(np.float32)
+np.save('coords.npy', coords)
+coords_return = os.environ.get('WEST_COORDS_RETURN')
+if coords_return:
+    # Through a file handle: np.save would append '.npy' to a bare path
+    with open(coords_return, 'wb') as f:
+        np.save(f, coords)
+
 OPENMM_SCRIPT
 
 # Output progress coordinate for WESTPA
 cat pcoord.txt
 '''
-        
-        script_path = os.path.join(self.westpa_dir, 'westpa_scripts', 'runseg.sh')
-        with open(script_path, 'w') as f:
-            f.write(runseg)
-        os.chmod(script_path, 0o755)
-    
-    def _create_init_script(self):
-        """Create WESTPA initialization script."""
-        init_sh = '''#!/bin/bash
+
+_INIT_SH_TEMPLATE = '''#!/bin/bash
 # WESTPA initialization script
 
 set -e
@@ -287,10 +462,211 @@ w_init $BSTATE_ARGS --segs-per-state 1
 
 echo "WESTPA initialization complete"
 '''
+
+
+class WESTPAManager:
+    """Manages WESTPA weighted ensemble simulations."""
+    
+    # HDF5 chunk cache for west.h5 reads (default is 1 MiB / 521 slots)
+    H5_CHUNK_CACHE_BYTES = 64 * 1024 * 1024
+    H5_CHUNK_CACHE_SLOTS = 10007  # prime, well above the chunks touched per read
+    
+    RUN_TIMEOUT_S = 7200  # 2 hours max for local testing
+    PROGRESS_POLL_S = 30  # how often to read completed iterations while w_run runs
+    STOP_GRACE_S = 60  # time w_run gets after SIGTERM to commit the current iteration
+    
+    # get_status may be polled; only the volatile fields are formatted per call
+    STATUS_TEMPLATE = ("📊 WESTPA Status:\n"
+                       "  📁 Project: {project}\n"
+                       "  🔄 Completed iterations: {n_iter}\n"
+                       "  🏃 Running: {running}")
+    
+    def __init__(self, workdir: str):
+        self.workdir = workdir
+        self.westpa_dir = os.path.join(workdir, 'westpa')
+        self.workflow_logger = None  # Set by AutoGenSystem
         
+        # State tracking
+        self.project_initialized = False
+        self.simulation_running = False
+        self.current_iteration = 0
+        self.basis_pdb = None
+    
+    def _log(self, message: str):
+        """Log message if workflow logger is available."""
+        if self.workflow_logger:
+            self.workflow_logger.log_tool_invocation("WESTPAManager", {}, message)
+    
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        """Hardlink src to dst (O(1)); copy when linking isn't possible (other filesystem)."""
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return  # already in place (e.g. re-initializing from bstates/); removing dst would delete it
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                shutil.copyfile(src, dst)
+            else:
+                raise
+    
+    @staticmethod
+    def _validate_pdb(pdb_path: str) -> Optional[str]:
+        """
+        Cheap structural check of a PDB before it becomes a basis state.
+        
+        Reads forward only until the first coordinate record, then the last
+        block of the file, where the highest atom serials are.
+        
+        Returns:
+            Error message, or None if the file looks usable
+        """
+        block = 65536
+        with open(pdb_path, 'rb') as f:
+            carry = b'\n'
+            while True:
+                chunk = f.read(block)
+                if not chunk:
+                    return f"❌ Invalid PDB (no ATOM/HETATM records): {os.path.basename(pdb_path)}"
+                data = carry + chunk
+                if b'\nATOM  ' in data or b'\nHETATM' in data:
+                    break
+                carry = data[-7:]
+            
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - block))
+            tail = f.read()
+        
+        # '*****' in the serial columns means >99999 atoms written without hybrid-36
+        for line in tail.splitlines():
+            if line[:6] in (b'ATOM  ', b'HETATM') and b'*****' in line[6:11]:
+                return "❌ PDB has atom-number overflow (>99999 atoms). Use hybrid36 or mmCIF."
+        return None
+    
+    def initialize_westpa_project(self, pdb_file: str, 
+                                  basis_state: str = "folded",
+                                  target_state: str = "unfolded",
+                                  n_walkers: int = 48,
+                                  tau: float = 10.0) -> str:
+        """
+        Initialize a WESTPA project directory structure.
+        
+        Args:
+            pdb_file: Input PDB structure (basis state)
+            basis_state: Name of the basis state
+            target_state: Name of the target state  
+            n_walkers: Number of walkers per bin
+            tau: Resampling interval in ps
+            
+        Returns:
+            Status message
+        """
+        self._log(f"Initializing WESTPA project: {pdb_file}")
+        
+        if not os.path.isabs(pdb_file):
+            pdb_path = os.path.join(self.workdir, pdb_file)
+        else:
+            pdb_path = pdb_file
+        
+        if not os.path.exists(pdb_path):
+            return f"❌ PDB file not found: {pdb_file}"
+        
+        try:
+            # Fail now rather than hundreds of iterations in
+            error = self._validate_pdb(pdb_path)
+            if error:
+                return error
+            
+            # Create WESTPA directory structure (westpa_dir itself is created
+            # with the first subdirectory, not by a separate call)
+            for sub in ('bstates', 'tstates', 'common_files', 'westpa_scripts'):
+                os.makedirs(os.path.join(self.westpa_dir, sub), exist_ok=True)
+            
+            # Copy basis state structure
+            basis_pdb = os.path.join(self.westpa_dir, 'bstates', f'{basis_state}.pdb')
+            self._link_or_copy(pdb_path, basis_pdb)
+            self.basis_pdb = basis_pdb
+            # Reference structure for the RMSD progress coordinate (see system.py)
+            self._link_or_copy(pdb_path, os.path.join(self.westpa_dir, 'common_files', 'reference.pdb'))
+            
+            # Create west.cfg
+            self._create_west_cfg(n_walkers, tau)
+            
+            # Create system.py for progress coordinate
+            self._create_system_py()
+            
+            # Create runseg.sh script
+            self._create_runseg_script()
+            
+            # Create init.sh
+            self._create_init_script()
+            
+            self.project_initialized = True
+            
+            return f"""✅ WESTPA project initialized:
+  📁 Directory: {self.westpa_dir}
+  📄 Basis state: {basis_state} ({pdb_file})
+  🎯 Target state: {target_state}
+  🚶 Walkers: {n_walkers}
+  ⏱️  τ (tau): {tau} ps
+  
+  📂 Structure:
+    westpa/
+    ├── west.cfg
+    ├── system.py
+    ├── bstates/
+    ├── tstates/
+    ├── common_files/
+    └── westpa_scripts/
+  
+  Next: Run init.sh, then w_run"""
+            
+        except Exception as e:
+            return f"❌ WESTPA initialization failed: {str(e)}"
+    
+    def _create_west_cfg(self, n_walkers: int, tau: float,
+                         aux_compression_threshold: int = 1048576,
+                         compression: str = 'lzf',
+                         chunk_size_pcoords: Tuple[int, int, int] = (100, 11, 1)):
+        """
+        Create WESTPA configuration file.
+        
+        The pcoord dataset is written in (segments, timepoints, dims) chunks so
+        one iteration reads as a few contiguous chunks; LZF decompresses several
+        times faster than gzip on those reads.
+        """
+        config = _WEST_CFG_TEMPLATE.format_map({
+            'n_walkers': n_walkers,
+            'tau': tau,
+            'aux_compression_threshold': aux_compression_threshold,
+            'compression': compression or 'null',
+            'pcoord_chunks': '[' + ', '.join(str(n) for n in chunk_size_pcoords) + ']',
+        })
+        
+        config_path = os.path.join(self.westpa_dir, 'west.cfg')
+        with open(config_path, 'w') as f:
+            f.write(config)
+    
+    def _create_system_py(self):
+        """Create WESTPA system.py for progress coordinate calculation."""
+        system_path = os.path.join(self.westpa_dir, 'system.py')
+        with open(system_path, 'w') as f:
+            f.write(_SYSTEM_PY_TEMPLATE)
+    
+    def _create_runseg_script(self):
+        """Create WESTPA segment propagation script."""
+        script_path = os.path.join(self.westpa_dir, 'westpa_scripts', 'runseg.sh')
+        with open(script_path, 'w') as f:
+            f.write(_RUNSEG_TEMPLATE)
+        os.chmod(script_path, 0o755)
+    
+    def _create_init_script(self):
+        """Create WESTPA initialization script."""
         script_path = os.path.join(self.westpa_dir, 'init.sh')
         with open(script_path, 'w') as f:
-            f.write(init_sh)
+            f.write(_INIT_SH_TEMPLATE)
         os.chmod(script_path, 0o755)
     
     def run_westpa_simulation(self, iterations: int = 100) -> str:
@@ -309,44 +685,180 @@ echo "WESTPA initialization complete"
             return "❌ WESTPA project not initialized. Run initialize_westpa_project() first."
         
         try:
-            # Check if WESTPA is available
-            result = subprocess.run(
-                ['which', 'w_run'],
-                capture_output=True, text=True, timeout=10
-            )
-            
-            if result.returncode != 0:
+            # Check if WESTPA is available (PATH lookup in-process, no fork)
+            if shutil.which('w_run') is None:
                 return "❌ WESTPA not found in PATH. Install with: pip install westpa"
             
-            # Run WESTPA
+            # Run WESTPA, streaming its output instead of buffering it all
             self.simulation_running = True
             
-            result = subprocess.run(
+            # Readers (get_status, progress polling) open west.h5 while w_run writes
+            env = dict(os.environ, HDF5_USE_FILE_LOCKING='FALSE')
+            proc = subprocess.Popen(
                 ['w_run', '--max-iterations', str(iterations)],
-                cwd=self.westpa_dir,
-                capture_output=True, text=True,
-                timeout=7200  # 2 hours max for local testing
+                cwd=self.westpa_dir, env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                start_new_session=True  # own process group, so workers are stopped with it
             )
+            returncode, stderr_tail = self._stream_process(proc)
             
             self.simulation_running = False
+            self._update_current_iteration()
             
-            if result.returncode == 0:
+            if returncode == 0:
                 return f"""✅ WESTPA simulation completed:
   🔄 Iterations: {iterations}
   📁 Data file: west.h5
   📊 Analyze with: w_pdist, w_trace"""
             else:
-                return f"❌ WESTPA failed: {result.stderr}"
+                return f"❌ WESTPA failed: {stderr_tail}"
                 
         except subprocess.TimeoutExpired:
             self.simulation_running = False
-            return "⚠️ WESTPA simulation still running (timeout reached). Check status with w_trace."
+            self._update_current_iteration()
+            return (f"⚠️ WESTPA simulation stopped at the {self.RUN_TIMEOUT_S}s limit after "
+                    f"{self.current_iteration} iterations. Completed iterations are kept in west.h5; "
+                    f"rerun to continue.")
         except FileNotFoundError:
             return "❌ WESTPA not installed. Run: pip install westpa"
         except Exception as e:
             self.simulation_running = False
             return f"❌ WESTPA error: {str(e)}"
     
+    def _open_west_h5(self, west_h5: str):
+        """
+        Open west.h5 read-only with a large chunk cache.
+        
+        SWMR mode lets readers see committed iterations while w_run is still
+        appending; files not written in a SWMR-capable format open normally.
+        """
+        cache = dict(rdcc_nbytes=self.H5_CHUNK_CACHE_BYTES,
+                     rdcc_nslots=self.H5_CHUNK_CACHE_SLOTS)
+        try:
+            return h5py.File(west_h5, 'r', swmr=True, libver='latest', **cache)
+        except OSError:
+            return h5py.File(west_h5, 'r', **cache)
+    
+    @staticmethod
+    def _read_dataset(dataset):
+        """Read a whole HDF5 dataset into a preallocated array in one call."""
+        buf = np.empty(dataset.shape, dtype=dataset.dtype)
+        if buf.size:
+            dataset.read_direct(buf)
+        return buf
+    
+    @staticmethod
+    def _iteration_count(f) -> int:
+        """Number of iterations in an open west.h5, without listing its groups."""
+        if 'west_current_iteration' in f.attrs:
+            return int(f.attrs['west_current_iteration'])
+        if 'summary' in f:
+            return f['summary'].shape[0]
+        return len(f['iterations'])
+    
+    @staticmethod
+    def _load_iteration_weights(f) -> Tuple:
+        """
+        Load segment weights for every iteration into one flat array.
+        
+        Dataset shapes are read first (metadata only) to size the buffer, then
+        each iteration is read straight into its slice of it.
+        
+        Returns:
+            (iteration names in numeric order, weights, segments per iteration)
+        """
+        iterations = f['iterations']
+        n_iter = WESTPAManager._iteration_count(f)
+        iter_names = [name for name in (f'iter_{i:08d}' for i in range(1, n_iter + 1))
+                      if name in iterations]
+        seg_indexes = [iterations[name]['seg_index'] for name in iter_names]
+        counts = np.array([ds.shape[0] for ds in seg_indexes], dtype=np.int64)
+        
+        weights = np.empty(int(counts.sum()), dtype=np.float64)
+        offset = 0
+        for ds, n in zip(seg_indexes, counts):
+            if n:
+                buf = np.empty(n, dtype=ds.dtype)
+                ds.read_direct(buf)
+                weights[offset:offset + n] = buf['weight']
+            offset += n
+        return iter_names, weights, counts
+    
+    def _stream_process(self, proc: subprocess.Popen) -> Tuple[int, str]:
+        """
+        Forward a running process's output to the log line by line.
+        
+        Both pipes are multiplexed with a selector; completed iterations are
+        read from west.h5 every PROGRESS_POLL_S while the process runs.
+        
+        Returns:
+            (return code, last lines of stderr)
+        
+        Raises:
+            subprocess.TimeoutExpired: if RUN_TIMEOUT_S elapses (process is stopped)
+        """
+        deadline = time.monotonic() + self.RUN_TIMEOUT_S
+        next_poll = time.monotonic() + self.PROGRESS_POLL_S
+        stderr_tail = deque(maxlen=50)
+        partial = {}
+        
+        sel = selectors.DefaultSelector()
+        sel.register(proc.stdout, selectors.EVENT_READ, 'stdout')
+        sel.register(proc.stderr, selectors.EVENT_READ, 'stderr')
+        try:
+            while sel.get_map():
+                now = time.monotonic()
+                if now >= deadline:
+                    self._stop_process_group(proc)
+                    raise subprocess.TimeoutExpired(proc.args, self.RUN_TIMEOUT_S)
+                
+                for key, _ in sel.select(timeout=min(deadline - now, self.PROGRESS_POLL_S)):
+                    # Raw os.read: buffered readline() can hide lines from select()
+                    chunk = os.read(key.fileobj.fileno(), 65536)
+                    if not chunk:
+                        sel.unregister(key.fileobj)
+                        lines = [partial.pop(key.data, b'')]
+                    else:
+                        lines = (partial.pop(key.data, b'') + chunk).split(b'\n')
+                        partial[key.data] = lines.pop()
+                    for raw in lines:
+                        line = raw.decode(errors='replace').rstrip()
+                        if not line:
+                            continue
+                        self._log(f"w_run {key.data}: {line}")
+                        if key.data == 'stderr':
+                            stderr_tail.append(line)
+                
+                if time.monotonic() >= next_poll:
+                    self._update_current_iteration()
+                    next_poll = time.monotonic() + self.PROGRESS_POLL_S
+        finally:
+            sel.close()
+            proc.stdout.close()
+            proc.stderr.close()
+        
+        return proc.wait(), "\n".join(stderr_tail)
+    
+    def _stop_process_group(self, proc: subprocess.Popen):
+        """SIGTERM the process group so w_run can checkpoint; SIGKILL after STOP_GRACE_S."""
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=self.STOP_GRACE_S)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+        except ProcessLookupError:
+            proc.wait()
+    
+    def _update_current_iteration(self):
+        """Refresh current_iteration from west.h5; ignored if it can't be read yet."""
+        west_h5 = os.path.join(self.westpa_dir, 'west.h5')
+        try:
+            with self._open_west_h5(west_h5) as f:
+                self.current_iteration = self._iteration_count(f)
+        except Exception:
+            pass
+    
     def analyze_pathways(self, output_file: str = "pathways.dat") -> str:
         """
         Basic pathway analysis - flux and probability calculation.
@@ -364,42 +876,48 @@ echo "WESTPA initialization complete"
         if not os.path.exists(west_h5):
             return "❌ WESTPA data file (west.h5) not found. Run simulation first."
         
-        try:
-            import h5py
-            import numpy as np
-        except ImportError:
+        if h5py is None or np is None:
             return "❌ h5py not installed. Run: pip install h5py"
         
         try:
-            with h5py.File(west_h5, 'r') as f:
-                # Get iterations
-                iterations = list(f['iterations'].keys())
+            with self._open_west_h5(west_h5) as f:
+                # Get iterations (all weights in one buffer)
+                iterations, all_weights, seg_counts = self._load_iteration_weights(f)
                 n_iter = len(iterations)
                 
                 # Get final weights
                 if n_iter > 0:
                     last_iter = iterations[-1]
-                    weights = f[f'iterations/{last_iter}/seg_index']['weight'][:]
-                    pcoords = f[f'iterations/{last_iter}/pcoord'][:]
+                    weights = all_weights[all_weights.size - seg_counts[-1]:]
+                    pcoords = self._read_dataset(f[f'iterations/{last_iter}/pcoord'])
                     
-                    total_weight = np.sum(weights)
                     n_walkers = len(weights)
                     
-                    # Basic statistics
-                    mean_pcoord = np.average(pcoords[:, -1], weights=weights)
-                    min_pcoord = np.min(pcoords[:, -1])
-                    max_pcoord = np.max(pcoords[:, -1])
+                    # Basic statistics on the contiguous final-timepoint column
+                    last_pcoord = np.ascontiguousarray(pcoords[:, -1], dtype=np.float64)
+                    total_weight = weights.sum()
+                    mean_pcoord = np.einsum('i,i->', weights, last_pcoord) / total_weight
+                    min_pcoord = last_pcoord.min()
+                    max_pcoord = last_pcoord.max()
                 else:
                     return "❌ No iterations found in west.h5"
             
             # Save pathway data
             output_path = os.path.join(self.westpa_dir, output_file)
+            lines = [
+                "# WESTPA Pathway Analysis",
+                f"# Iterations: {n_iter}",
+                f"# Walkers: {n_walkers}",
+                f"# Total weight: {total_weight:.6e}",
+                f"# Mean pcoord: {mean_pcoord:.4f}",
+                "# iteration  n_segments  total_weight",
+            ]
+            for name, n, end in zip(iterations, seg_counts, np.cumsum(seg_counts)):
+                lines.append(f"{name}  {n}  {all_weights[end - n:end].sum():.6e}")
+            
+            # One buffered write instead of a write() per line
             with open(output_path, 'w') as f:
-                f.write(f"# WESTPA Pathway Analysis\n")
-                f.write(f"# Iterations: {n_iter}\n")
-                f.write(f"# Walkers: {n_walkers}\n")
-                f.write(f"# Total weight: {total_weight:.6e}\n")
-                f.write(f"# Mean pcoord: {mean_pcoord:.4f}\n")
+                f.write("\n".join(lines) + "\n")
             
             return f"""✅ Pathway analysis completed:
   🔄 Iterations analyzed: {n_iter}
@@ -418,6 +936,64 @@ echo "WESTPA initialization complete"
         except Exception as e:
             return f"❌ Pathway analysis failed: {str(e)}"
     
+    def aggregate_iteration(self, iter_no: int, reference_pdb: str = None,
+                            max_workers: Optional[int] = None) -> str:
+        """
+        Compute RMSD progress coordinates for every segment of an iteration.
+        
+        Segments are processed in parallel worker processes with the project's
+        system.py QCP kernel, so the values match the WESTPA progress coordinate;
+        each worker parses the reference structure once. Results are written to
+        traj_segs/{iter_no:06d}/pcoord.npy as (n_segments, n_frames), in nm.
+        
+        Args:
+            iter_no: WE iteration number
+            reference_pdb: Reference structure (default: common_files/reference.pdb)
+            max_workers: Worker processes (default: CPU count)
+            
+        Returns:
+            Status message
+        """
+        self._log(f"Aggregating WESTPA iteration {iter_no}")
+        
+        iter_dir = os.path.join(self.westpa_dir, 'traj_segs', f'{iter_no:06d}')
+        if not os.path.isdir(iter_dir):
+            return f"❌ No segment data for iteration {iter_no}: {iter_dir}"
+        
+        if not os.path.exists(os.path.join(self.westpa_dir, 'system.py')):
+            return "❌ system.py not found. Initialize the WESTPA project first."
+        
+        reference_pdb = reference_pdb or os.path.join(self.westpa_dir, 'common_files', 'reference.pdb')
+        if not os.path.exists(reference_pdb):
+            return "❌ Reference structure not found. Pass reference_pdb or initialize the project first."
+        
+        seg_dirs = sorted(
+            entry.path for entry in os.scandir(iter_dir)
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, 'coords.npy'))
+        )
+        if not seg_dirs:
+            return f"❌ No segments with coords.npy in {iter_dir}"
+        
+        if np is None:
+            return "❌ numpy not installed. Run: pip install numpy"
+        
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_load_ref_once,
+                                     initargs=(self.westpa_dir, reference_pdb)) as pool:
+                rmsds = list(pool.map(_segment_rmsd, seg_dirs))
+            
+            pcoords = np.array(rmsds)
+            output_path = os.path.join(iter_dir, 'pcoord.npy')
+            np.save(output_path, pcoords)
+            
+            return f"""✅ Iteration {iter_no} aggregated:
+  🚶 Segments: {len(seg_dirs)}
+  📊 RMSD range: {pcoords.min():.3f} - {pcoords.max():.3f} nm
+  📄 Output: {os.path.relpath(output_path, self.westpa_dir)}"""
+            
+        except Exception as e:
+            return f"❌ Iteration aggregation failed: {str(e)}"
+    
     def get_status(self) -> str:
         """Get current WESTPA simulation status."""
         west_h5 = os.path.join(self.westpa_dir, 'west.h5')
@@ -429,14 +1005,12 @@ echo "WESTPA initialization complete"
             return "📊 WESTPA Status: Project initialized, no simulation data"
         
         try:
-            import h5py
-            with h5py.File(west_h5, 'r') as f:
-                n_iter = len(list(f['iterations'].keys()))
+            with self._open_west_h5(west_h5) as f:
+                n_iter = self._iteration_count(f)
             
-            return f"""📊 WESTPA Status:
-  📁 Project: {self.westpa_dir}
-  🔄 Completed iterations: {n_iter}
-  🏃 Running: {self.simulation_running}"""
+            return self.STATUS_TEMPLATE.format(
+                project=self.westpa_dir, n_iter=n_iter, running=self.simulation_running
+            )
         except:
             return "📊 WESTPA Status: Data file exists but could not be read"
     
@@ -469,7 +1043,7 @@ echo "WESTPA initialization complete"
         # Copy target state if provided
         if unfolded_pdb and os.path.exists(unfolded_pdb):
             target_path = os.path.join(self.westpa_dir, 'tstates', 'unfolded.pdb')
-            shutil.copy(unfolded_pdb, target_path)
+            self._link_or_copy(unfolded_pdb, target_path)
         
         return f"""{result}
 
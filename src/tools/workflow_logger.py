@@ -1,5 +1,5 @@
 """
-Workflow Logger - Pydantic-based Observability
+Workflow Logger - Structured Observability
 
 Tracks agent decisions, tool invocations, validation gates, and workflow state
 for debugging and transparency in the protein MD simulation framework.
@@ -7,30 +7,135 @@ for debugging and transparency in the protein MD simulation framework.
 
 import os
 import json
+import atexit
+import copy
+import struct
+import dataclasses
+import time
+import queue
+import threading
+from collections import Counter, deque
+from functools import lru_cache
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Union
 
+try:
+    import orjson  # serializes plain dicts (incl. datetime) several times faster
+except ImportError:
+    orjson = None
 
-class WorkflowEvent(BaseModel):
+try:
+    import msgpack  # compact binary log frames (log_format="msgpack")
+except ImportError:
+    msgpack = None
+
+# msgpack log frames are prefixed with their length as a little-endian uint32
+_FRAME_HEADER = struct.Struct('<I')
+
+# Queued to the writer thread to make it exit
+_STOP_WRITER = object()
+
+# Shared read-only context for events logged without one
+_EMPTY_CONTEXT = MappingProxyType({})
+
+
+def _json_default(value: Any) -> Any:
+    """Encode values JSON has no type for (datetimes, read-only mappings, objects)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    return str(value)
+
+
+@lru_cache(maxsize=256)
+def _iso_seconds(seconds: int) -> str:
+    """Local-time ISO 8601 string for a whole epoch second."""
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def _format_ts(ns: int) -> str:
+    """ISO 8601 string for an epoch-ns timestamp (same text as datetime.isoformat)."""
+    seconds, rem = divmod(ns, 1_000_000_000)
+    micros = rem // 1000
+    if micros:
+        return f"{_iso_seconds(seconds)}.{micros:06d}"
+    return _iso_seconds(seconds)
+
+
+def _clip(value: Any, limit: int) -> Any:
+    """Truncate str/bytes values to limit characters (bytes are decoded); others pass through."""
+    if isinstance(value, str):
+        return value[:limit]
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value[:limit]).decode('utf-8', 'replace')
+    return value
+
+
+@dataclasses.dataclass(slots=True, kw_only=True)
+class WorkflowEvent:
     """A single event in the workflow execution."""
     
-    timestamp: datetime = Field(default_factory=datetime.now)
+    # Epoch nanoseconds; formatted only when the event is serialized
+    timestamp_ns: int = dataclasses.field(default_factory=time.time_ns)
     event_type: str  # 'agent_call', 'tool_invocation', 'validation_gate', 'state_change'
     agent_name: Optional[str] = None
     tool_name: Optional[str] = None
     status: str  # 'started', 'success', 'failed', 'warning'
     message: str
-    context: Dict[str, Any] = Field(default_factory=dict)
+    context: Dict[str, Any] = dataclasses.field(default_factory=dict)
     duration_ms: Optional[float] = None
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
+    @property
+    def timestamp(self) -> datetime:
+        """Event time as a local datetime."""
+        seconds, rem = divmod(self.timestamp_ns, 1_000_000_000)
+        return datetime.fromtimestamp(seconds).replace(microsecond=rem // 1000)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow field dict, in declaration order (timestamp as a datetime)."""
+        return {name: getattr(self, name) for name in _EVENT_FIELDS}
+    
+    def _record(self, timestamp: Any) -> Dict[str, Any]:
+        """Shallow field dict for serialization, with the given timestamp value."""
+        return {
+            "timestamp": timestamp,
+            "event_type": self.event_type,
+            "agent_name": self.agent_name,
+            "tool_name": self.tool_name,
+            "status": self.status,
+            "message": self.message,
+            "context": self.context,
+            "duration_ms": self.duration_ms,
         }
+    
+    def to_json_bytes(self) -> bytes:
+        """Encode the event as one JSONL line (bytes, newline included)."""
+        data = self._record(_format_ts(self.timestamp_ns))
+        if orjson is not None:
+            # The default hook keeps arbitrary context values from failing the write
+            return orjson.dumps(data, default=_json_default,
+                                option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(data, default=_json_default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+# Event keys as logged: "timestamp" (from timestamp_ns) then the other fields
+_EVENT_VALUE_FIELDS = tuple(name for name in WorkflowEvent.__dataclass_fields__
+                            if name != "timestamp_ns")
+_EVENT_FIELDS = ("timestamp",) + _EVENT_VALUE_FIELDS
+
 
+def _event_as_dict(event: WorkflowEvent) -> Dict[str, Any]:
+    """Independent dict copy of an event for callers (like dataclasses.asdict)."""
+    data = event.to_dict()
+    data['context'] = copy.deepcopy(dict(event.context))
+    return data
 
-class WorkflowState(BaseModel):
+
+@dataclasses.dataclass(slots=True)
+class WorkflowState:
     """Current state of the protein MD workflow."""
     
     structure_downloaded: bool = False
@@ -47,32 +152,265 @@ class WorkflowState(BaseModel):
     current_trajectory: Optional[str] = None
     
     last_error: Optional[str] = None
-    warnings: List[str] = Field(default_factory=list)
+    warnings: List[str] = dataclasses.field(default_factory=list)
+
+
+# Fields each built-in event type always leaves as None (see the log_* methods)
+_NULL_FIELDS_BY_TYPE = {
+    "system": ("agent_name", "tool_name", "duration_ms"),
+    "agent_call": ("tool_name", "duration_ms"),
+    "tool_invocation": ("agent_name",),
+    "validation_gate": ("agent_name", "tool_name", "duration_ms"),
+    "state_change": ("agent_name", "tool_name", "duration_ms"),
+}
+
+# Compact encoders shared by the generated serializers (stdlib json path only)
+_encode_json = json.JSONEncoder(default=_json_default, ensure_ascii=False,
+                                separators=(',', ':')).encode
+_encode_str = json.encoder.encode_basestring
+
+# Expression templates used by the generated serializers, per field kind
+_STR_FIELD_EXPR = "(_encode_str({v}) if {v}.__class__ is str else _encode_json({v}))"
+_FIELD_EXPRS = {
+    "timestamp": "'\"' + _format_ts(event.timestamp_ns) + '\"'",
+    "context": "('{{}}' if not event.context else _encode_json(event.context))",
+    "duration_ms": "('null' if event.duration_ms is None else _encode_json(event.duration_ms))",
+}
+
+
+def _build_json_serializer(event_type: str, null_fields: tuple):
+    """
+    Generate a JSONL serializer specialised for one event type.
+    
+    Keys, the event_type value and the always-None fields are baked into
+    constant string fragments, and each remaining field is encoded by a
+    type-specific expression instead of one generic dict encode. Events
+    that do set one of null_fields use the generic encoder.
+    """
+    pieces = []  # (is_constant, text)
+    for name in _EVENT_FIELDS:
+        sep = '{' if not pieces else ','
+        key = sep + json.dumps(name) + ':'
+        if name == "event_type":
+            pieces.append((True, key + json.dumps(event_type, ensure_ascii=False)))
+        elif name in null_fields:
+            pieces.append((True, key + 'null'))
+        else:
+            pieces.append((True, key))
+            template = _FIELD_EXPRS.get(name, _STR_FIELD_EXPR)
+            pieces.append((False, template.format(v=f"event.{name}")))
+    pieces.append((True, '}\n'))
+    
+    # Merge adjacent constants into single literals
+    exprs = []
+    for is_constant, text in pieces:
+        if is_constant and exprs and exprs[-1][0]:
+            exprs[-1] = (True, exprs[-1][1] + text)
+        else:
+            exprs.append((is_constant, text))
+    body = " + ".join(repr(text) if is_constant else text for is_constant, text in exprs)
+    
+    func_name = f"_serialize_{event_type}"
+    lines = [f"def {func_name}(event):"]
+    if null_fields:
+        guard = " or ".join(f"event.{name} is not None" for name in null_fields)
+        lines += [f"    if {guard}:", "        return _generic(event)"]
+    lines.append(f"    return ({body}).encode('utf-8')")
+    
+    namespace = {"_encode_json": _encode_json, "_encode_str": _encode_str, "_format_ts": _format_ts,
+                 "_generic": WorkflowEvent.to_json_bytes}
+    exec("\n".join(lines), namespace)
+    return namespace[func_name]
+
+
+_JSON_SERIALIZERS = {
+    event_type: _build_json_serializer(event_type, null_fields)
+    for event_type, null_fields in _NULL_FIELDS_BY_TYPE.items()
+}
+
+
+def _serialize_event_json(event: WorkflowEvent) -> bytes:
+    """Encode an event as one JSONL line via its type's generated serializer."""
+    serializer = _JSON_SERIALIZERS.get(event.event_type)
+    if serializer is None:
+        return event.to_json_bytes()
+    return serializer(event)
+
+
+def _serialize_event_msgpack(event: WorkflowEvent) -> bytes:
+    """Encode an event as one length-prefixed msgpack frame."""
+    # The raw epoch-ns int is stored; iter_log formats it when reading back
+    payload = msgpack.packb(event._record(event.timestamp_ns), default=_json_default)
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+def _dump_json(obj: Any) -> bytes:
+    """Encode obj as compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def iter_log(path: str, raw: bool = False):
+    """
+    Yield events from a workflow log file one at a time, in logged order.
+    
+    With raw=True, JSONL logs yield each line's JSON bytes undecoded
+    (msgpack frames are always decoded).
+    """
+    if not path.endswith('.msgpack'):
+        with open(path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line if raw else json.loads(line)
+        return
+    
+    if msgpack is None:
+        raise ImportError("msgpack is required to read .msgpack workflow logs")
+    
+    header_size = _FRAME_HEADER.size
+    with open(path, 'rb') as f:
+        # A trailing partial frame (e.g. after a crash mid-write) is ignored
+        while True:
+            header = f.read(header_size)
+            if len(header) < header_size:
+                return
+            (length,) = _FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            event = msgpack.unpackb(payload, raw=False)
+            if isinstance(event.get("timestamp"), int):
+                event["timestamp"] = _format_ts(event["timestamp"])
+            yield event
+
+
+def read_log(path: str) -> List[Dict[str, Any]]:
+    """
+    Read events back from a workflow log file.
+    
+    Handles both JSONL (.jsonl) and length-prefixed msgpack (.msgpack) logs.
+    Timestamps are returned as ISO 8601 strings in either case.
+    
+    Returns:
+        List of event dictionaries in logged order
+    """
+    return list(iter_log(path))
 
 
 class WorkflowLogger:
     """
-    Pydantic-based workflow logger for observability.
+    Structured workflow logger for observability.
     
     Logs all agent decisions, tool invocations, and validation gates
-    to a structured JSONL file for debugging and analysis.
+    to a structured JSONL file (or, with log_format="msgpack", a binary
+    length-prefixed msgpack file; see read_log) for debugging and analysis.
+    
+    Events are buffered and appended to the log in batches; call flush()
+    to force pending lines to disk (close() is also run at exit). With
+    io_backend="thread" the batches are written by a background thread so
+    logging calls never wait on the disk.
     """
     
-    def __init__(self, workdir: str):
+    # Longest tool result / string parameter kept in a tool_invocation event
+    MAX_RESULT_CHARS = 500
+    
+    # Field names accepted by update_state/log_state_change
+    _STATE_FIELDS = frozenset(WorkflowState.__dataclass_fields__)
+    
+    # Completed-step lines shown by get_workflow_summary, in display order
+    _STATE_LABELS = (
+        ("structure_downloaded", "✅ Structure downloaded"),
+        ("structure_cleaned", "✅ Structure cleaned"),
+        ("forcefield_validated", "✅ Force field validated"),
+        ("simulation_completed", "✅ Simulation completed"),
+        ("analysis_completed", "✅ Analysis completed"),
+    )
+    
+    # Flush the write buffer once it holds this many bytes or events
+    LOG_FLUSH_BYTES = 64 * 1024
+    LOG_FLUSH_EVENTS = 128
+    
+    LOG_FORMATS = ("jsonl", "msgpack")
+    IO_BACKENDS = ("sync", "thread")
+    
+    # Events kept in memory for get_recent_events; the log file holds them all
+    MAX_IN_MEMORY_EVENTS = 1024
+    
+    # Report write failures at most this often (seconds); the rest are counted
+    WRITE_ERROR_REPORT_INTERVAL = 1.0
+    
+    def __init__(self, workdir: str, log_format: str = "jsonl", io_backend: str = "sync",
+                 max_in_memory_events: Optional[int] = MAX_IN_MEMORY_EVENTS):
+        if log_format not in self.LOG_FORMATS:
+            raise ValueError(f"Unknown log format '{log_format}'. Use one of: {self.LOG_FORMATS}")
+        if io_backend not in self.IO_BACKENDS:
+            raise ValueError(f"Unknown I/O backend '{io_backend}'. Use one of: {self.IO_BACKENDS}")
+        if log_format == "msgpack" and msgpack is None:
+            raise ImportError("msgpack is required for log_format='msgpack'")
+        
         self.workdir = workdir
-        self.events: List[WorkflowEvent] = []
+        self.log_format = log_format
+        if log_format == "msgpack":
+            self._serialize = _serialize_event_msgpack
+        elif orjson is not None:
+            # orjson encodes the whole dataclass in C; nothing to specialise
+            self._serialize = WorkflowEvent.to_json_bytes
+        else:
+            self._serialize = _serialize_event_json
+        # Most recent events only (None = unbounded)
+        self.events: deque = deque(maxlen=max_in_memory_events)
+        # Dict snapshots for get_recent_events, parallel to self.events
+        # (None until an event is first requested)
+        self._event_dicts: deque = deque(maxlen=max_in_memory_events)
+        
+        # Running summary statistics, updated per event by _log_event
+        self._event_count = 0
+        self._counts: Counter = Counter()
+        self._failures: List[WorkflowEvent] = []
+        # Epoch-ns timestamps of the first and latest events
+        self._first_ts: Optional[int] = None
+        self._last_ts: Optional[int] = None
         self.state = WorkflowState()
         
         # Create log file path
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = os.path.join(workdir, f"workflow_log_{timestamp}.jsonl")
+        self.log_file = os.path.join(workdir, f"workflow_log_{timestamp}.{log_format}")
         
         # Performance tracking
-        self._operation_start_times: Dict[str, datetime] = {}
+        # Operation start times from time.perf_counter_ns() (monotonic)
+        self._operation_start_times: Dict[str, int] = {}
         
         # Ensure workdir exists
         os.makedirs(workdir, exist_ok=True)
         
+        # Write failures seen so far, and when one was last printed (time.monotonic())
+        self._write_errors = 0
+        self._last_error_report_ts: Optional[float] = None
+        
+        # Raw append-only descriptor written with os.write; batching happens in self._buf
+        self._buf = bytearray()
+        self._buffered_events = 0
+        # Guards _buf and the descriptor: agents log from worker threads, and
+        # os.write releases the GIL mid-flush
+        self._lock = threading.Lock()
+        try:
+            self._fd: Optional[int] = os.open(self.log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        except OSError as e:
+            print(f"⚠️ Failed to open log: {e}")
+            self._fd = None
+        # Thread backend: _log_event only queues encoded events; one writer
+        # thread batches them into the file in order
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._writer: Optional[threading.Thread] = None
+        if io_backend == "thread" and self._fd is not None:
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._drain, name="workflow-log", daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
+        
         # Log initialization
         self._log_event(WorkflowEvent(
             event_type="system",
@@ -82,14 +420,128 @@ class WorkflowLogger:
         ))
     
     def _log_event(self, event: WorkflowEvent):
-        """Write event to log file and store in memory."""
+        """Buffer event for the log file and store in memory."""
         self.events.append(event)
+        self._event_dicts.append(None)
+        
+        self._event_count += 1
+        self._counts[event.event_type] += 1
+        if event.status == "failed":
+            self._failures.append(event)
+        if self._first_ts is None:
+            self._first_ts = event.timestamp_ns
+        self._last_ts = event.timestamp_ns
+        
+        try:
+            data = self._serialize(event)
+        except Exception as e:
+            self._report_write_error(e)
+            return
         
+        if self._queue is not None:
+            self._queue.put(data)
+            return
+        if self._fd is None:
+            # Log file closed (or never opened); keep the in-memory record only
+            return
+        
+        with self._lock:
+            self._buf += data
+            self._buffered_events += 1
+            # Failures go to disk straight away so they survive a crash
+            due = (len(self._buf) >= self.LOG_FLUSH_BYTES
+                   or self._buffered_events >= self.LOG_FLUSH_EVENTS
+                   or event.status == "failed")
+        if due:
+            self.flush()
+    
+    def flush(self, wait: bool = False):
+        """
+        Write buffered events to the log file.
+        
+        Args:
+            wait: With the thread backend, block until every queued event is written
+        """
+        if self._fd is None:
+            return
+        
+        if self._queue is not None:
+            if wait:
+                # The writer sets the marker once everything queued before it is written
+                written = threading.Event()
+                self._queue.put(written)
+                written.wait()
+            return
+        
+        # Held across the write so batches from concurrent flushes stay in order
+        with self._lock:
+            if self._buf and self._fd is not None:
+                self._write(self._buf)
+            self._buf.clear()
+            self._buffered_events = 0
+    
+    def _drain(self):
+        """Writer thread: batch queued events and append them to the log file."""
+        q = self._queue
+        buf = bytearray()
+        while True:
+            item = q.get()
+            markers = []
+            stop = False
+            # Take whatever else is already queued, up to one batch
+            while True:
+                if item is _STOP_WRITER:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    buf += item
+                if stop or len(buf) >= self.LOG_FLUSH_BYTES:
+                    break
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+            if buf:
+                self._write(buf)
+                buf.clear()
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+    
+    def _write(self, data):
+        """Append a batch of encoded events to the log file."""
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(event.model_dump_json() + '\n')
+            written = os.write(self._fd, data)
+            # os.write may write less than asked (e.g. on signals); finish the batch
+            while written < len(data):
+                written += os.write(self._fd, data[written:])
         except Exception as e:
-            print(f"⚠️ Failed to write log: {e}")
+            self._report_write_error(e)
+    
+    def _report_write_error(self, error: Exception):
+        """Count a failed log write; print at most once per WRITE_ERROR_REPORT_INTERVAL."""
+        self._write_errors += 1
+        now = time.monotonic()
+        last = self._last_error_report_ts
+        if last is not None and now - last < self.WRITE_ERROR_REPORT_INTERVAL:
+            return
+        self._last_error_report_ts = now
+        print(f"⚠️ Failed to write log: {error} (write errors so far: {self._write_errors})")
+    
+    def close(self):
+        """Flush buffered events and close the log file."""
+        if self._writer is not None:
+            self._queue.put(_STOP_WRITER)
+            self._writer.join()
+            self._writer = None
+            self._queue = None
+        self.flush()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
     
     def log_agent_call(self, agent_name: str, message: str, 
                        context: Dict[str, Any] = None):
@@ -106,33 +558,34 @@ class WorkflowLogger:
             agent_name=agent_name,
             status="started",
             message=message,
-            context=context or {}
+            context=context if context else _EMPTY_CONTEXT
         )
         self._log_event(event)
     
     def log_tool_invocation(self, tool_name: str, params: Dict[str, Any], 
-                           result: str, status: str = "success"):
+                           result: Union[str, bytes], status: str = "success"):
         """
         Log a tool/function invocation.
         
         Args:
             tool_name: Name of the tool being invoked
-            params: Parameters passed to the tool
-            result: Result message from the tool
+            params: Parameters passed to the tool (long string values are truncated)
+            result: Result message from the tool (str, or UTF-8 bytes)
             status: 'success', 'failed', or 'warning'
         """
         # Calculate duration if we have a start time
         duration_ms = None
         if tool_name in self._operation_start_times:
             start = self._operation_start_times.pop(tool_name)
-            duration_ms = (datetime.now() - start).total_seconds() * 1000
+            duration_ms = (time.perf_counter_ns() - start) / 1_000_000
         
         event = WorkflowEvent(
             event_type="tool_invocation",
             tool_name=tool_name,
             status=status,
-            message=result[:500] if len(result) > 500 else result,  # Truncate long messages
-            context={"params": params},
+            message=_clip(result, self.MAX_RESULT_CHARS),  # Truncate long messages
+            context={"params": {k: _clip(v, self.MAX_RESULT_CHARS) for k, v in params.items()}
+                     if params else params},
             duration_ms=duration_ms
         )
         self._log_event(event)
@@ -176,12 +629,12 @@ class WorkflowLogger:
         self._log_event(event)
         
         # Update internal state
-        if hasattr(self.state, field):
+        if field in self._STATE_FIELDS:
             setattr(self.state, field, new_value)
     
     def start_operation(self, operation_name: str):
         """Mark the start of an operation for duration tracking."""
-        self._operation_start_times[operation_name] = datetime.now()
+        self._operation_start_times[operation_name] = time.perf_counter_ns()
     
     def get_workflow_summary(self) -> str:
         """
@@ -190,31 +643,24 @@ class WorkflowLogger:
         Returns:
             Formatted summary string
         """
-        total_events = len(self.events)
-        agent_calls = sum(1 for e in self.events if e.event_type == "agent_call")
-        tool_calls = sum(1 for e in self.events if e.event_type == "tool_invocation")
-        validations = sum(1 for e in self.events if e.event_type == "validation_gate")
-        failures = sum(1 for e in self.events if e.status == "failed")
+        # The summary points at the log file, so make it complete first
+        self.flush()
+        
+        total_events = self._event_count
+        agent_calls = self._counts["agent_call"]
+        tool_calls = self._counts["tool_invocation"]
+        validations = self._counts["validation_gate"]
+        failures = len(self._failures)
         
         # Calculate total duration
-        if self.events:
-            start = self.events[0].timestamp
-            end = self.events[-1].timestamp
-            duration = (end - start).total_seconds()
+        if self._first_ts is not None:
+            duration = (self._last_ts - self._first_ts) / 1e9
         else:
             duration = 0
         
-        state_summary = []
-        if self.state.structure_downloaded:
-            state_summary.append("✅ Structure downloaded")
-        if self.state.structure_cleaned:
-            state_summary.append("✅ Structure cleaned")
-        if self.state.forcefield_validated:
-            state_summary.append("✅ Force field validated")
-        if self.state.simulation_completed:
-            state_summary.append("✅ Simulation completed")
-        if self.state.analysis_completed:
-            state_summary.append("✅ Analysis completed")
+        state = self.state
+        state_summary = "\n".join(label for attr, label in self._STATE_LABELS
+                                  if getattr(state, attr))
         
         return f"""📊 Workflow Summary
 {'='*50}
@@ -226,25 +672,48 @@ class WorkflowLogger:
   • Failures: {failures}
 
 🔄 Workflow State:
-{chr(10).join(state_summary) if state_summary else '  (No completed steps)'}
+{state_summary or '  (No completed steps)'}
 
 📁 Log file: {self.log_file}
 {'='*50}"""
     
     def get_recent_events(self, count: int = 10) -> List[Dict[str, Any]]:
-        """Get the most recent events as dictionaries."""
-        return [e.model_dump() for e in self.events[-count:]]
+        """
+        Get the most recent events as dictionaries.
+        
+        Each event's dict is built once and cached; callers get shallow
+        copies, so nested context values should be treated as read-only.
+        """
+        events, dicts = self.events, self._event_dicts
+        if len(dicts) != len(events):
+            # self.events was changed directly; start the snapshots over
+            dicts = self._event_dicts = deque([None] * len(events), maxlen=events.maxlen)
+        
+        recent = []
+        # Walk back from the newest event so cost depends on count, not on len(events)
+        for back in range(1, min(count, len(events)) + 1):
+            snapshot = dicts[-back]
+            if snapshot is None:
+                snapshot = dicts[-back] = _event_as_dict(events[-back])
+            recent.append(dict(snapshot))
+        recent.reverse()
+        return recent
     
     def get_errors(self) -> List[WorkflowEvent]:
         """Get all error events."""
-        return [e for e in self.events if e.status == "failed"]
+        return list(self._failures)
     
-    def export_events(self, output_file: str = None) -> str:
+    def export_events(self, output_file: str = None, pretty: bool = True) -> str:
         """
         Export all events to a JSON file.
         
+        Events are streamed from the log file one at a time, since only the
+        most recent ones are kept in memory; the full list is never built.
+        
         Args:
             output_file: Output filename (default: workflow_events.json)
+            pretty: Indent the output (default); False writes compact JSON, which is
+                    faster on large logs
             
         Returns:
             Path to exported file
@@ -252,18 +721,46 @@ class WorkflowLogger:
         if output_file is None:
             output_file = os.path.join(self.workdir, "workflow_events.json")
         
-        events_data = {
-            "workflow_state": self.state.model_dump(),
-            "events": [e.model_dump() for e in self.events],
-            "summary": {
-                "total_events": len(self.events),
-                "failures": sum(1 for e in self.events if e.status == "failed"),
-                "log_file": self.log_file
-            }
+        if self._fd is not None:
+            self.flush(wait=True)
+            # Compact JSONL lines are already valid JSON and are copied as-is
+            events = iter_log(self.log_file, raw=not pretty)
+        elif pretty:
+            events = (_event_as_dict(e) for e in self.events)
+        else:
+            events = (e.to_dict() for e in self.events)
+        
+        summary = {
+            "total_events": self._event_count,
+            "failures": len(self._failures),
+            "log_file": self.log_file
         }
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(events_data, f, indent=2, default=str)
+        if pretty:
+            # Same text json.dump(..., indent=2, default=str) produces for the whole document
+            head, tail = b'{\n  "workflow_state": ', b'\n}'
+            open_events, item_sep = b',\n  "events": [\n    ', b',\n    '
+            close_events, no_events = b'\n  ],\n  "summary": ', b',\n  "events": [],\n  "summary": '
+            
+            def dump(obj, pad=b'\n  '):
+                # JSON strings escape newlines, so this only re-indents structure
+                return json.dumps(obj, indent=2, default=str).encode('ascii').replace(b'\n', pad)
+        else:
+            head, tail = b'{"workflow_state":', b'}'
+            open_events, item_sep = b',"events":[', b','
+            close_events, no_events = b'],"summary":', b',"events":[],"summary":'
+            
+            def dump(obj, pad=None):
+                return obj if isinstance(obj, bytes) else _dump_json(obj)
+        
+        with open(output_file, 'wb') as f:
+            f.write(head + dump(dataclasses.asdict(self.state)))
+            first = True
+            for event in events:
+                f.write(open_events if first else item_sep)
+                f.write(dump(event, b'\n    '))
+                first = False
+            f.write((no_events if first else close_events) + dump(summary) + tail)
         
         return output_file
     
@@ -275,7 +772,7 @@ class WorkflowLogger:
             logger.update_state(structure_downloaded=True, current_pdb_file="1LYZ.pdb")
         """
         for field, value in kwargs.items():
-            if hasattr(self.state, field):
+            if field in self._STATE_FIELDS:
                 old_value = getattr(self.state, field)
                 setattr(self.state, field, value)
                 self.log_state_change(field, old_value, value)